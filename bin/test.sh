@@ -1,3 +1,4 @@
 #!/bin/sh
 
-cp -r ./test/* ./src/*
\ No newline at end of file
+# Engine tests; each checks an engine result against the exact pandas one
+python -m pytest -q test "$@"
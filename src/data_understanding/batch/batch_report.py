@@ -0,0 +1,170 @@
+"""Headless batch reports: profile many CSVs without starting a web server.
+
+    python batch_report.py "exports/*.csv" --output reports
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'report_generation'))
+from campaign_report import build_campaign_report
+from report_snapshot import export_sources, save_snapshot
+from engine.parallel import WORKERS
+from engine.profiler import analyze_csv
+from engine.streaming import profile_csv_chunked
+from static_report import (MAX_ROWS, PLOTLY_CDN, PLOTLY_JS, campaign_html, campaign_to_dict, index_html,
+                           profile_html, profile_to_dict, write_plotly_js)
+
+
+def report_names(paths):
+    """A distinct report name per path, from the file name without extension."""
+    names, used = {}, set()
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        name, suffix = stem, 2
+        while name in used or name in ('index', 'summary', 'campaign'):
+            name, suffix = f"{stem}-{suffix}", suffix + 1
+        used.add(name)
+        names[path] = name
+    return names
+
+
+def _write(output, name, document, page):
+    with open(os.path.join(output, f"{name}.json"), 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2)
+    with open(os.path.join(output, f"{name}.html"), 'w', encoding='utf-8') as f:
+        f.write(page)
+    return {'json': f"{name}.json", 'html': f"{name}.html"}
+
+
+def profile_job(path, name, output, streaming=False, quantile_method='exact', plotly_js=PLOTLY_JS,
+                max_rows=MAX_ROWS, top_k=None, planned=False):
+    started = time.perf_counter()
+    if streaming:
+        result = profile_csv_chunked(path, top_k=top_k)
+    else:
+        result = analyze_csv(path, quantile_method=quantile_method, top_k=top_k, planned=planned)
+    document = dict(profile_to_dict(result, os.path.basename(path), max_rows),
+                    generated_at=datetime.now().isoformat(timespec='seconds'))
+    written = _write(output, name, document, profile_html(result, os.path.basename(path), plotly_js, max_rows))
+    return dict(written, name=name, files=[path], rows=int(result.row_count),
+                seconds=time.perf_counter() - started)
+
+
+def campaign_job(paths, output, approximate=False, plotly_js=PLOTLY_JS, max_rows=MAX_ROWS, snapshot=None):
+    started = time.perf_counter()
+    report = build_campaign_report(paths['card'], paths['transaction'], paths['redemption'],
+                                   approximate=approximate)
+    generated_at = datetime.now()
+    document = dict(campaign_to_dict(report, max_rows), files=paths,
+                    generated_at=generated_at.isoformat(timespec='seconds'))
+    page = campaign_html(report, f"VISA Japan Campaign Analysis {generated_at.strftime('%B %d, %Y')}",
+                         plotly_js, max_rows)
+    written = _write(output, 'campaign', document, page)
+    if snapshot:
+        save_snapshot(report, snapshot, sources=export_sources(paths))
+    return dict(written, name='campaign', files=list(paths.values()), rows=None,
+                seconds=time.perf_counter() - started)
+
+
+def run(jobs, workers):
+    """Run ``(name, files, function, args, kwargs)`` jobs in ``workers`` processes; failures are recorded."""
+    entries = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(func, *args, **kwargs): (name, files) for name, files, func, args, kwargs in jobs}
+        for future in as_completed(futures):
+            name, files = futures[future]
+            try:
+                entry = future.result()
+                print(f"{name:30s} {entry['seconds']:8.2f}s  {', '.join(files)}")
+            except Exception as exc:
+                entry = {'name': name, 'files': files, 'error': f"{type(exc).__name__}: {exc}"}
+                print(f"{name:30s}   FAILED  {entry['error']}", file=sys.stderr)
+            entries.append(entry)
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile CSV files and write static JSON and HTML reports.")
+    parser.add_argument('patterns', nargs='*', help="glob patterns of CSV files to profile")
+    parser.add_argument('--card', help="card export for the campaign report")
+    parser.add_argument('--transaction', help="transaction export for the campaign report")
+    parser.add_argument('--redemption', help="redemption export for the campaign report")
+    parser.add_argument('--snapshot', help="also save the campaign report as a snapshot (directory or .zip)")
+    parser.add_argument('--output', default='reports', help="directory for the reports")
+    parser.add_argument('--jobs', type=int, default=WORKERS, help="files profiled at the same time")
+    parser.add_argument('--streaming', action='store_true',
+                        help="read each CSV in chunks (bounded memory, except 16 bytes per distinct row "
+                             "for duplicate detection)")
+    parser.add_argument('--approximate', action='store_true',
+                        help="t-digest group quartiles and HyperLogLog campaign counts")
+    parser.add_argument('--max-rows', type=int, default=MAX_ROWS, help="rows kept per table")
+    parser.add_argument('--top-k', type=int, help="most frequent values kept per qualitative column")
+    parser.add_argument('--plan', action='store_true',
+                        help="plan the cross-analysis: skip ID columns, group timestamps by day, cap the groups")
+    parser.add_argument('--plotlyjs', choices=['directory', 'cdn'], default='directory',
+                        help="load plotly.js from the output directory or from the CDN")
+    args = parser.parse_args()
+
+    campaign = {'card': args.card, 'transaction': args.transaction, 'redemption': args.redemption}
+    if any(campaign.values()) and not all(campaign.values()):
+        parser.error("the campaign report needs --card, --transaction and --redemption together")
+    paths = sorted({path for pattern in args.patterns for path in glob.glob(pattern, recursive=True)
+                    if os.path.isfile(path)})
+    if not paths and not all(campaign.values()):
+        parser.error("no CSV files matched and no campaign exports given")
+
+    os.makedirs(args.output, exist_ok=True)
+    if args.plotlyjs == 'directory':
+        write_plotly_js(args.output)
+    plotly_js = PLOTLY_JS if args.plotlyjs == 'directory' else PLOTLY_CDN
+    quantile_method = 'sketch' if args.approximate else 'exact'
+
+    jobs = [(name, [path], profile_job, (path, name, args.output),
+             {'streaming': args.streaming, 'quantile_method': quantile_method,
+              'plotly_js': plotly_js, 'max_rows': args.max_rows, 'top_k': args.top_k,
+              'planned': args.plan})
+            for path, name in report_names(paths).items()]
+    if all(campaign.values()):
+        jobs.append(('campaign', list(campaign.values()), campaign_job, (campaign, args.output),
+                     {'approximate': args.approximate, 'plotly_js': plotly_js, 'max_rows': args.max_rows,
+                      'snapshot': args.snapshot}))
+
+    started = time.perf_counter()
+    entries = run(jobs, max(1, min(args.jobs, len(jobs))))
+    elapsed = time.perf_counter() - started
+
+    entries.sort(key=lambda entry: entry['name'])
+    files = sum(len(entry['files']) for entry in entries if 'error' not in entry)
+    rows = sum(entry['rows'] or 0 for entry in entries if 'error' not in entry)
+    failed = [entry for entry in entries if 'error' in entry]
+    summary = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'seconds': elapsed,
+        'files': files,
+        'failed': len(failed),
+        'files_per_minute': files / elapsed * 60 if elapsed else None,
+        'rows_per_second': rows / elapsed if elapsed else None,
+        'reports': entries,
+    }
+    with open(os.path.join(args.output, 'summary.json'), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+    with open(os.path.join(args.output, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(index_html(entries))
+
+    print(f"{files} files in {elapsed:.1f}s: {summary['files_per_minute']:.1f} files/minute, "
+          f"{summary['rows_per_second']:,.0f} rows/s profiled ({len(failed)} failed)")
+    print(f"Reports written to {args.output}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
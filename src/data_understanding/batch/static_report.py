@@ -0,0 +1,179 @@
+"""Static JSON and HTML renderings of profiles and campaign reports."""
+import html
+import json
+import os
+
+import plotly.graph_objects as go
+import plotly.offline
+
+from engine.heavy_hitters import OTHER
+
+PLOTLY_JS = 'plotly.min.js'
+PLOTLY_CDN = f'https://cdn.plot.ly/plotly-{plotly.offline.get_plotlyjs_version()}.min.js'
+MAX_ROWS = 1000
+TOP_VALUES = 20
+# Mean-by-group charts are drawn only for qualitative columns with few groups
+MAX_CHART_GROUPS = 30
+
+STYLE = """
+body { font-family: sans-serif; margin: 2em; color: #222; }
+table { border-collapse: collapse; margin: 0.5em 0 1.5em; font-size: 0.85em; }
+th, td { border: 1px solid #ccc; padding: 0.25em 0.6em; text-align: right; }
+th { background: #f3f3f3; }
+.note { color: #777; font-size: 0.85em; }
+"""
+
+
+def table_record(frame, max_rows=MAX_ROWS):
+    """A JSON-ready table: first ``max_rows`` rows plus the total row count."""
+    shown = frame.iloc[:max_rows]
+    record = json.loads(shown.to_json(orient='split', date_format='iso', default_handler=str))
+    record['rows'] = len(frame)
+    return record
+
+
+def write_plotly_js(directory):
+    with open(os.path.join(directory, PLOTLY_JS), 'w', encoding='utf-8') as f:
+        f.write(plotly.offline.get_plotlyjs())
+
+
+def profile_to_dict(result, name, max_rows=MAX_ROWS):
+    """Everything in a ProfileResult, tables cut to ``max_rows`` rows."""
+    return {
+        'file': name,
+        'row_count': int(result.row_count),
+        'duplicate_count': int(result.duplicate_count),
+        'qualitative_attributes': result.qualitative_attributes,
+        'quantitative_attributes': result.quantitative_attributes,
+        'tables': {
+            'head': table_record(result.head, max_rows),
+            'data_format': table_record(result.data_format.astype(str), max_rows),
+            'missing_info': table_record(result.missing_info, max_rows),
+            'duplicate_columns': table_record(result.duplicate_columns, max_rows),
+            'basic_stats': table_record(result.basic_stats, max_rows),
+        },
+        'summary_reports_qual': {col: table_record(report, max_rows)
+                                 for col, report in result.summary_reports_qual.items()},
+        'summary_reports_quant': {col: table_record(report, max_rows)
+                                  for col, report in result.summary_reports_quant.items()},
+        'analysis_results': {analysis: table_record(table, max_rows)
+                             for analysis, table in result.analysis_results.items()},
+        'stages': [span.to_dict() for span in result.stages],
+        'plan': None if result.plan is None else {
+            'columns': table_record(result.plan.columns, max_rows),
+            'steps': table_record(result.plan.steps_frame(), max_rows),
+        },
+    }
+
+
+def profile_figures(result):
+    """Missing values, top values, quartile boxes and small group-mean charts."""
+    figures = []
+    missing = result.missing_info['Percentage Missing']
+    fig = go.Figure(go.Bar(x=missing.index.astype(str), y=missing.values))
+    fig.update_layout(title='Missing Values by Column', xaxis_title='Column', yaxis_title='% Missing')
+    figures.append(fig)
+
+    for col, report in result.summary_reports_qual.items():
+        top = report.drop(index=OTHER, errors='ignore').iloc[:TOP_VALUES]
+        fig = go.Figure(go.Bar(x=top.index.astype(str), y=top['Frequency']))
+        fig.update_layout(title=f'Top {len(top)} Values of {col}', xaxis_title=col, yaxis_title='Frequency')
+        figures.append(fig)
+
+    for col, report in result.summary_reports_quant.items():
+        stats = report.iloc[0]
+        fig = go.Figure(go.Box(name=col, q1=[stats['25%']], median=[stats['50%']], q3=[stats['75%']],
+                               lowerfence=[stats['min']], upperfence=[stats['max']], mean=[stats['mean']],
+                               sd=[stats['std']]))
+        fig.update_layout(title=f'Distribution of {col}', yaxis_title=col)
+        figures.append(fig)
+
+    for analysis, table in result.analysis_results.items():
+        if len(table) <= MAX_CHART_GROUPS:
+            group_col = table.columns[0]
+            fig = go.Figure(go.Bar(x=table[group_col].astype(str), y=table['mean']))
+            fig.update_layout(title=f'Mean {analysis}', xaxis_title=group_col, yaxis_title='mean')
+            figures.append(fig)
+    return figures
+
+
+def _table_html(frame, max_rows):
+    body = frame.iloc[:max_rows].to_html(border=0, na_rep='')
+    if len(frame) > max_rows:
+        body += f'<p class="note">First {max_rows:,} of {len(frame):,} rows</p>'
+    return body
+
+
+def render_html(title, sections, figures, plotly_js=PLOTLY_JS, max_rows=MAX_ROWS, notes=()):
+    """A self-standing HTML page: ``sections`` maps heading to DataFrame."""
+    parts = [f'<h1>{html.escape(title)}</h1>']
+    parts += [f'<p class="note">{html.escape(note)}</p>' for note in notes]
+    for heading, frame in sections.items():
+        parts.append(f'<h2>{html.escape(str(heading))}</h2>')
+        parts.append(_table_html(frame, max_rows))
+    if figures:
+        parts.append('<h2>Charts</h2>')
+        parts += [fig.to_html(full_html=False, include_plotlyjs=False) for fig in figures]
+    return (
+        '<!DOCTYPE html>\n<html><head><meta charset="utf-8">'
+        f'<title>{html.escape(title)}</title>'
+        f'<script src="{html.escape(plotly_js)}"></script>'
+        f'<style>{STYLE}</style></head>\n<body>\n' + '\n'.join(parts) + '\n</body></html>\n'
+    )
+
+
+def profile_html(result, name, plotly_js=PLOTLY_JS, max_rows=MAX_ROWS):
+    sections = {
+        'First Few Rows': result.head,
+        'Data Format of Each Column': result.data_format,
+        'Missing Values': result.missing_info,
+        'Duplicates per Column': result.duplicate_columns,
+        'Basic Statistics': result.basic_stats,
+    }
+    sections.update({f'Summary of {col}': report for col, report in result.summary_reports_qual.items()})
+    sections.update({f'Summary of {col}': report for col, report in result.summary_reports_quant.items()})
+    sections.update(result.analysis_results)
+    if result.plan is not None:
+        sections['Analysis Plan: Column Types'] = result.plan.columns
+        sections['Analysis Plan: Steps'] = result.plan.steps_frame()
+    notes = [f"{result.row_count:,} rows, {result.duplicate_count:,} duplicate rows"]
+    return render_html(f"Data Analysis of {name}", sections, profile_figures(result), plotly_js, max_rows, notes)
+
+
+def campaign_to_dict(report, max_rows=MAX_ROWS):
+    """A ``campaign_report.CampaignReport`` with its tables and daily rollups."""
+    return {
+        'unique_cardholders': int(report.unique_cardholders),
+        'unique_cards': int(report.unique_cards),
+        'approximate': report.approximate,
+        'tables': {title: table_record(frame, max_rows) for title, frame in report.tables().items()},
+        'card_rollup': table_record(report.card_rollup, max_rows),
+        'redemption_rollup': table_record(report.redemption_rollup, max_rows),
+    }
+
+
+def campaign_html(report, title, plotly_js=PLOTLY_JS, max_rows=MAX_ROWS):
+    notes = [f"Unique cardholders: {report.count_prefix}{report.unique_cardholders:,}",
+             f"Unique cards: {report.count_prefix}{report.unique_cards:,}"]
+    return render_html(title, report.tables(), report.figures(), plotly_js, max_rows, notes)
+
+
+def index_html(entries, title="Batch Reports"):
+    """Links to every report written by a batch run, with its timings."""
+    rows = []
+    for entry in entries:
+        if 'error' in entry:
+            links = f'<td colspan="2">failed: {html.escape(entry["error"])}</td>'
+        else:
+            links = (f'<td><a href="{html.escape(entry["html"])}">HTML</a></td>'
+                     f'<td><a href="{html.escape(entry["json"])}">JSON</a></td>')
+        rows.append(f'<tr><td>{html.escape(entry["name"])}</td>'
+                    f'<td>{html.escape(", ".join(entry["files"]))}</td>'
+                    f'<td>{"" if entry.get("rows") is None else format(entry["rows"], ",")}</td>'
+                    f'<td>{entry.get("seconds", 0):.2f}</td>{links}</tr>')
+    return (
+        '<!DOCTYPE html>\n<html><head><meta charset="utf-8">'
+        f'<title>{html.escape(title)}</title><style>{STYLE}</style></head>\n<body>\n'
+        f'<h1>{html.escape(title)}</h1>\n<table><tr><th>Report</th><th>Files</th><th>Rows</th>'
+        '<th>Seconds</th><th colspan="2">Output</th></tr>\n' + '\n'.join(rows) + '\n</table>\n</body></html>\n'
+    )
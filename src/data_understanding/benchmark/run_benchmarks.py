@@ -0,0 +1,189 @@
+"""Time and memory-profile the profiler, the loaders and the report functions."""
+import argparse
+import atexit
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import psutil
+import pyarrow as pa
+
+# Ingest copies and cached results go to a scratch directory so every run starts cold
+SCRATCH = tempfile.mkdtemp(prefix='du-bench-')
+os.environ['DATA_UNDERSTANDING_CACHE_DIR'] = SCRATCH
+# Also removed when the run stops before main's cleanup (--help, bad arguments, plain import)
+atexit.register(shutil.rmtree, SCRATCH, ignore_errors=True)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'report_generation'))
+from engine.ingest import INGEST_DIR
+from engine.instrumentation import PeakRSS
+from engine.profiler import analyze_csv
+from engine.timeseries import build_rollup
+from functionalities import card_data, issuer_activity, redemption_data, top_issuers, transaction_data
+from synthetic_data import FILE_NAMES, SyntheticConfig, generate
+
+
+def measure(func, repeat, setup=None):
+    seconds, peaks, deltas = [], [], []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        with PeakRSS() as rss:
+            started = time.perf_counter()
+            func()
+            seconds.append(time.perf_counter() - started)
+        peaks.append(rss.peak)
+        deltas.append(rss.delta)
+    return seconds, max(peaks), max(deltas)
+
+
+def clear_ingest():
+    shutil.rmtree(INGEST_DIR, ignore_errors=True)
+
+
+def benchmarks(paths):
+    """(name, rows, function, setup) for every benchmarked call."""
+    card_path, transaction_path, redemption_path = paths['card'], paths['transaction'], paths['redemption']
+
+    # Frames and rollups the report functions take, loaded once up front
+    card_df = card_data.load_card_data(card_path)
+    transaction_df = transaction_data.load_transaction_data(transaction_path)
+    redemption_df = redemption_data.load_redemption_data(redemption_path)
+    card_rollup = build_rollup(card_df)
+    redemption_rollup = build_rollup(redemption_df, sum_columns=['cashback_amount'])
+    histogram = card_df.groupby('cardholder_id')['card_id'].count().value_counts()
+    issuer_counts = card_df.groupby('issuer_bin')['card_id'].nunique()
+    cashback_sums = redemption_df.groupby('name')['cashback_amount'].sum()
+
+    cards, transactions, redemptions = len(card_df), len(transaction_df), len(redemption_df)
+    return [
+        ('analyze_csv[redemption]', redemptions, lambda: analyze_csv(redemption_path), None),
+        ('load_card_data[cold]', cards, lambda: card_data.load_card_data(card_path), clear_ingest),
+        ('load_card_data[warm]', cards, lambda: card_data.load_card_data(card_path), None),
+        ('load_transaction_data[cold]', transactions, lambda: transaction_data.load_transaction_data(transaction_path), clear_ingest),
+        ('load_transaction_data[warm]', transactions, lambda: transaction_data.load_transaction_data(transaction_path), None),
+        ('load_redemption_data[cold]', redemptions, lambda: redemption_data.load_redemption_data(redemption_path), clear_ingest),
+        ('load_redemption_data[warm]', redemptions, lambda: redemption_data.load_redemption_data(redemption_path), None),
+        ('build_rollup[card]', cards, lambda: build_rollup(card_df), None),
+        ('build_rollup[redemption]', redemptions, lambda: build_rollup(redemption_df, sum_columns=['cashback_amount']), None),
+        ('get_unique_cardholders', cards, lambda: card_data.get_unique_cardholders(card_df), None),
+        ('get_unique_cardholders[approximate]', cards, lambda: card_data.get_unique_cardholders(card_df, approximate=True), None),
+        ('get_unique_cards', cards, lambda: card_data.get_unique_cards(card_df), None),
+        ('get_unique_cards[approximate]', cards, lambda: card_data.get_unique_cards(card_df, approximate=True), None),
+        ('cardholder_card_count', cards, lambda: card_data.cardholder_card_count(card_df), None),
+        ('card_count_table', len(histogram), lambda: card_data.card_count_table(histogram), None),
+        ('daily_cardholder_enrollment', len(card_rollup), lambda: card_data.daily_cardholder_enrollment(card_rollup), None),
+        ('top_issuer_analysis', cards, lambda: top_issuers.top_issuer_analysis(card_df), None),
+        ('top_issuers_from_counts', len(issuer_counts), lambda: top_issuers.top_issuers_from_counts(issuer_counts), None),
+        ('issuer_names', cards, lambda: top_issuers.issuer_names(card_df['issuer_bin']), None),
+        ('transaction_metrics', transactions, lambda: transaction_data.transaction_metrics(transaction_df), None),
+        ('transaction_metrics[approximate]', transactions, lambda: transaction_data.transaction_metrics(transaction_df, approximate=True), None),
+        ('transaction_metrics_table', 1, lambda: transaction_data.transaction_metrics_table(1, 1.0, 1.0, 1.0, 1.0), None),
+        ('redemption_metrics', redemptions, lambda: redemption_data.redemption_metrics(redemption_df), None),
+        ('redemption_metrics[approximate]', redemptions, lambda: redemption_data.redemption_metrics(redemption_df, approximate=True), None),
+        ('redemption_metrics_table', 1, lambda: redemption_data.redemption_metrics_table(1, 1.0, 1.0), None),
+        ('daily_redemptions_value', len(redemption_rollup), lambda: redemption_data.daily_redemptions_value(redemption_rollup), None),
+        ('daily_redemptions_count', len(redemption_rollup), lambda: redemption_data.daily_redemptions_count(redemption_rollup), None),
+        ('merchant_wise_redemption', redemptions, lambda: redemption_data.merchant_wise_redemption(redemption_df), None),
+        ('merchant_table', len(cashback_sums), lambda: redemption_data.merchant_table(cashback_sums), None),
+        ('issuer_join_metrics', cards + transactions + redemptions,
+         lambda: issuer_activity.issuer_join_metrics(card_path, transaction_path, redemption_path), None),
+    ]
+
+
+def environment():
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'memory_total': psutil.virtual_memory().total,
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'pyarrow': pa.__version__,
+    }
+
+
+def run(paths, repeat, only=None):
+    results = []
+    for name, rows, func, setup in benchmarks(paths):
+        if only and not re.search(only, name):
+            continue
+        seconds, peak, delta = measure(func, repeat, setup)
+        median = statistics.median(seconds)
+        results.append({
+            'name': name,
+            'rows': rows,
+            'repeat': repeat,
+            'seconds': seconds,
+            'median_seconds': median,
+            'rows_per_second': rows / median if median else None,
+            'peak_rss_bytes': peak,
+            'rss_delta_bytes': delta,
+        })
+        print(f"{name:40s} {median:9.4f}s {delta / 2 ** 20:9.1f} MiB")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Benchmarks whose median time grew by more than ``threshold`` (a fraction)."""
+    previous = {entry['name']: entry for entry in baseline['results']}
+    regressions = []
+    for entry in results:
+        old = previous.get(entry['name'])
+        if old and old['median_seconds'] and entry['median_seconds'] > old['median_seconds'] * (1 + threshold):
+            regressions.append((entry['name'], old['median_seconds'], entry['median_seconds']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the profiler, loaders and report functions.")
+    parser.add_argument('--data', help="directory with card_data.csv, transaction_data.csv and redemption_data.csv")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="transaction rows to generate when --data is not given")
+    parser.add_argument('--skew', type=float, default=SyntheticConfig.skew)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', help="regular expression selecting benchmark names")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help="earlier results to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed slowdown before a regression is reported")
+    args = parser.parse_args()
+
+    try:
+        if args.data:
+            paths = {dataset: os.path.join(args.data, name) for dataset, name in FILE_NAMES.items()}
+            config = None
+        else:
+            config = SyntheticConfig(rows=args.rows, skew=args.skew)
+            generated = generate(os.path.join(SCRATCH, 'data'), config)
+            paths = {dataset: path for dataset, (path, _) in generated.items()}
+        results = run(paths, args.repeat, args.only)
+    finally:
+        shutil.rmtree(SCRATCH, ignore_errors=True)
+
+    report = {'environment': environment(), 'data': args.data or vars(config), 'results': results}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for name, old, new in regressions:
+            print(f"REGRESSION {name}: {old:.4f}s -> {new:.4f}s")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
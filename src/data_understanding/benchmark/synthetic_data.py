@@ -0,0 +1,240 @@
+"""Synthetic, mutually consistent card, transaction and redemption exports for benchmarking."""
+import argparse
+import os
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+
+FILE_NAMES = {
+    'card': 'card_data.csv',
+    'transaction': 'transaction_data.csv',
+    'redemption': 'redemption_data.csv',
+}
+
+# (merchant_id, name, category), most used first, from the Suncorp redemption sample
+MERCHANTS = [
+    (216, 'Menulog', 'Restaurants'),
+    (278, 'Myer', 'Department Stores'),
+    (235, 'Pet Circle', 'Retailers'),
+    (268, 'Glassons', 'Fashion & Retail'),
+    (250, 'LSKD', 'Fashion & Retail'),
+    (275, 'Baby Bunting', 'Retailers'),
+    (255, 'Shoes & Sox', 'Fashion & Retail'),
+    (262, 'General Pants Co. Instore', 'Fashion & Retail'),
+    (223, 'Novo Shoes Instore', 'Fashion & Retail'),
+    (233, 'Modibodi', 'Retailers'),
+    (240, 'Automotive Superstore', 'Retailers'),
+    (273, 'Showpo', 'Fashion & Retail'),
+    (279, 'SEALIFE Sunshine Coast', 'Entertainment'),
+    (249, 'LVLY', 'Retailers'),
+    (266, 'Converse', 'Fashion & Retail'),
+    (210, 'Sealife Sydney Australia', 'Entertainment'),
+    (263, 'General Pants Co. Online', 'Fashion & Retail'),
+    (281, 'Elite Supps Online', 'Health and Wellness'),
+    (265, '2XU Online', 'Fashion & Retail'),
+    (214, 'SEALIFE Melbourne Australia', 'Entertainment'),
+    (252, 'Move with us', 'Health and Wellness'),
+    (276, 'Myprotein', 'Health and Wellness'),
+    (280, 'Elite Supps Instore', 'Health and Wellness'),
+    (259, 'Superdry', 'Fashion & Retail'),
+    (207, 'Laithwaites', 'Retailers'),
+]
+
+# First four digits of the issuers in report_generation/functionalities/issuer_bins.csv
+ISSUER_PREFIXES = [4980, 4297, 4205, 4534, 4541, 4986, 4538, 4901, 4708, 4537,
+                   4363, 4649, 4616, 4539, 4097, 4924, 4987, 4162, 4721, 4984, 4122]
+BINS_PER_ISSUER = 8
+TRANSACTION_ID_BASE = 464133000000000
+_HEX = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+_UUID_POSITIONS = np.r_[0:8, 9:13, 14:18, 19:23, 24:36]
+_SALTS = {'cardholder': 1, 'card': 2}
+
+
+@dataclass
+class SyntheticConfig:
+    """Sizes and shape of a synthetic campaign; ``rows`` is the transaction count."""
+    rows: int = 1_000_000
+    cards: int = None
+    redemption_rate: float = 0.3
+    skew: float = 1.0
+    multi_card_rate: float = 0.01
+    duplicate_rate: float = 0.001
+    missing_rate: float = 0.0
+    start: str = '2024-05-01'
+    days: int = 60
+    seed: int = 0
+    chunk_rows: int = 1_000_000
+
+    @property
+    def card_count(self):
+        return self.cards or max(1, self.rows // 10)
+
+
+def _splitmix64(values):
+    z = values.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def uuid_strings(index, kind, seed=0):
+    """Deterministic version-4 UUID strings for integer ``index`` as an Arrow array."""
+    index = np.asarray(index, dtype=np.uint64) * np.uint64(4) + np.uint64(_SALTS[kind])
+    salt = np.uint64(seed) << np.uint64(40)
+    words = np.stack([_splitmix64(index ^ salt), _splitmix64(~index ^ salt)], axis=1)
+    raw = words.astype('>u8').view(np.uint8).reshape(len(index), 16).copy()
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    nibbles = np.empty((len(index), 32), dtype=np.uint8)
+    nibbles[:, 0::2] = raw >> 4
+    nibbles[:, 1::2] = raw & 0x0F
+    chars = np.full((len(index), 36), ord('-'), dtype=np.uint8)
+    chars[:, _UUID_POSITIONS] = _HEX[nibbles]
+    offsets = np.arange(0, 36 * (len(index) + 1), 36, dtype=np.int32)
+    return pa.StringArray.from_buffers(len(index), pa.py_buffer(offsets), pa.py_buffer(chars.ravel()))
+
+
+def _unit(index, salt, seed):
+    # Uniform [0, 1) per index, stable across chunkings
+    bits = _splitmix64(np.asarray(index, dtype=np.uint64) ^ (np.uint64(seed * 7919 + salt) << np.uint64(44)))
+    return (bits >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def skewed_index(u, n, skew):
+    return np.minimum((n * u ** (1 + skew)).astype(np.int64), n - 1)
+
+
+def cardholder_of(card_index, config):
+    # A small share of cards belongs to the cardholder of the previous card
+    card_index = np.asarray(card_index, dtype=np.int64)
+    shared = (_unit(card_index, 11, config.seed) < config.multi_card_rate) & (card_index > 0)
+    return card_index - shared
+
+
+def _timestamps(position, total, config, rng):
+    start = np.datetime64(config.start, 's').astype(np.int64)
+    span = config.days * 86400
+    seconds = start + (position / max(total, 1) * span).astype(np.int64) + rng.integers(0, 3600, len(position))
+    return pa.array(seconds, type=pa.timestamp('s'))
+
+
+def _with_missing(array, rng, rate):
+    if not rate:
+        return array
+    return pa.array(array.to_pandas().mask(rng.random(len(array)) < rate))
+
+
+def card_chunk(start, stop, config):
+    rng = np.random.default_rng([config.seed, 1, start])
+    index = np.arange(start, stop)
+    issuers = skewed_index(_unit(index, 12, config.seed), len(ISSUER_PREFIXES), config.skew)
+    bins = np.asarray(ISSUER_PREFIXES)[issuers] * 100 + rng.integers(0, BINS_PER_ISSUER, len(index))
+    return pa.table({
+        'cardholder_id': uuid_strings(cardholder_of(index, config), 'cardholder', config.seed),
+        'card_id': uuid_strings(index, 'card', config.seed),
+        'issuer_bin': pa.array(bins, type=pa.int64()),
+        'created_at': _timestamps(index, config.card_count, config, rng),
+    })
+
+
+def transaction_chunk(start, stop, config):
+    """One chunk of transactions and the redemptions drawn from it."""
+    rng = np.random.default_rng([config.seed, 2, start])
+    index = np.arange(start, stop)
+    cards = skewed_index(rng.random(len(index)), config.card_count, config.skew)
+    merchants = skewed_index(rng.random(len(index)), len(MERCHANTS), config.skew)
+    amounts = np.round(np.exp(rng.normal(8.0, 1.0, len(index))))
+    cashback = np.floor(amounts * rng.choice([0.02, 0.05, 0.1], len(index)))
+    created_at = _timestamps(index, config.rows, config, rng)
+    merchant_ids, names, categories = (np.asarray(values, dtype=object)[merchants] for values in zip(*MERCHANTS))
+    transactions = pa.table({
+        'cardholder_id': uuid_strings(cardholder_of(cards, config), 'cardholder', config.seed),
+        'card_id': uuid_strings(cards, 'card', config.seed),
+        'transaction_id': pa.array(TRANSACTION_ID_BASE + index, type=pa.int64()),
+        'transaction_amount': pa.array(amounts),
+        'cashback_amount': pa.array(cashback),
+        'merchant_id': pa.array(merchant_ids.astype(np.int64)),
+        'created_at': created_at,
+    })
+
+    redeemed = np.flatnonzero(rng.random(len(index)) < config.redemption_rate)
+    # A few redemptions are exported twice, as in the real feed
+    repeats = redeemed[rng.random(len(redeemed)) < config.duplicate_rate]
+    rows = np.sort(np.concatenate([redeemed, repeats]))
+    delay = pa.array(rng.integers(60, 3 * 86400, len(rows)), type=pa.duration('s'))
+    redemptions = pa.table({
+        'cardholder_id': transactions['cardholder_id'].take(rows),
+        'card_id': transactions['card_id'].take(rows),
+        'cashback_amount': transactions['cashback_amount'].take(rows),
+        'transaction_id': transactions['transaction_id'].take(rows),
+        'created_at': pc.add(created_at.take(rows), delay),
+        'merchant_id': transactions['merchant_id'].take(rows),
+        'name': _with_missing(pa.array(names[rows], type=pa.string()), rng, config.missing_rate),
+        'category': _with_missing(pa.array(categories[rows], type=pa.string()), rng, config.missing_rate),
+    })
+    return transactions, redemptions
+
+
+def _write(writers, dataset, table, out_dir):
+    if dataset not in writers:
+        path = os.path.join(out_dir, FILE_NAMES[dataset])
+        writers[dataset] = pa_csv.CSVWriter(path, table.schema)
+    writers[dataset].write_table(table)
+
+
+def generate(out_dir, config, datasets=tuple(FILE_NAMES)):
+    """Write the requested datasets under ``out_dir``; returns {dataset: (path, rows)}."""
+    os.makedirs(out_dir, exist_ok=True)
+    writers, rows = {}, dict.fromkeys(datasets, 0)
+    try:
+        if 'card' in datasets:
+            for start in range(0, config.card_count, config.chunk_rows):
+                table = card_chunk(start, min(start + config.chunk_rows, config.card_count), config)
+                _write(writers, 'card', table, out_dir)
+                rows['card'] += table.num_rows
+        if 'transaction' in datasets or 'redemption' in datasets:
+            for start in range(0, config.rows, config.chunk_rows):
+                transactions, redemptions = transaction_chunk(start, min(start + config.chunk_rows, config.rows), config)
+                for dataset, table in (('transaction', transactions), ('redemption', redemptions)):
+                    if dataset in datasets:
+                        _write(writers, dataset, table, out_dir)
+                        rows[dataset] += table.num_rows
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return {dataset: (os.path.join(out_dir, FILE_NAMES[dataset]), rows[dataset]) for dataset in datasets}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic VISA campaign exports.")
+    parser.add_argument('--out', required=True, help="output directory")
+    parser.add_argument('--rows', type=int, default=SyntheticConfig.rows, help="transaction rows")
+    parser.add_argument('--cards', type=int, default=None, help="card rows (default rows / 10)")
+    parser.add_argument('--redemption-rate', type=float, default=SyntheticConfig.redemption_rate)
+    parser.add_argument('--skew', type=float, default=SyntheticConfig.skew)
+    parser.add_argument('--multi-card-rate', type=float, default=SyntheticConfig.multi_card_rate)
+    parser.add_argument('--duplicate-rate', type=float, default=SyntheticConfig.duplicate_rate)
+    parser.add_argument('--missing-rate', type=float, default=SyntheticConfig.missing_rate)
+    parser.add_argument('--start', default=SyntheticConfig.start, help="first day, YYYY-MM-DD")
+    parser.add_argument('--days', type=int, default=SyntheticConfig.days)
+    parser.add_argument('--seed', type=int, default=SyntheticConfig.seed)
+    parser.add_argument('--chunk-rows', type=int, default=SyntheticConfig.chunk_rows)
+    parser.add_argument('--datasets', nargs='+', choices=list(FILE_NAMES), default=list(FILE_NAMES))
+    args = parser.parse_args()
+
+    config = SyntheticConfig(rows=args.rows, cards=args.cards, redemption_rate=args.redemption_rate,
+                             skew=args.skew, multi_card_rate=args.multi_card_rate,
+                             duplicate_rate=args.duplicate_rate, missing_rate=args.missing_rate,
+                             start=args.start, days=args.days, seed=args.seed, chunk_rows=args.chunk_rows)
+    started = time.perf_counter()
+    for dataset, (path, rows) in generate(args.out, config, args.datasets).items():
+        print(f"{dataset}: {rows:,} rows -> {path}")
+    print(f"Generated in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""Persistent aggregates of the campaign exports, updated from daily deltas without rereading raw rows."""
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from engine.cache import STORE_DIR
+from engine.duplicates import KeyCounts
+from engine.hll import DEFAULT_PRECISION, HyperLogLog
+from engine.timeseries import build_rollup, merge_rollups
+
+MANIFEST = 'manifest.json'
+DATASETS = ('card', 'transaction', 'redemption')
+SUM_COLUMNS = {
+    'transaction': ['transaction_amount', 'cashback_amount'],
+    'redemption': ['cashback_amount'],
+}
+
+
+def _key_hashes(df):
+    return pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+
+
+def _group_keys(key_cols, counts):
+    # Hash the group keys of ``counts`` and sort them for KeyCounts.add
+    keys = _key_hashes(counts.index.to_frame(index=False)[key_cols])
+    order = np.argsort(keys, kind='stable')
+    return keys[order], counts.to_numpy(dtype=np.int64)[order], order
+
+
+class AggregateStore:
+    """Campaign report aggregates persisted under ``directory``."""
+
+    def __init__(self, directory=STORE_DIR, precision=DEFAULT_PRECISION):
+        self.directory = directory
+        self.precision = precision
+        self.ingested = {dataset: [] for dataset in DATASETS}
+        self.totals = {}
+        self.updated_at = None
+        self.cardholder_cards = KeyCounts()
+        self.cards = KeyCounts()
+        self.issuer_cards_keys = KeyCounts()
+        self.card_histogram = pd.Series(dtype=np.int64)
+        self.issuer_cards = pd.Series(dtype=np.int64)
+        self.merchant_cashback = pd.Series(dtype=np.float64)
+        self.card_rollup = None
+        self.redemption_rollup = None
+        self.sketches = {dataset: HyperLogLog(precision) for dataset in ('transaction', 'redemption')}
+        if os.path.exists(self._path(MANIFEST)):
+            self._load()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def is_empty(self):
+        return not any(self.ingested.values())
+
+    def has_ingested(self, dataset, source_hash):
+        return source_hash in self.ingested[dataset]
+
+    def update(self, dataset, df, source_hash):
+        """Fold one delta into the aggregates; returns False if it was already applied."""
+        if dataset not in DATASETS:
+            raise ValueError(f"Unknown dataset {dataset!r}")
+        if self.has_ingested(dataset, source_hash):
+            return False
+        getattr(self, f"_update_{dataset}")(df)
+        self._add_totals(dataset, df)
+        self.ingested[dataset].append(source_hash)
+        self.updated_at = datetime.now().isoformat(timespec='seconds')
+        return True
+
+    def _add_totals(self, dataset, df):
+        totals = self.totals.setdefault(dataset, {'rows': 0})
+        totals['rows'] += len(df)
+        for col in SUM_COLUMNS.get(dataset, []):
+            totals[f"{col}_sum"] = totals.get(f"{col}_sum", 0) + df[col].sum().item()
+            totals[f"{col}_count"] = totals.get(f"{col}_count", 0) + int(df[col].count())
+
+    def _update_card(self, df):
+        # Cards per cardholder, counted like functionalities.card_data.cardholder_card_count
+        per_holder = df.groupby('cardholder_id')['card_id'].count()
+        keys, counts, _ = _group_keys(['cardholder_id'], per_holder)
+        before, found = self.cardholder_cards.add(keys, counts)
+        removed = pd.Series(before[found]).value_counts()
+        added = pd.Series(before + counts).value_counts()
+        histogram = self.card_histogram.sub(removed, fill_value=0).add(added, fill_value=0)
+        self.card_histogram = histogram[histogram > 0].astype(np.int64).sort_index()
+
+        per_card = df.groupby('card_id').size()
+        keys, counts, _ = _group_keys(['card_id'], per_card)
+        self.cards.add(keys, counts)
+
+        # A card counts once per issuer BIN, the first time the pair is seen
+        pairs = df.groupby(['issuer_bin', 'card_id']).size()
+        keys, counts, order = _group_keys(['issuer_bin', 'card_id'], pairs)
+        _, found = self.issuer_cards_keys.add(keys, counts)
+        new_bins = pairs.index.get_level_values('issuer_bin')[order][~found]
+        self.issuer_cards = self.issuer_cards.add(pd.Series(new_bins).value_counts(), fill_value=0).astype(np.int64)
+        self.issuer_cards.index.name = 'issuer_bin'
+
+        self.card_rollup = merge_rollups(self.card_rollup, build_rollup(df))
+
+    def _update_transaction(self, df):
+        self.sketches['transaction'].add(df['transaction_id'])
+
+    def _update_redemption(self, df):
+        self.sketches['redemption'].add(df['transaction_id'])
+        self.redemption_rollup = merge_rollups(
+            self.redemption_rollup, build_rollup(df, sum_columns=SUM_COLUMNS['redemption']))
+        sums = df.groupby('name')['cashback_amount'].sum()
+        self.merchant_cashback = self.merchant_cashback.add(sums, fill_value=0)
+
+    # Report views
+
+    def unique_cardholders(self):
+        return len(self.cardholder_cards)
+
+    def unique_cards(self):
+        return len(self.cards)
+
+    def distinct_count(self, dataset):
+        return self.sketches[dataset].count()
+
+    def total(self, dataset, column):
+        totals = self.totals.get(dataset, {})
+        return totals.get(f"{column}_sum", 0)
+
+    def mean(self, dataset, column):
+        totals = self.totals.get(dataset, {})
+        count = totals.get(f"{column}_count", 0)
+        return totals[f"{column}_sum"] / count if count else float('nan')
+
+    # Persistence
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.cardholder_cards.save(self._path('cardholder_cards.npz'))
+        self.cards.save(self._path('cards.npz'))
+        self.issuer_cards_keys.save(self._path('issuer_cards.npz'))
+        for dataset, sketch in self.sketches.items():
+            self._replace(self._path(f"{dataset}.hll"), sketch.save)
+        series = {
+            'card_histogram': self.card_histogram.rename('cardholders'),
+            'issuer_cards': self.issuer_cards.rename('cards'),
+            'merchant_cashback': self.merchant_cashback.rename('cashback_amount'),
+        }
+        for name, values in series.items():
+            self._replace(self._path(f"{name}.parquet"), values.to_frame().to_parquet)
+        for name in ('card_rollup', 'redemption_rollup'):
+            rollup = getattr(self, name)
+            if rollup is not None:
+                self._replace(self._path(f"{name}.parquet"), rollup.to_parquet)
+        # The manifest goes last: a store is only as new as its manifest says
+        manifest = {'precision': self.precision, 'ingested': self.ingested,
+                    'totals': self.totals, 'updated_at': self.updated_at}
+        self._replace(self._path(MANIFEST), lambda path: self._write_json(path, manifest))
+
+    @staticmethod
+    def _replace(path, write):
+        staging = f"{path}.{os.getpid()}.tmp"
+        write(staging)
+        os.replace(staging, path)
+
+    @staticmethod
+    def _write_json(path, data):
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+
+    def _load(self):
+        with open(self._path(MANIFEST)) as f:
+            manifest = json.load(f)
+        self.precision = manifest['precision']
+        self.ingested.update(manifest['ingested'])
+        self.totals = manifest['totals']
+        self.updated_at = manifest['updated_at']
+        self.cardholder_cards = KeyCounts.load(self._path('cardholder_cards.npz'))
+        self.cards = KeyCounts.load(self._path('cards.npz'))
+        self.issuer_cards_keys = KeyCounts.load(self._path('issuer_cards.npz'))
+        for dataset in self.sketches:
+            self.sketches[dataset] = HyperLogLog.load(self._path(f"{dataset}.hll"))
+        self.card_histogram = pd.read_parquet(self._path('card_histogram.parquet'))['cardholders']
+        self.issuer_cards = pd.read_parquet(self._path('issuer_cards.parquet'))['cards']
+        self.merchant_cashback = pd.read_parquet(self._path('merchant_cashback.parquet'))['cashback_amount']
+        for name in ('card_rollup', 'redemption_rollup'):
+            path = self._path(f"{name}.parquet")
+            if os.path.exists(path):
+                rollup = pd.read_parquet(path)
+                rollup.attrs['freq'] = 'h'
+                setattr(self, name, rollup)
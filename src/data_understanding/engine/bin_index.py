@@ -0,0 +1,95 @@
+"""Issuer lookup by BIN ranges with longest-prefix matching.
+
+A BIN table is a CSV of ``bin_low``, an optional ``bin_high`` and ``issuer``; prefixes and ranges of any length mix.
+"""
+import numpy as np
+import pandas as pd
+
+PAN_DIGITS = 16
+_POWERS = 10 ** np.arange(PAN_DIGITS + 1, dtype=np.int64)
+
+
+def _digits(values):
+    # Decimal digit count of positive integers
+    return np.searchsorted(_POWERS, values, side='right')
+
+
+def _card_interval(low, high=None):
+    """Half-open card number intervals of ``low``-``high`` BIN ranges (``high`` defaults to ``low``)."""
+    low = np.asarray(low, dtype=np.int64)
+    high = low if high is None else np.asarray(high, dtype=np.int64)
+    scale = _POWERS[PAN_DIGITS - _digits(low)]
+    return low * scale, (high + 1) * scale
+
+
+class BinIndex:
+    """Sorted integer BIN ranges; ``lookup`` returns the issuer of the longest matching range."""
+
+    def __init__(self, low, high, issuers):
+        low, high = np.asarray(low, dtype=np.int64), np.asarray(high, dtype=np.int64)
+        if len(low) and (low.min() <= 0 or _digits(low).max() > PAN_DIGITS):
+            raise ValueError(f"BINs must be positive integers of at most {PAN_DIGITS} digits")
+        if (_digits(low) != _digits(high)).any() or (high < low).any():
+            raise ValueError("Each BIN range needs bin_high >= bin_low with the same number of digits")
+        self.issuers = np.asarray(issuers, dtype=object)
+        self.start, self.end = _card_interval(low, high)
+
+        # Wider ranges first, so narrower ones overwrite them: segment owners are the longest matches
+        bounds = np.unique(np.concatenate([self.start, self.end]))
+        owner = np.full(max(len(bounds) - 1, 0), -1, dtype=np.int64)
+        parent = np.full(len(low), -1, dtype=np.int64)
+        for rng in np.argsort(-(self.end - self.start), kind='stable'):
+            first, last = np.searchsorted(bounds, [self.start[rng], self.end[rng]])
+            # The range painted over is the next enclosing one
+            covered = owner[first:last]
+            enclosing = covered[covered >= 0]
+            if len(enclosing):
+                parent[rng] = enclosing[0]
+            owner[first:last] = rng
+        self.bounds, self.owner, self.parent = bounds, owner, parent
+
+    @classmethod
+    def from_frame(cls, frame):
+        high = frame['bin_high'] if 'bin_high' in frame else pd.Series(pd.NA, index=frame.index, dtype='Int64')
+        high = high.fillna(frame['bin_low'])
+        return cls(frame['bin_low'].to_numpy(dtype=np.int64), high.to_numpy(dtype=np.int64),
+                   frame['issuer'].to_numpy(dtype=object))
+
+    @classmethod
+    def load(cls, path):
+        """A BinIndex from a CSV with ``bin_low``, optional ``bin_high`` and ``issuer`` columns."""
+        frame = pd.read_csv(path, dtype={'bin_low': 'int64', 'bin_high': 'Int64', 'issuer': 'string'})
+        missing = {'bin_low', 'issuer'} - set(frame.columns)
+        if missing:
+            raise ValueError(f"BIN table {path} lacks column(s) {', '.join(sorted(missing))}")
+        return cls.from_frame(frame)
+
+    def __len__(self):
+        return len(self.issuers)
+
+    def lookup_codes(self, bins):
+        """Row of the longest range matching each BIN, or -1; missing and invalid BINs give -1."""
+        bins = pd.Series(bins).astype('Int64')
+        values = bins.to_numpy(dtype=np.int64, na_value=0)
+        valid = (values > 0) & (values < _POWERS[PAN_DIGITS])
+        if not len(self):
+            return np.full(len(values), -1, dtype=np.int64)
+        start, end = _card_interval(np.where(valid, values, 1))
+
+        segment = np.searchsorted(self.bounds, start, side='right') - 1
+        valid &= (segment >= 0) & (segment < len(self.owner))
+        codes = np.where(valid, self.owner[np.clip(segment, 0, len(self.owner) - 1)], -1)
+        # A query wider than its segment's range falls back to the enclosing ranges
+        while True:
+            known = np.maximum(codes, 0)
+            partial = (codes >= 0) & ((self.start[known] > start) | (self.end[known] < end))
+            if not partial.any():
+                return codes
+            codes = np.where(partial, self.parent[known], codes)
+
+    def lookup(self, bins, default=np.nan):
+        """Issuer of each BIN; ``default`` where no range matches.  A Series keeps its index."""
+        codes = self.lookup_codes(bins)
+        names = np.full(len(codes), default, dtype=object)
+        names[codes >= 0] = self.issuers[codes[codes >= 0]]
+        return pd.Series(names, index=bins.index if isinstance(bins, pd.Series) else None, dtype=object)
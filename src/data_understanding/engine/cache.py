@@ -0,0 +1,287 @@
+"""Content-addressed, disk-backed LRU cache for analysis results."""
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+CACHE_DIR = os.environ.get('DATA_UNDERSTANDING_CACHE_DIR',
+                           os.path.join(os.path.expanduser('~'), '.cache', 'data_understanding'))
+CACHE_MAX_BYTES = int(os.environ.get('DATA_UNDERSTANDING_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+INGEST_DIR = os.path.join(CACHE_DIR, 'ingest')
+STORE_DIR = os.environ.get('DATA_UNDERSTANDING_STORE_DIR', os.path.join(CACHE_DIR, 'store'))
+HASH_BLOCK_SIZE = 1024 * 1024
+# Part of every key; bump it when a cached result class changes, so old pickles are not loaded
+CACHE_VERSION = 1
+# Keyword arguments that do not change the result (callbacks) and are left out of the key
+UNKEYED_KWARGS = ('progress',)
+
+
+def content_hash(source):
+    """blake2b digest of a path, bytes, or a seekable file-like object."""
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(source)
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+    else:
+        position = source.tell()
+        source.seek(0)
+        for block in iter(lambda: source.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+        source.seek(position)
+    return digest.hexdigest()
+
+
+def _describe(value):
+    # Frames are identified by the content hash of the file they came from
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return '<frame>'
+    if hasattr(value, 'read'):
+        return '<file>'
+    if isinstance(value, dict):
+        return '{' + ', '.join(f'{k!r}: {_describe(v)}' for k, v in sorted(value.items())) + '}'
+    if isinstance(value, (list, tuple)):
+        return '[' + ', '.join(_describe(v) for v in value) + ']'
+    return repr(value)
+
+
+def cache_key(source_hash, func, args=(), kwargs=None):
+    """Key for ``func(source, *args, **kwargs)``; the source itself is represented
+    only by ``source_hash``."""
+    name = f"{func.__module__}.{func.__qualname__}"
+    params = _describe(list(args)) + _describe(kwargs or {})
+    return hashlib.blake2b(f"{CACHE_VERSION}|{source_hash}|{name}|{params}".encode(), digest_size=16).hexdigest()
+
+
+class _FramePickler(pickle.Pickler):
+    # DataFrames go to Parquet files; anything Parquet rejects stays in the pickle
+
+    def __init__(self, file, directory):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.directory = directory
+        self.frames = 0
+
+    def persistent_id(self, obj):
+        if type(obj) is not pd.DataFrame:
+            return None
+        name = f"frame_{self.frames}.parquet"
+        path = os.path.join(self.directory, name)
+        try:
+            obj.to_parquet(path)
+        except (ValueError, TypeError, ImportError):
+            # pyarrow's ArrowInvalid/ArrowTypeError subclass these, e.g. for
+            # object columns holding dtypes or mixed types
+            if os.path.exists(path):
+                os.remove(path)
+            return None
+        self.frames += 1
+        return name
+
+
+class _FrameUnpickler(pickle.Unpickler):
+
+    def __init__(self, file, directory):
+        super().__init__(file)
+        self.directory = directory
+
+    def persistent_load(self, name):
+        return pd.read_parquet(os.path.join(self.directory, name))
+
+
+def _directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except FileNotFoundError:
+                continue
+    return total
+
+
+def _file_entries(directory):
+    # Every finished file is one entry; its mtime is the last access, as for cache entries
+    entries = []
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return entries
+    for name in names:
+        path = os.path.join(directory, name)
+        if name.startswith('.') or name.endswith('.tmp') or not os.path.isfile(path):
+            continue
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    return entries
+
+
+def _remove(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class ResultCache:
+    """LRU disk cache with hit/miss counters."""
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, shared=(INGEST_DIR,), reserved=(STORE_DIR,)):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.shared = tuple(shared)
+        self.reserved = tuple(reserved)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        """Return ``(True, value)`` on a hit and ``(False, None)`` on a miss."""
+        path = self._entry(key)
+        try:
+            with open(os.path.join(path, 'result.pkl'), 'rb') as f:
+                value = _FrameUnpickler(f, path).load()
+        except (FileNotFoundError, NotADirectoryError):
+            with self._lock:
+                self.misses += 1
+            return False, None
+        except (pickle.UnpicklingError, EOFError, AttributeError, ModuleNotFoundError, ValueError):
+            # A truncated entry or one pickled by other code (a corrupt Parquet file raises
+            # ValueError) is a miss, and is removed so the result is computed again
+            _remove(path)
+            with self._lock:
+                self.misses += 1
+            return False, None
+        self._touch(path)
+        with self._lock:
+            self.hits += 1
+        return True, value
+
+    def put(self, key, value):
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=self.directory)
+        try:
+            with open(os.path.join(staging, 'result.pkl'), 'wb') as f:
+                _FramePickler(f, staging).dump(value)
+            meta = {'size': _directory_size(staging), 'created': time.time()}
+            with open(os.path.join(staging, 'meta.json'), 'w') as f:
+                json.dump(meta, f)
+            target = self._entry(key)
+            if os.path.isdir(target):
+                shutil.rmtree(target, ignore_errors=True)
+            os.replace(staging, target)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        self._touch(target)
+        self.evict()
+
+    def call(self, func, source, *args, source_hash=None, **kwargs):
+        """Cached ``func(source, *args, **kwargs)``.
+
+        ``source`` is the uploaded file (path, bytes or file object) and is
+        hashed by content.  When it is a frame derived from an upload, pass
+        that upload's ``source_hash`` instead.
+        """
+        if source_hash is None:
+            source_hash = content_hash(source)
+        keyed = {name: value for name, value in kwargs.items() if name not in UNKEYED_KWARGS}
+        key = cache_key(source_hash, func, args, keyed)
+        hit, value = self.get(key)
+        if hit:
+            return value
+        value = func(source, *args, **kwargs)
+        self.put(key, value)
+        return value
+
+    def stream(self, func, incremental, source, *args, source_hash=None, **kwargs):
+        """Partial results of ``incremental(source, *args, **kwargs)``, cached as ``func``.
+
+        ``incremental`` is a generator version of ``func`` whose last yield is
+        ``func``'s result (e.g. ``profiler.analyze_csv_incremental``).  The
+        last result is stored under ``func``'s key, so a hit from either
+        ``call`` or ``stream`` yields it once without recomputing.
+        """
+        if source_hash is None:
+            source_hash = content_hash(source)
+        keyed = {name: value for name, value in kwargs.items() if name not in UNKEYED_KWARGS}
+        key = cache_key(source_hash, func, args, keyed)
+        hit, value = self.get(key)
+        if hit:
+            yield value
+            return
+        for value in incremental(source, *args, **kwargs):
+            yield value
+        self.put(key, value)
+
+    def _touch(self, path):
+        # The entry directory's mtime doubles as its last-access time
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+    def entries(self):
+        """``(last access, bytes, path)`` of every evictable entry, oldest first."""
+        entries = [entry for directory in self.shared for entry in _file_entries(directory)]
+        for name in os.listdir(self.directory):
+            path = self._entry(name)
+            if name.startswith('.') or not os.path.isdir(path):
+                continue
+            try:
+                with open(os.path.join(path, 'meta.json')) as f:
+                    size = json.load(f)['size']
+                entries.append((os.path.getmtime(path), size, path))
+            except (FileNotFoundError, ValueError, KeyError):
+                continue
+        return sorted(entries)
+
+    def reserved_size(self):
+        return sum(_directory_size(directory) for directory in self.reserved)
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries()) + self.reserved_size()
+
+    def evict(self, keep=()):
+        """Drop least recently used entries until everything fits ``max_bytes``; ``keep`` paths stay."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries) + self.reserved_size()
+        keep = {os.path.abspath(path) for path in keep}
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if os.path.abspath(path) in keep:
+                continue
+            _remove(path)
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            _remove(path)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self.entries()),
+            'bytes': self.size(),
+            'max_bytes': self.max_bytes,
+        }
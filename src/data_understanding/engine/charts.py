@@ -0,0 +1,186 @@
+"""Chart data reduced on the server to what a chart of ``CHART_WIDTH`` pixels can show."""
+import json
+import os
+from collections import deque
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from engine.heavy_hitters import OTHER
+
+CHART_WIDTH = int(os.environ.get('DATA_UNDERSTANDING_CHART_WIDTH', 1200))
+# Narrowest readable bar
+BAR_PIXELS = 20
+MAX_BARS = CHART_WIDTH // BAR_PIXELS
+CATEGORY_BARS = 30
+WEBGL_POINTS = 1000
+TELEMETRY_SIZE = 500
+
+
+def _numbers(values):
+    # Datetimes as nanoseconds, so distances and areas can be computed
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return values.astype('int64').to_numpy(dtype=np.float64)
+    if values.dtype == object:
+        values = pd.to_datetime(values)
+        return values.astype('int64').to_numpy(dtype=np.float64)
+    return values.to_numpy(dtype=np.float64)
+
+
+def lttb(x, y, points):
+    """Positions of the ``points`` points Largest-Triangle-Three-Buckets keeps; x must be sorted."""
+    n = len(y)
+    if points >= n or points < 3:
+        return np.arange(n)
+    x, y = _numbers(x), np.asarray(y, dtype=np.float64)
+    # points - 2 buckets between the first and the last point, which are always kept
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            following = slice(end, edges[bucket + 2])
+            next_x, next_y = x[following].mean(), y[following].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        # Area of the triangle (previous point, candidate, mean of the next bucket), up to a factor
+        area = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def minmax(x, y, points):
+    """Positions of the first and last points and of the minimum and maximum of ``y`` in
+    each of ``(points - 2) // 2`` equal-width x columns."""
+    n = len(y)
+    if points >= n or points < 4:
+        return np.arange(n)
+    x = _numbers(x)
+    columns = max(1, (points - 2) // 2)
+    span = x[-1] - x[0]
+    column = np.zeros(n, dtype=np.int64) if span <= 0 else np.minimum(((x - x[0]) / span * columns).astype(np.int64),
+                                                                       columns - 1)
+    values = pd.Series(np.asarray(y, dtype=np.float64))
+    grouped = values.groupby(column)
+    return np.unique(np.concatenate([[0, n - 1], grouped.idxmin().dropna().to_numpy(dtype=np.int64),
+                                     grouped.idxmax().dropna().to_numpy(dtype=np.int64)]))
+
+
+DOWNSAMPLERS = {'lttb': lttb, 'minmax': minmax}
+
+
+def downsample(frame, x, y, points=CHART_WIDTH, method='lttb'):
+    """The rows of ``frame`` (sorted by ``x``) that ``method`` keeps for a ``points``-point line of ``y``."""
+    frame = frame.dropna(subset=[y]).sort_values(x, kind='stable')
+    return frame.iloc[DOWNSAMPLERS[method](frame[x], frame[y], points)]
+
+
+def top_categories(frame, label, value, n=CATEGORY_BARS, other=OTHER):
+    """The ``n`` rows with the largest ``value`` and one ``other`` row summing the rest."""
+    if len(frame) <= n + 1:
+        return frame
+    ordered = frame.sort_values(value, ascending=False, kind='stable')
+    rest = ordered.iloc[n:]
+    other_row = pd.DataFrame({label: [f"{other} ({len(rest):,})"], value: [rest[value].sum()]})
+    return pd.concat([ordered.iloc[:n], other_row], ignore_index=True)
+
+
+def time_series_chart(frame, x, y, title, max_bars=MAX_BARS, points=CHART_WIDTH, method='lttb'):
+    """Bars for up to ``max_bars`` periods, otherwise a line downsampled to ``points`` points."""
+    if len(frame) <= max_bars:
+        return px.bar(frame, x=x, y=y, title=title)
+    line = downsample(frame, x, y, points, method)
+    fig = go.Figure(go.Scatter(x=line[x], y=line[y], mode='lines', name=y))
+    fig.update_layout(title=title)
+    return fig
+
+
+def category_bar_chart(frame, label, value, title, n=CATEGORY_BARS, orientation='v', **kwargs):
+    """A bar per category for the ``n`` largest and one ``OTHER`` bar for the rest."""
+    frame = top_categories(frame, label, value, n)
+    if orientation == 'h':
+        return px.bar(frame, x=value, y=label, orientation='h', title=title, **kwargs)
+    return px.bar(frame, x=label, y=value, title=title, **kwargs)
+
+
+@dataclass
+class FigureStats:
+    title: str
+    traces: int
+    points: int
+    source_rows: int
+    json_bytes: int
+    webgl: bool
+
+
+CHART_TELEMETRY = deque(maxlen=TELEMETRY_SIZE)
+
+
+def _trace_points(trace):
+    for key in ('x', 'y', 'values', 'z'):
+        values = trace.get(key)
+        if values is not None and not isinstance(values, (str, dict)):
+            return len(values)
+    return 0
+
+
+def figure_stats(fig, source_rows=None):
+    """FigureStats of a Plotly figure or its JSON spec (a dict, as stored in report snapshots).
+
+    ``source_rows`` is the number of rows the chart summarises, when the caller knows it.
+    """
+    if isinstance(fig, dict):
+        spec, size = fig, len(json.dumps(fig, separators=(',', ':')))
+    else:
+        spec, size = fig.to_plotly_json(), len(pio.to_json(fig, validate=False))
+    traces = spec.get('data', [])
+    title = spec.get('layout', {}).get('title', {})
+    return FigureStats(
+        title=title.get('text', '') if isinstance(title, dict) else str(title),
+        traces=len(traces),
+        points=sum(_trace_points(trace) for trace in traces),
+        source_rows=source_rows,
+        json_bytes=size,
+        webgl=any(trace.get('type', '').endswith('gl') for trace in traces),
+    )
+
+
+def use_webgl(fig, threshold=WEBGL_POINTS):
+    """Replace scatter/line traces longer than ``threshold`` points with Scattergl traces."""
+    traces, converted = [], False
+    for trace in fig.data:
+        if trace.type == 'scatter' and _trace_points(trace.to_plotly_json()) > threshold:
+            spec = {key: value for key, value in trace.to_plotly_json().items() if key != 'type'}
+            try:
+                trace, converted = go.Scattergl(spec), True
+            except ValueError:
+                # A property WebGL does not support (e.g. spline lines): keep the SVG trace
+                pass
+        traces.append(trace)
+    if converted:
+        # Figure.data only accepts its own traces, so they are replaced through an empty figure
+        fig.data = []
+        fig.add_traces(traces)
+    return fig
+
+
+def finish_figure(fig, source_rows=None):
+    """``fig`` with WebGL traces where they are large; its size goes to CHART_TELEMETRY."""
+    use_webgl(fig)
+    CHART_TELEMETRY.append(figure_stats(fig, source_rows))
+    return fig
+
+
+def telemetry_frame(stats=None):
+    """FigureStats as a table; the recorded CHART_TELEMETRY by default."""
+    stats = CHART_TELEMETRY if stats is None else stats
+    return pd.DataFrame([asdict(item) for item in stats], columns=list(FigureStats.__dataclass_fields__))
@@ -0,0 +1,107 @@
+"""Compact in-memory representation for the VISA exports: shared int32 ID codes and downcast numbers."""
+import numpy as np
+import pandas as pd
+
+ID_COLUMNS = ['cardholder_id', 'card_id', 'transaction_id']
+
+
+class IdDictionary:
+    """Append-only mapping between ID strings and int32 codes.
+
+    New values are appended as a chunk instead of copying the whole index,
+    and the last two chunks are merged while the older one is not larger
+    (like a binary counter), so n values cost O(n log n) copying in total
+    and a lookup searches O(log n) chunks.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def values(self):
+        """Every value in code order, as one Index."""
+        if len(self._chunks) > 1:
+            self._chunks = [self._chunks[0].append(self._chunks[1:])]
+        return self._chunks[0] if self._chunks else pd.Index([], dtype=object)
+
+    def lookup(self, series):
+        """Codes of known values and -1 for the rest; nothing is added."""
+        values = pd.Series(series).to_numpy(dtype=object)
+        codes = np.full(len(values), -1, dtype=np.int64)
+        offset = 0
+        for chunk in self._chunks:
+            pending = np.flatnonzero(codes == -1)
+            if not len(pending):
+                break
+            found = chunk.get_indexer(values[pending])
+            codes[pending[found >= 0]] = found[found >= 0] + offset
+            offset += len(chunk)
+        return codes
+
+    def encode(self, series):
+        codes = self.lookup(series)
+        unseen = (codes == -1) & series.notna().to_numpy()
+        if unseen.any():
+            new_values = pd.Index(pd.unique(series[unseen]), dtype=object)
+            if self._size + len(new_values) > np.iinfo(np.int32).max:
+                raise OverflowError("ID dictionary exceeds the int32 code range")
+            codes[unseen] = new_values.get_indexer(series[unseen]) + self._size
+            self._chunks.append(new_values)
+            self._size += len(new_values)
+            while len(self._chunks) > 1 and len(self._chunks[-2]) <= len(self._chunks[-1]):
+                last = self._chunks.pop()
+                self._chunks[-1] = self._chunks[-1].append(last)
+        codes = codes.astype(np.int32)
+        if (codes == -1).any():
+            return pd.array(np.where(codes == -1, pd.NA, codes), dtype='Int32')
+        return codes
+
+    def decode(self, codes):
+        codes = pd.array(codes, dtype='Int32')
+        missing = codes.isna()
+        values = self.values.take(codes.fillna(0).to_numpy(dtype=np.int64)).to_numpy(dtype=object)
+        values[missing] = np.nan
+        return values
+
+
+class SharedDictionaries(dict):
+    """One IdDictionary per ID column name, created on first use.
+
+    Scope one to a load of related frames (e.g. one campaign report build):
+    it holds every ID it has seen, and codes are only meaningful between
+    frames encoded with the same dictionaries.
+    """
+
+    def __missing__(self, column):
+        self[column] = IdDictionary()
+        return self[column]
+
+
+def downcast_numeric(series):
+    if not isinstance(series.dtype, np.dtype):
+        return series
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return pd.to_numeric(series, downcast='integer')
+    if pd.api.types.is_float_dtype(series.dtype):
+        values = series.to_numpy()
+        if len(values) and np.all(np.mod(values, 1) == 0) and np.all(np.abs(values) < 2 ** 53):
+            return pd.to_numeric(series.astype(np.int64), downcast='integer')
+    return series
+
+
+def compact_frame(df, dictionaries, id_columns=ID_COLUMNS):
+    """Return ``df`` with ID columns encoded and numeric columns downcast."""
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if col in id_columns and not pd.api.types.is_integer_dtype(series.dtype):
+            columns[col] = dictionaries[col].encode(series)
+        elif pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+            columns[col] = downcast_numeric(series)
+        else:
+            columns[col] = series
+    return pd.DataFrame(columns, index=df.index)
@@ -0,0 +1,78 @@
+"""Batched qualitative x quantitative analysis, one groupby per qualitative column."""
+import pandas as pd
+
+from engine.quantile_sketch import DEFAULT_RANK_ERROR, GroupQuantileSketch
+
+QUANTILES = [0.25, 0.5, 0.75]
+QUARTILE_COLUMNS = ['25%', '50%', '75%']
+STAT_COLUMNS = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+KEY_COLUMNS = ['qualitative', 'group', 'quantitative']
+
+
+def factorize_key(series):
+    # Codes are -1 for missing keys, which groupby on a Categorical drops
+    codes, labels = pd.factorize(series, sort=True)
+    return codes, pd.Index(labels)
+
+
+def cross_analysis_table(df, qualitative_attributes, quantitative_attributes,
+                         quantile_method='exact', rank_error=DEFAULT_RANK_ERROR):
+    """Group statistics for every (qualitative, quantitative) pair as one long table."""
+    if quantile_method not in ('exact', 'sketch'):
+        raise ValueError(f"Unknown quantile_method '{quantile_method}', expected 'exact' or 'sketch'")
+
+    tables = []
+    if quantitative_attributes:
+        values = df[quantitative_attributes]
+        for qual_col in qualitative_attributes:
+            codes, labels = factorize_key(df[qual_col])
+            tables.append(_grouped_stats(values, qual_col, codes, labels, quantile_method, rank_error))
+    if not tables:
+        return pd.DataFrame(columns=KEY_COLUMNS + STAT_COLUMNS)
+    return pd.concat(tables, ignore_index=True)
+
+
+def _grouped_stats(values, qual_col, codes, labels, quantile_method, rank_error):
+    keys = pd.Categorical.from_codes(codes, categories=labels)
+    grouped = values.groupby(keys, observed=True, sort=True)
+    stats = grouped.agg(['count', 'mean', 'std', 'min', 'max'])
+    stats = stats.stack(level=0, future_stack=True)
+    stats.index.names = ['group', 'quantitative']
+
+    if quantile_method == 'sketch':
+        quartiles = pd.concat({
+            quant_col: GroupQuantileSketch.from_codes(codes, labels, values[quant_col], rank_error)
+            .quantiles(QUANTILES)
+            for quant_col in values.columns
+        }, names=['quantitative', 'group']).swaplevel().reindex(stats.index)
+    else:
+        quartiles = grouped.quantile(QUANTILES)
+        quartiles.index.names = ['group', 'q']
+        quartiles.columns.name = 'quantitative'
+        quartiles = quartiles.stack(future_stack=True).unstack('q').reindex(stats.index)
+    quartiles.columns = QUARTILE_COLUMNS
+
+    table = pd.concat([stats, quartiles], axis=1)[STAT_COLUMNS].reset_index()
+    table['group'] = table['group'].astype(object)
+    table.insert(0, 'qualitative', qual_col)
+    return table
+
+
+def pair_table(table, qual_col, quant_col):
+    """The per-pair view: one row per group of ``qual_col``, stats of ``quant_col``."""
+    rows = table[(table['qualitative'] == qual_col) & (table['quantitative'] == quant_col)]
+    return _as_pair(rows, qual_col)
+
+
+def pair_tables(table):
+    # All pairs in one pass over the long table, keyed like the analyzers expect
+    results = {}
+    for (qual_col, quant_col), rows in table.groupby(['qualitative', 'quantitative'], sort=False):
+        results[f"{quant_col} by {qual_col}"] = _as_pair(rows, qual_col)
+    return results
+
+
+def _as_pair(rows, qual_col):
+    pair = rows[['group'] + STAT_COLUMNS].rename(columns={'group': qual_col}).reset_index(drop=True)
+    pair['count'] = pair['count'].astype('int64')
+    return pair
@@ -0,0 +1,271 @@
+"""Streaming duplicate detection over 64-bit row and column hashes.
+
+``exact`` keeps 16 bytes per distinct value; ``approximate`` uses fixed-size Bloom filters.
+"""
+import os
+from collections import Counter
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+MODES = ('exact', 'approximate')
+DEFAULT_CAPACITY = 1_000_000
+DEFAULT_ERROR_RATE = 0.001
+TOP_K = 10
+_ROW_PRIME = np.uint64(0x100000001B3)
+
+
+def column_hashes(series):
+    """64-bit hash per value; missing values all hash alike."""
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        values = series.to_numpy(dtype='float64', na_value=np.nan)
+    else:
+        values = series.to_numpy(dtype=object)
+    return pd.util.hash_array(values)
+
+
+def row_hashes(hashes):
+    """Combine per-column hash arrays into one hash per row."""
+    combined = None
+    for column in hashes:
+        combined = column.copy() if combined is None else combined * _ROW_PRIME ^ column
+    return combined
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over 64-bit hashes (double hashing)."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, error_rate=DEFAULT_ERROR_RATE):
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.size = max(64, int(np.ceil(-capacity * np.log(error_rate) / np.log(2) ** 2)))
+        self.num_hashes = max(1, int(round(self.size / max(capacity, 1) * np.log(2))))
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+
+    def _positions(self, hashes):
+        low = (hashes & np.uint64(0xFFFFFFFF)).astype(np.int64)
+        high = (hashes >> np.uint64(32)).astype(np.int64) | 1
+        steps = np.arange(self.num_hashes, dtype=np.int64)
+        return (low[:, None] + steps * high[:, None]) % self.size
+
+    def add(self, hashes):
+        """Insert distinct ``hashes``; returns a mask of those probably seen before."""
+        positions = self._positions(hashes)
+        present = (self.bits[positions >> 3] >> (positions & 7).astype(np.uint8)) & 1
+        seen = present.all(axis=1)
+        np.bitwise_or.at(self.bits, (positions >> 3).ravel(), (1 << (positions & 7)).astype(np.uint8).ravel())
+        return seen
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+
+class KeyCounts:
+    """Sorted 64-bit key hashes with a running count per key.
+
+    Keys are kept in disjoint sorted runs of decreasing size; a new run is
+    merged with the one before it once it is as large, so adding a batch
+    costs its own size plus amortised O(log n) merges, not a full rewrite.
+    """
+
+    def __init__(self, keys=None, counts=None):
+        self.runs = []
+        if keys is not None and len(keys):
+            self.runs.append((keys, counts))
+
+    def __len__(self):
+        return sum(len(keys) for keys, _ in self.runs)
+
+    @property
+    def nbytes(self):
+        return sum(keys.nbytes + counts.nbytes for keys, counts in self.runs)
+
+    @property
+    def keys(self):
+        return self._merged()[0]
+
+    @property
+    def counts(self):
+        return self._merged()[1]
+
+    def _merged(self):
+        while len(self.runs) > 1:
+            self._merge_last()
+        if not self.runs:
+            return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+        return self.runs[0]
+
+    def _merge_last(self):
+        (keys, counts), (new_keys, new_counts) = self.runs[-2:]
+        pos = np.searchsorted(keys, new_keys)
+        self.runs[-2:] = [(np.insert(keys, pos, new_keys), np.insert(counts, pos, new_counts))]
+
+    def add(self, keys, counts):
+        """Add ``counts`` to the unique, sorted ``keys``.
+
+        Returns the counts before the update and a mask of the keys that
+        were already present.
+        """
+        before = np.zeros(len(keys), dtype=np.int64)
+        found = np.zeros(len(keys), dtype=bool)
+        for run_keys, run_counts in self.runs:
+            pos = np.searchsorted(run_keys, keys)
+            hit = pos < len(run_keys)
+            hit[hit] = run_keys[pos[hit]] == keys[hit]
+            before[hit] = run_counts[pos[hit]]
+            run_counts[pos[hit]] += counts[hit]
+            found |= hit
+        new = ~found
+        if new.any():
+            self.runs.append((keys[new], counts[new].astype(np.int64)))
+            while len(self.runs) > 1 and len(self.runs[-1][0]) >= len(self.runs[-2][0]):
+                self._merge_last()
+        return before, found
+
+    def save(self, path):
+        staging = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(staging, keys=self.keys, counts=self.counts)
+        os.replace(staging, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['keys'], data['counts'])
+
+
+class _ExactSeen:
+    def __init__(self):
+        self.keys = KeyCounts()
+
+    def add(self, hashes, counts):
+        before, _ = self.keys.add(hashes, counts)
+        return before
+
+    @property
+    def nbytes(self):
+        return self.keys.nbytes
+
+
+class _ApproximateSeen:
+    def __init__(self, capacity, error_rate):
+        self.bloom = BloomFilter(capacity, error_rate)
+
+    def add(self, hashes, counts):
+        # The filter only answers "seen before"; one earlier occurrence is assumed
+        return self.bloom.add(hashes).astype(np.int64)
+
+    @property
+    def nbytes(self):
+        return self.bloom.nbytes
+
+
+@dataclass
+class DuplicateReport:
+    """Duplicate rows, duplicates per column and the most repeated key values."""
+    mode: str
+    row_count: int
+    duplicate_rows: int
+    duplicate_columns: pd.DataFrame
+    top_keys: dict = field(default_factory=dict)
+    state_bytes: int = 0
+
+
+class DuplicateDetector:
+    """Count duplicate rows and values chunk by chunk without keeping rows.
+
+    ``capacity`` and ``error_rate`` size the Bloom filters in approximate
+    mode (per column, plus one for rows).
+    """
+
+    def __init__(self, mode='exact', key_columns=(), top_k=TOP_K, track_columns=True,
+                 capacity=DEFAULT_CAPACITY, error_rate=DEFAULT_ERROR_RATE):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        self.mode = mode
+        self.key_columns = list(key_columns)
+        self.top_k = top_k
+        self.track_columns = track_columns
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.row_count = 0
+        self.duplicate_rows = 0
+        self.duplicates = Counter()
+        self.columns = None
+        self._rows = self._new_state()
+        self._columns = {}
+        self._occurrences = {col: Counter() for col in self.key_columns}
+        self._labels = {col: {} for col in self.key_columns}
+
+    def _new_state(self):
+        if self.mode == 'exact':
+            return _ExactSeen()
+        return _ApproximateSeen(self.capacity, self.error_rate)
+
+    def update(self, chunk):
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+            missing = [col for col in self.key_columns if col not in chunk.columns]
+            if missing:
+                raise KeyError(f"Key columns not in the data: {missing}")
+        hashes = {col: column_hashes(chunk[col]) for col in chunk.columns}
+        self.row_count += len(chunk)
+        self.duplicate_rows += self._count(self._rows, row_hashes(list(hashes.values())))
+        for col, values in hashes.items():
+            if self.track_columns or col in self.key_columns:
+                state = self._columns.setdefault(col, self._new_state())
+                self.duplicates[col] += self._count(state, values, col, chunk[col])
+        return self
+
+    def _count(self, state, hashes, key_col=None, values=None):
+        unique, first, counts = np.unique(hashes, return_index=True, return_counts=True)
+        before = state.add(unique, counts.astype(np.int64))
+        repeats = counts - 1 + (before > 0)
+        if key_col in self._occurrences:
+            # Only values that repeat are labelled and counted
+            repeated = repeats > 0
+            labels = self._labels[key_col]
+            occurrences = self._occurrences[key_col]
+            for key, row, count, earlier in zip(unique[repeated].tolist(), first[repeated].tolist(),
+                                                counts[repeated].tolist(), before[repeated].tolist()):
+                if key in occurrences:
+                    occurrences[key] += count
+                else:
+                    labels[key] = values.iloc[row]
+                    occurrences[key] = count + earlier
+        return int(repeats.sum())
+
+    def top_keys(self, column):
+        """The most repeated values of a key column with their occurrence counts."""
+        labels = self._labels[column]
+        top = self._occurrences[column].most_common(self.top_k)
+        return pd.DataFrame({
+            column: [labels[key] for key, _ in top],
+            'Occurrences': [occurrences for _, occurrences in top],
+        })
+
+    def report(self):
+        tracked = [col for col in (self.columns or []) if col in self._columns]
+        duplicate_columns = pd.Series({col: self.duplicates[col] for col in tracked},
+                                      dtype='int64').to_frame('Duplicate Count')
+        state_bytes = self._rows.nbytes + sum(state.nbytes for state in self._columns.values())
+        return DuplicateReport(
+            mode=self.mode,
+            row_count=self.row_count,
+            duplicate_rows=self.duplicate_rows,
+            duplicate_columns=duplicate_columns,
+            top_keys={col: self.top_keys(col) for col in self.key_columns},
+            state_bytes=state_bytes,
+        )
+
+
+def find_duplicates(file, key_columns=(), mode='exact', chunksize=100_000, top_k=TOP_K,
+                    capacity=DEFAULT_CAPACITY, error_rate=DEFAULT_ERROR_RATE):
+    """Duplicate report for a CSV read in chunks of ``chunksize`` rows."""
+    detector = DuplicateDetector(mode, key_columns, top_k, capacity=capacity, error_rate=error_rate)
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    for chunk in pd.read_csv(file, chunksize=chunksize):
+        detector.update(chunk)
+    return detector.report()
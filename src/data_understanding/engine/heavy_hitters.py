@@ -0,0 +1,103 @@
+"""Top-k frequency tables in bounded memory (Space-Saving), exact until ``capacity`` values."""
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from engine.hll import DEFAULT_PRECISION, HyperLogLog
+
+CAPACITY = int(os.environ.get('DATA_UNDERSTANDING_TOP_CAPACITY', 10_000))
+OTHER = '(other)'
+
+
+@dataclass
+class TopValues:
+    """The ``counts`` of the k most frequent values; ``errors`` bounds each count's overestimate."""
+    counts: pd.Series
+    errors: pd.Series
+    total: int
+    distinct: int
+    distinct_exact: bool = True
+
+    @property
+    def exact(self):
+        return self.distinct_exact and not self.errors.any()
+
+    @property
+    def other(self):
+        # Non-null values outside the top k; low by at most the sum of the errors
+        return max(0, self.total - int(self.counts.sum()))
+
+    def table(self):
+        """Frequency, Percentage and Error of the top values, plus the ``OTHER`` bucket."""
+        scale = 100 / self.total if self.total else 0.0
+        table = pd.DataFrame({
+            'Frequency': self.counts,
+            'Percentage': self.counts * scale,
+            'Error': self.errors,
+        })
+        if len(self.counts) < self.distinct:
+            other = pd.DataFrame({'Frequency': [self.other], 'Percentage': [self.other * scale],
+                                  'Error': [int(self.errors.sum())]}, index=[OTHER])
+            table = pd.concat([table, other])
+        table.index.name = self.counts.index.name
+        return table
+
+
+def top_values(values, k):
+    """Exact TopValues of an in-memory column."""
+    counts = pd.Series(values).value_counts()
+    return TopValues(counts=counts.iloc[:k], errors=pd.Series(0, index=counts.index[:k], dtype='int64'),
+                     total=int(counts.sum()), distinct=len(counts))
+
+
+class SpaceSaving:
+    """Space-Saving summary of a column read in chunks."""
+
+    def __init__(self, capacity=CAPACITY, precision=DEFAULT_PRECISION, name=None):
+        self.capacity = capacity
+        self.name = name
+        self.counts = pd.Series(dtype='int64')
+        self.errors = pd.Series(dtype='int64')
+        self.floor = 0
+        self.total = 0
+        self.evicted = False
+        self.sketch = HyperLogLog(precision)
+
+    def update(self, values):
+        return self.update_counts(pd.Series(values).value_counts())
+
+    def update_counts(self, chunk):
+        """Merge a value -> count Series, e.g. one chunk's ``value_counts``."""
+        chunk = chunk[chunk > 0]
+        if not len(chunk):
+            return self
+        if isinstance(chunk.index, pd.CategoricalIndex):
+            chunk.index = chunk.index.astype(object)
+        self.total += int(chunk.sum())
+        self.sketch.add(chunk.index.to_numpy())
+
+        index = self.counts.index.union(chunk.index, sort=False)
+        counts = self.counts.reindex(index, fill_value=self.floor) + chunk.reindex(index, fill_value=0)
+        errors = self.errors.reindex(index, fill_value=self.floor)
+        if len(counts) > self.capacity:
+            kept = counts.sort_values(ascending=False, kind='stable').index[:self.capacity]
+            counts, errors = counts[kept], errors[kept]
+            self.floor = int(counts.min())
+            self.evicted = True
+        self.counts, self.errors = counts.astype('int64'), errors.astype('int64')
+        return self
+
+    def distinct(self):
+        if not self.evicted:
+            return len(self.counts)
+        return max(self.sketch.count(), len(self.counts))
+
+    def result(self, k):
+        """TopValues of the ``k`` largest counters."""
+        order = np.argsort(-self.counts.to_numpy(), kind='stable')[:k]
+        counts = self.counts.iloc[order].rename('count')
+        counts.index.name = self.name
+        return TopValues(counts=counts, errors=self.errors.iloc[order], total=self.total,
+                         distinct=self.distinct(), distinct_exact=not self.evicted)
@@ -0,0 +1,149 @@
+"""HyperLogLog sketches for approximate, mergeable distinct counts."""
+import os
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PRECISION = 14
+MIN_PRECISION = 4
+MAX_PRECISION = 18
+FILE_SUFFIX = '.hll'
+
+
+def _hash(values):
+    # Hashed directly; categorize=True would factorize every batch first, a wasted pass over unique IDs
+    array = pd.Series(values).dropna().to_numpy()
+    if array.dtype.kind == 'i':
+        array = array.astype(np.int64)
+    if array.dtype.kind != 'f':
+        return pd.util.hash_array(array, categorize=False).astype(np.uint64)
+    # An ID read as float (a column with missing values) hashes like the same ID read as int
+    hashes = pd.util.hash_array(array, categorize=False)
+    integral = (array % 1 == 0) & (np.abs(array) < 2 ** 63)
+    hashes[integral] = pd.util.hash_array(array[integral].astype(np.int64), categorize=False)
+    return hashes.astype(np.uint64)
+
+
+def _bit_length(words):
+    # Exact bit length of uint64 words by binary search over the shifts
+    words = words.copy()
+    length = np.zeros(len(words), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = words >> np.uint64(shift)
+        has_high = high > 0
+        length += np.where(has_high, shift, 0)
+        words = np.where(has_high, high, words)
+    return length + (words > 0)
+
+
+def _index_and_rank(hashes, precision):
+    index = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    rest_bits = 64 - precision
+    rest = hashes & np.uint64((1 << rest_bits) - 1)
+    rank = rest_bits - _bit_length(rest) + 1
+    return index, rank.astype(np.uint8)
+
+
+class HyperLogLog:
+    """Mergeable distinct-count sketch."""
+
+    def __init__(self, precision=DEFAULT_PRECISION, registers=None):
+        if not MIN_PRECISION <= precision <= MAX_PRECISION:
+            raise ValueError(f"precision must be between {MIN_PRECISION} and {MAX_PRECISION}")
+        self.precision = precision
+        self.m = 1 << precision
+        if registers is None:
+            registers = np.zeros(self.m, dtype=np.uint8)
+        elif len(registers) != self.m:
+            raise ValueError("register array does not match the precision")
+        self.registers = registers
+
+    @classmethod
+    def from_values(cls, values, precision=DEFAULT_PRECISION):
+        sketch = cls(precision)
+        sketch.add(values)
+        return sketch
+
+    def add(self, values):
+        """Add a column of values; missing values are ignored."""
+        index, rank = _index_and_rank(_hash(values), self.precision)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Only sketches with the same precision can be merged")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        # Linear counting is more accurate while many registers are still empty
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+    def relative_error(self):
+        return 1.04 / np.sqrt(self.m)
+
+    def to_bytes(self):
+        return bytes([self.precision]) + self.registers.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        precision = data[0]
+        return cls(precision, np.frombuffer(data[1:], dtype=np.uint8).copy())
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+
+def daily_sketches(df, id_col, date_col='created_at', precision=DEFAULT_PRECISION):
+    """One sketch per calendar day of ``date_col``, built in a single pass."""
+    days = pd.to_datetime(df[date_col]).dt.date
+    valid = df[id_col].notna() & days.notna()
+    day_codes, day_labels = pd.factorize(days[valid], sort=True)
+    index, rank = _index_and_rank(_hash(df.loc[valid, id_col]), precision)
+    registers = np.zeros((len(day_labels), 1 << precision), dtype=np.uint8)
+    np.maximum.at(registers, (day_codes, index), rank)
+    return {day: HyperLogLog(precision, registers[i]) for i, day in enumerate(day_labels)}
+
+
+def save_sketches(directory, metric, sketches):
+    """Persist ``{key: sketch}`` (e.g. per day or per file) under ``directory/metric``."""
+    target = os.path.join(directory, metric)
+    os.makedirs(target, exist_ok=True)
+    for key, sketch in sketches.items():
+        sketch.save(os.path.join(target, f"{key}{FILE_SUFFIX}"))
+
+
+def union_saved(directory, metric, keys=None):
+    """Merge the persisted sketches of ``metric`` (optionally only ``keys``)."""
+    target = os.path.join(directory, metric)
+    if not os.path.isdir(target):
+        return None
+    names = sorted(name[:-len(FILE_SUFFIX)] for name in os.listdir(target) if name.endswith(FILE_SUFFIX))
+    if keys is not None:
+        wanted = {str(key) for key in keys}
+        names = [name for name in names if name in wanted]
+    union = None
+    for name in names:
+        sketch = HyperLogLog.load(os.path.join(target, f"{name}{FILE_SUFFIX}"))
+        union = sketch if union is None else union.merge(sketch)
+    return union
+
+
+def distinct_count(values, approximate=False, precision=DEFAULT_PRECISION):
+    # Exact nunique, or an HLL estimate that never holds the distinct values
+    if approximate:
+        return HyperLogLog.from_values(values, precision).count()
+    return pd.Series(values).nunique()
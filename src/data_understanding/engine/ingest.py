@@ -0,0 +1,118 @@
+"""Columnar ingest of the VISA exports through a cached Parquet copy of each upload."""
+import os
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from engine.cache import INGEST_DIR, ResultCache, content_hash
+from engine.compact import SharedDictionaries, compact_frame
+from engine.timeseries import TIME_COLUMN, parse_timestamps
+
+BLOCK_SIZE = 16 * 1024 * 1024
+TIMESTAMP_PARSERS = [pa_csv.ISO8601, '%Y-%m-%d %H:%M:%S']
+
+# Known columns of the VISA exports; columns not listed here are inferred
+SCHEMAS = {
+    'card': {
+        'cardholder_id': pa.string(),
+        'card_id': pa.string(),
+        'issuer_bin': pa.int64(),
+        'created_at': pa.timestamp('s'),
+    },
+    'transaction': {
+        'cardholder_id': pa.string(),
+        'card_id': pa.string(),
+        'transaction_id': pa.int64(),
+        'transaction_amount': pa.float64(),
+        'cashback_amount': pa.float64(),
+        'merchant_id': pa.int64(),
+        'created_at': pa.timestamp('s'),
+    },
+    'redemption': {
+        'cardholder_id': pa.string(),
+        'card_id': pa.string(),
+        'cashback_amount': pa.float64(),
+        'transaction_id': pa.int64(),
+        'created_at': pa.timestamp('s'),
+        'merchant_id': pa.int64(),
+        'name': pa.string(),
+        'category': pa.string(),
+    },
+}
+
+
+def _csv_input(file):
+    # Streamlit uploads are in-memory buffers; paths and open files pass through
+    if hasattr(file, 'getvalue'):
+        return pa.BufferReader(file.getvalue())
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    return file
+
+
+def read_csv_table(file, dataset=None):
+    """Parse a CSV into an Arrow table with pyarrow's multithreaded reader."""
+    read_options = pa_csv.ReadOptions(use_threads=True, block_size=BLOCK_SIZE)
+    column_types = SCHEMAS.get(dataset, {})
+    try:
+        return pa_csv.read_csv(_csv_input(file), read_options=read_options,
+                               convert_options=pa_csv.ConvertOptions(
+                                   column_types=column_types,
+                                   strings_can_be_null=True,
+                                   timestamp_parsers=TIMESTAMP_PARSERS))
+    except pa.ArrowInvalid:
+        if not column_types:
+            raise
+        # A file that does not match the known schema is still loaded, with inferred types
+        return pa_csv.read_csv(_csv_input(file), read_options=read_options,
+                               convert_options=pa_csv.ConvertOptions(strings_can_be_null=True))
+
+
+def parquet_path(source_hash, directory=INGEST_DIR):
+    return os.path.join(directory, f"{source_hash}.parquet")
+
+
+def ingest(file, dataset=None, source_hash=None, directory=INGEST_DIR):
+    """Make sure a Parquet copy of ``file`` exists and return its path."""
+    if source_hash is None:
+        source_hash = content_hash(file)
+    path = parquet_path(source_hash, directory)
+    if os.path.exists(path):
+        # The mtime is the copy's last access for the cache's LRU eviction
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        else:
+            return path
+    os.makedirs(directory, exist_ok=True)
+    table = read_csv_table(file, dataset)
+    staging = f"{path}.{os.getpid()}.tmp"
+    pq.write_table(table, staging)
+    os.replace(staging, path)
+    if directory == INGEST_DIR:
+        ResultCache().evict(keep=(path,))
+    return path
+
+
+def load_dataset(file, dataset=None, columns=None, source_hash=None, directory=INGEST_DIR,
+                 compact=False, dictionaries=None):
+    """Load a known export as a DataFrame, reading only ``columns`` when given.
+
+    With ``compact=True`` ID columns are dictionary-encoded through
+    ``dictionaries`` (a ``SharedDictionaries``) and numeric columns downcast.
+    """
+    path = ingest(file, dataset, source_hash, directory)
+    if columns is not None:
+        available = set(pq.read_schema(path).names)
+        columns = [col for col in columns if col in available]
+    table = pq.read_table(path, columns=columns, memory_map=True)
+    # split_blocks/self_destruct hand Arrow buffers to pandas without a consolidation copy
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    if TIME_COLUMN in df.columns:
+        # Normally already a timestamp from the schema; covers files that fell back to inference
+        df[TIME_COLUMN] = parse_timestamps(df[TIME_COLUMN])
+    if compact:
+        df = compact_frame(df, dictionaries if dictionaries is not None else SharedDictionaries())
+    return df
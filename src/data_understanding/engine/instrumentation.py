@@ -0,0 +1,147 @@
+"""Per-stage timing and memory spans for the profiling pipeline."""
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+import pandas as pd
+import psutil
+
+STAGES = ['read', 'dtype inference', 'missing', 'duplicates', 'describe',
+          'qualitative', 'quantitative', 'cross-analysis']
+STAGE_MESSAGES = {
+    'read': "Reading CSV file...",
+    'dtype inference': "Analyzing data format...",
+    'missing': "Counting missing values...",
+    'duplicates': "Finding duplicates...",
+    'describe': "Generating summaries and statistics...",
+    'qualitative': "Summarizing qualitative attributes...",
+    'quantitative': "Summarizing quantitative attributes...",
+    'cross-analysis': "Analyzing qualitative vs quantitative attributes...",
+    'worker tiles': "Profiling columns in worker processes...",
+    'planning': "Planning the analysis...",
+}
+SAMPLE_INTERVAL = 0.005
+METRIC_PREFIX = 'data_understanding_stage'
+
+
+class PeakRSS:
+    """Context manager recording the peak resident set size while it is open."""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.start = self.peak = 0
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self.process.memory_info().rss)
+
+    def __enter__(self):
+        self.start = self.peak = self.process.memory_info().rss
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.process.memory_info().rss)
+
+    @property
+    def delta(self):
+        return self.peak - self.start
+
+
+@dataclass
+class StageSpan:
+    stage: str
+    seconds: float = 0.0
+    rows: int = 0
+    peak_rss_bytes: int = 0
+    calls: int = 0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else None
+
+    def to_dict(self):
+        return dict(asdict(self), rows_per_second=self.rows_per_second)
+
+
+class StageTimer:
+    """Collects StageSpans and drives a progress callback.
+
+    The fraction passed to ``progress`` is the share of ``stages`` started
+    so far, so it moves as the work actually happens, whatever the order.
+    """
+
+    def __init__(self, progress=None, stages=STAGES):
+        self.progress = progress
+        self.stages = list(stages)
+        self.spans = {}
+
+    def report(self, fraction, message):
+        if self.progress is not None:
+            self.progress(min(max(fraction, 0.0), 1.0), message)
+
+    @contextmanager
+    def span(self, stage, rows=0):
+        if stage in self.stages and stage not in self.spans:
+            started_stages = sum(name in self.spans for name in self.stages)
+            self.report(started_stages / len(self.stages), STAGE_MESSAGES.get(stage, f"{stage}..."))
+        span = self.spans.setdefault(stage, StageSpan(stage))
+        started = time.perf_counter()
+        with PeakRSS() as rss:
+            yield span
+        span.seconds += time.perf_counter() - started
+        span.rows += rows
+        span.peak_rss_bytes = max(span.peak_rss_bytes, rss.peak)
+        span.calls += 1
+
+    def finish(self, message="Analysis complete!"):
+        self.report(1.0, message)
+        return self.results()
+
+    def results(self):
+        # Spans in pipeline order, then any extra stages in the order they ran
+        order = [stage for stage in self.stages if stage in self.spans]
+        order += [stage for stage in self.spans if stage not in self.stages]
+        return [self.spans[stage] for stage in order]
+
+
+def stages_frame(spans):
+    return pd.DataFrame([span.to_dict() for span in spans],
+                        columns=['stage', 'seconds', 'rows', 'rows_per_second', 'peak_rss_bytes', 'calls'])
+
+
+def stages_to_json(spans, **metadata):
+    return json.dumps(dict(metadata, stages=[span.to_dict() for span in spans]), indent=2)
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def stages_to_prometheus(spans, **labels):
+    """Spans in the Prometheus text format, one gauge family per measurement."""
+    families = [
+        ('seconds', "Wall time of the profiling stage in seconds", lambda span: span.seconds),
+        ('rows_per_second', "Rows processed per second by the profiling stage", lambda span: span.rows_per_second),
+        ('peak_rss_bytes', "Peak resident set size during the profiling stage", lambda span: span.peak_rss_bytes),
+    ]
+    lines = []
+    for suffix, help_text, value in families:
+        name = f"{METRIC_PREFIX}_{suffix}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for span in spans:
+            measured = value(span)
+            if measured is None:
+                continue
+            label_text = ','.join(f'{key}="{_label(val)}"' for key, val in dict(labels, stage=span.stage).items())
+            lines.append(f"{name}{{{label_text}}} {measured}")
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,285 @@
+"""A shared pool of analysis jobs with deduplication and memory admission."""
+import inspect
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+import pandas as pd
+import psutil
+
+from engine.cache import UNKEYED_KWARGS, ResultCache, cache_key, content_hash
+
+JOB_WORKERS = int(os.environ.get('DATA_UNDERSTANDING_JOB_WORKERS', 2))
+JOB_MEMORY = int(os.environ.get('DATA_UNDERSTANDING_JOB_MEMORY', psutil.virtual_memory().total // 2))
+JOB_BASE_BYTES = 128 * 1024 ** 2
+# Peak memory per byte of upload; a CSV parsed into pandas takes several times its size
+DEFAULT_MEMORY_FACTOR = 5.0
+MEMORY_FACTORS = {
+    'analyze_csv_parallel': 6.0,
+}
+# Exact duplicate detection keeps a 64-bit hash and a count per distinct row
+HASH_BYTES = 16
+# Bytes read from the start of a file to measure its rows
+PROBE_BYTES = 64 * 1024
+# Finished jobs kept for status queries
+KEEP_FINISHED = 100
+# Seconds an uncollected result stays in memory before only the cache holds it
+RESULT_SECONDS = 60
+WATCH_INTERVAL = 0.2
+
+
+def source_size(source):
+    """Size in bytes of a path, bytes or file-like upload."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source)
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    if hasattr(source, 'size'):
+        return int(source.size)
+    position = source.tell()
+    source.seek(0, os.SEEK_END)
+    size = source.tell()
+    source.seek(position)
+    return size
+
+
+def source_head(source, size=PROBE_BYTES):
+    """The first ``size`` bytes of a path, bytes or file-like upload."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source[:size])
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return f.read(size)
+    position = source.tell()
+    source.seek(0)
+    head = source.read(size)
+    source.seek(position)
+    return head
+
+
+def estimate_memory(func, source, kwargs=None):
+    """Estimated peak bytes of ``func(source, **kwargs)``."""
+    kwargs = kwargs or {}
+    size = source_size(source)
+    factor = MEMORY_FACTORS.get(func.__name__, DEFAULT_MEMORY_FACTOR)
+    parameters = inspect.signature(func).parameters
+    if 'chunksize' not in parameters:
+        return int(JOB_BASE_BYTES + factor * size)
+    head = source_head(source)
+    lines = head.count(b'\n')
+    row_bytes = len(head) / lines if lines else size or 1
+    chunksize = kwargs.get('chunksize', parameters['chunksize'].default)
+    memory = JOB_BASE_BYTES + factor * min(size, chunksize * row_bytes)
+    mode = parameters['duplicate_mode'].default if 'duplicate_mode' in parameters else None
+    if kwargs.get('duplicate_mode', mode) == 'exact':
+        memory += HASH_BYTES * size / row_bytes
+    return int(memory)
+
+
+@dataclass(eq=False)
+class Job:
+    id: int
+    key: str
+    name: str
+    memory: int
+    state: str = 'queued'
+    fraction: float = 0.0
+    message: str = "Queued"
+    requests: int = 1
+    cached: bool = False
+    submitted: float = field(default_factory=time.time)
+    started: float = None
+    finished: float = None
+    result: object = None
+    partial: object = None
+    error: BaseException = None
+    collected: int = 0
+    released: bool = False
+    _task: object = field(default=None, repr=False)
+    _load: object = field(default=None, repr=False)
+    _done: threading.Event = field(default_factory=threading.Event, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def progress(self, fraction, message):
+        self.fraction, self.message = fraction, message
+
+    def wait(self, timeout=None):
+        """The result; re-raises the job's exception.  Counts as one request collecting it."""
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Job {self.id} ({self.name}) still {self.state}")
+        if self.error is not None:
+            raise self.error
+        with self._lock:
+            result = self._load() if self.released else self.result
+            self.collected += 1
+            if self.collected >= self.requests:
+                self.release()
+        return result
+
+    def release(self):
+        """Drop the result and partial result; ``wait`` then reads the result from the cache."""
+        if self._load is not None:
+            self.result, self.partial, self.released = None, None, True
+
+
+class JobService:
+    """Runs submitted analyses on ``workers`` threads within ``memory_budget`` bytes."""
+
+    def __init__(self, workers=JOB_WORKERS, memory_budget=JOB_MEMORY, cache=None):
+        self.memory_budget = memory_budget
+        self.cache = cache if cache is not None else ResultCache()
+        self.reserved = 0
+        self._condition = threading.Condition()
+        self._queue = deque()
+        self._active = {}
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._threads = [threading.Thread(target=self._work, name=f"analysis-job-{number}", daemon=True)
+                         for number in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, func, source, *args, source_hash=None, incremental=None, memory=None, **kwargs):
+        """The Job computing ``func(source, *args, **kwargs)``, shared with identical submissions.
+
+        ``memory`` overrides the estimated peak bytes.  ``func`` gets the
+        job's progress callback as ``progress``.
+        """
+        if source_hash is None:
+            source_hash = content_hash(source)
+        keyed = {name: value for name, value in kwargs.items() if name not in UNKEYED_KWARGS}
+        key = cache_key(source_hash, func, args, keyed)
+        hit, value = self.cache.get(key)
+        with self._condition:
+            job = self._active.get(key)
+            if job is not None:
+                job.requests += 1
+                return job
+            job = Job(id=next(self._ids), key=key, name=func.__name__,
+                      memory=memory if memory is not None else estimate_memory(func, source, kwargs))
+            self._jobs[job.id] = job
+            if not hit:
+                job._task = lambda: self._run(job, func, incremental, source, args, kwargs)
+                self._active[key] = job
+                self._queue.append(job)
+                self._condition.notify_all()
+        if hit:
+            job.result, job.cached = value, True
+            self._finish(job, 'done', "Loaded from the result cache")
+        return job
+
+    def _load(self, job):
+        hit, value = self.cache.get(job.key)
+        if not hit:
+            raise LookupError(f"The result of job {job.id} ({job.name}) is no longer cached; submit it again")
+        return value
+
+    def _run(self, job, func, incremental, source, args, kwargs):
+        # Stored under the same key as ResultCache.call(func, ...), so either finds the other's result
+        if incremental is None:
+            value = func(source, *args, progress=job.progress, **kwargs)
+        else:
+            for value in incremental(source, *args, progress=job.progress, **kwargs):
+                job.partial = value
+        self.cache.put(job.key, value)
+        return value
+
+    def _admissible(self):
+        # In order; the next job waits until its estimate fits next to the running ones
+        return self._queue and (self.reserved == 0 or self.reserved + self._queue[0].memory <= self.memory_budget)
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while not self._admissible():
+                    self._condition.wait()
+                job = self._queue.popleft()
+                self.reserved += job.memory
+                job.state, job.started, job.message = 'running', time.time(), "Starting..."
+            try:
+                job.result = job._task()
+                state, message = 'done', "Analysis complete!"
+            except Exception as error:
+                job.error = error
+                state, message = 'failed', f"Failed: {error}"
+            with self._condition:
+                self.reserved -= job.memory
+                self._active.pop(job.key, None)
+                job._task = None
+                self._condition.notify_all()
+            self._finish(job, state, message)
+
+    def _finish(self, job, state, message):
+        job.state, job.message, job.finished = state, message, time.time()
+        job.partial = None
+        if state == 'done':
+            job.fraction = 1.0
+            # _run stored the result in the cache, or it came from there
+            job._load = lambda: self._load(job)
+        with self._condition:
+            finished = [old for old in self._jobs.values() if old.done]
+            for old in finished[:max(0, len(finished) + 1 - KEEP_FINISHED)]:
+                del self._jobs[old.id]
+            stale = job.finished - RESULT_SECONDS
+            for old in finished:
+                if not old.released and old.finished < stale:
+                    with old._lock:
+                        old.release()
+        job._done.set()
+
+    def job(self, job_id):
+        with self._condition:
+            return self._jobs.get(job_id)
+
+    def position(self, job):
+        """Jobs ahead of a queued ``job``; 0 once it runs."""
+        with self._condition:
+            return self._queue.index(job) if job in self._queue else 0
+
+    def status(self, job):
+        """One line for a UI: queue position and memory wait, or the job's progress message."""
+        if job.state != 'queued':
+            return job.message
+        ahead = self.position(job)
+        waiting = f"{ahead} job(s) ahead" if ahead else "waiting for memory"
+        return f"Queued ({waiting}; needs ≈{job.memory / 2 ** 20:,.0f} MB of {self.memory_budget / 2 ** 20:,.0f} MB)"
+
+    def watch(self, job, interval=WATCH_INTERVAL):
+        """Yields ``job`` every ``interval`` seconds until it is done, then once more."""
+        while not job._done.wait(interval):
+            yield job
+        yield job
+
+    def jobs_frame(self):
+        """Every known job as a table, newest first."""
+        with self._condition:
+            jobs = list(self._jobs.values())
+        now = time.time()
+        return pd.DataFrame([{
+            'job': job.id, 'analysis': job.name, 'state': job.state, 'progress': job.fraction,
+            'message': job.message, 'requests': job.requests, 'cached': job.cached,
+            'estimated MB': job.memory / 2 ** 20,
+            'seconds': (job.finished or now) - (job.started or job.submitted),
+            'collected': job.collected, 'released': job.released,
+        } for job in reversed(jobs)], columns=['job', 'analysis', 'state', 'progress', 'message', 'requests',
+                                              'cached', 'estimated MB', 'seconds', 'collected', 'released'])
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def shared_service(cache=None):
+    """The process-wide JobService, created on first use."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = JobService(cache=cache)
+        return _service
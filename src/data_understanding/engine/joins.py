@@ -0,0 +1,277 @@
+"""Card, transaction and redemption metrics through hash joins in bounded memory."""
+import math
+import os
+import tempfile
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from engine.compact import IdDictionary, SharedDictionaries
+from engine.ingest import BLOCK_SIZE, SCHEMAS, TIMESTAMP_PARSERS, _csv_input, parquet_path
+from engine.instrumentation import StageTimer
+
+MEMORY_BUDGET = int(os.environ.get('DATA_UNDERSTANDING_JOIN_MEMORY', 256 * 1024 ** 2))
+PARTITION_ROW_BYTES = 64
+BATCH_ROWS = 1_000_000
+JOIN_STAGES = ['card index', 'partition', 'join']
+# Group slots: cards missing from the card export, then cards without a group, then the groups
+NOT_ENROLLED, NO_GROUP, FIRST_GROUP = 0, 1, 2
+GROUP_COLUMNS = ['cards', 'active_cards', 'transactions', 'redeemed_transactions', 'transaction_amount',
+                 'redemptions', 'cashback']
+
+
+def export_batches(file, dataset, columns, source_hash=None, batch_rows=BATCH_ROWS):
+    """DataFrames of ``columns`` of an export, a batch at a time.
+
+    Reads the Parquet ingest copy when one exists for ``source_hash``,
+    otherwise streams the CSV with pyarrow's incremental reader.
+    """
+    path = parquet_path(source_hash) if source_hash else None
+    if path and os.path.exists(path):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows, columns=columns):
+            yield batch.to_pandas()
+        return
+    types = {col: kind for col, kind in SCHEMAS[dataset].items() if col in columns}
+    read_options = pa_csv.ReadOptions(block_size=BLOCK_SIZE)
+    try:
+        reader = pa_csv.open_csv(_csv_input(file), read_options=read_options,
+                                 convert_options=pa_csv.ConvertOptions(include_columns=columns, column_types=types,
+                                                                       strings_can_be_null=True,
+                                                                       timestamp_parsers=TIMESTAMP_PARSERS))
+    except pa.ArrowInvalid:
+        # As in ingest.read_csv_table, a file that does not match the known schema is read with inferred types
+        reader = pa_csv.open_csv(_csv_input(file), read_options=read_options,
+                                 convert_options=pa_csv.ConvertOptions(include_columns=columns,
+                                                                       strings_can_be_null=True))
+    for batch in reader:
+        yield batch.to_pandas()
+
+
+def estimated_rows(file, source_hash=None, probe_bytes=64 * 1024):
+    """Rows of an export: exact from the Parquet ingest copy, else file size over the mean line length."""
+    path = parquet_path(source_hash) if source_hash else None
+    if path and os.path.exists(path):
+        return pq.ParquetFile(path).metadata.num_rows
+    if isinstance(file, (str, os.PathLike)):
+        size = os.path.getsize(file)
+        with open(file, 'rb') as f:
+            head = f.read(probe_bytes)
+    else:
+        data = file.getvalue() if hasattr(file, 'getvalue') else None
+        if data is None:
+            position = file.tell()
+            file.seek(0, os.SEEK_END)
+            size = file.tell()
+            file.seek(0)
+            head = file.read(probe_bytes)
+            file.seek(position)
+        else:
+            size, head = len(data), bytes(data[:probe_bytes])
+    lines = head.count(b'\n')
+    return int(size / (len(head) / lines)) if lines else 1
+
+
+def partition_count(rows, memory_budget=MEMORY_BUDGET):
+    return max(1, math.ceil(rows * PARTITION_ROW_BYTES / memory_budget))
+
+
+def _partition_of(keys, partitions):
+    return (pd.util.hash_array(np.asarray(keys)) % np.uint64(partitions)).astype(np.int64)
+
+
+class Partitions:
+    """Frames spread over ``count`` partitions by the hash of their ``key`` column."""
+
+    def __init__(self, count, directory, name):
+        self.count = count
+        self.paths = [os.path.join(directory, f"{name}-{number}.arrow") for number in range(count)]
+        self.writers = {}
+        self.frames = []
+        self.schema = None
+
+    def add(self, frame):
+        if not len(frame):
+            return
+        if self.count == 1:
+            self.frames.append(frame)
+            return
+        part = _partition_of(frame['key'].to_numpy(), self.count)
+        order = np.argsort(part, kind='stable')
+        bounds = np.searchsorted(part[order], np.arange(self.count + 1))
+        table = pa.Table.from_pandas(frame.iloc[order], schema=self.schema, preserve_index=False)
+        self.schema = table.schema
+        for number in np.flatnonzero(np.diff(bounds)):
+            if number not in self.writers:
+                self.writers[number] = pa.ipc.new_stream(self.paths[number], table.schema)
+            self.writers[number].write_table(table.slice(bounds[number], bounds[number + 1] - bounds[number]))
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+
+    def read(self, number, columns):
+        if self.count == 1:
+            return pd.concat(self.frames, ignore_index=True) if self.frames else pd.DataFrame(columns=columns)
+        if not os.path.exists(self.paths[number]):
+            return pd.DataFrame(columns=columns)
+        with pa.ipc.open_stream(self.paths[number]) as reader:
+            return reader.read_all().to_pandas()
+
+
+def _codes(dictionary, values):
+    # int32 codes with -1 for missing values
+    codes = dictionary.encode(pd.Series(values))
+    return np.asarray(pd.array(codes, dtype='Int32').fillna(-1), dtype=np.int32)
+
+
+def _grow(values, size, fill):
+    if len(values) >= size:
+        return values
+    return np.concatenate([values, np.full(size - len(values), fill, dtype=values.dtype)])
+
+
+def _keys(series):
+    # Join keys without the missing ones; integral floats (IDs read with missing values) go back to int64
+    valid = series.notna().to_numpy()
+    keys = series[valid]
+    if pd.api.types.is_float_dtype(keys.dtype) and (np.mod(keys, 1) == 0).all():
+        keys = keys.astype(np.int64)
+    return valid, keys.to_numpy()
+
+
+@dataclass
+class JoinMetrics:
+    """Per-group join metrics (``groups``, indexed by the group value) and export-wide ``summary`` counts."""
+    groups: pd.DataFrame
+    summary: dict
+    partitions: int = 1
+    stages: list = field(default_factory=list)
+
+
+class _Totals:
+    # bincount accumulators over group slots
+
+    def __init__(self, slots):
+        self.slots = slots
+        self.values = {}
+
+    def add(self, name, slots, weights=None):
+        counts = np.bincount(slots, weights=weights, minlength=self.slots)
+        self.values[name] = self.values.get(name, 0) + counts
+
+    def get(self, name):
+        return self.values.get(name, np.zeros(self.slots))
+
+
+def join_exports(card_file, transaction_file, redemption_file, source_hashes=None, group_column='issuer_bin',
+                 memory_budget=MEMORY_BUDGET, partitions=None, dictionaries=None, batch_rows=BATCH_ROWS,
+                 progress=None):
+    """JoinMetrics of the three exports, grouped by ``group_column`` of the card export.
+
+    ``source_hashes`` maps dataset name to content hash, so Parquet ingest
+    copies are read instead of the CSVs.  ``partitions`` overrides the
+    count derived from ``memory_budget``.
+    """
+    source_hashes = source_hashes or {}
+    dictionaries = dictionaries if dictionaries is not None else SharedDictionaries()
+    cards, groups = dictionaries['card_id'], IdDictionary()
+    timer = StageTimer(progress, JOIN_STAGES)
+
+    card_group = np.empty(0, dtype=np.int32)
+    for batch in export_batches(card_file, 'card', ['card_id', group_column], source_hashes.get('card'),
+                                batch_rows):
+        with timer.span('card index', rows=len(batch)):
+            codes = _codes(cards, batch['card_id'])
+            slots = _codes(groups, batch[group_column]) + FIRST_GROUP
+            slots[slots < FIRST_GROUP] = NO_GROUP
+            card_group = _grow(card_group, len(cards), NOT_ENROLLED)
+            card_group[codes[codes >= 0]] = slots[codes >= 0]
+    enrolled = card_group != NOT_ENROLLED
+    totals = _Totals(len(groups) + FIRST_GROUP)
+
+    def card_slots(card_ids):
+        # A lookup only: cards missing from the card export are not added to the dictionary
+        codes = cards.lookup(card_ids)
+        known = (codes >= 0) & (codes < len(card_group))
+        return codes, np.where(known, card_group[np.where(known, codes, 0)], NOT_ENROLLED)
+
+    if partitions is None:
+        rows = (estimated_rows(transaction_file, source_hashes.get('transaction'))
+                + estimated_rows(redemption_file, source_hashes.get('redemption')))
+        partitions = partition_count(rows, memory_budget)
+    transacted = np.zeros(len(card_group), dtype=bool)
+    orphans = unmatched_keys = 0
+    with tempfile.TemporaryDirectory(prefix='join-') as directory:
+        transaction_parts = Partitions(partitions, directory, 'transaction')
+        redemption_parts = Partitions(partitions, directory, 'redemption')
+        for batch in export_batches(transaction_file, 'transaction',
+                                    ['card_id', 'transaction_id', 'transaction_amount'],
+                                    source_hashes.get('transaction'), batch_rows):
+            with timer.span('partition', rows=len(batch)):
+                codes, slots = card_slots(batch['card_id'])
+                transacted[codes[(codes >= 0) & (codes < len(transacted))]] = True
+                amounts = batch['transaction_amount'].fillna(0).to_numpy(dtype=np.float64)
+                valid, keys = _keys(batch['transaction_id'])
+                # Without a key a transaction cannot have a redemption
+                totals.add('transactions', slots[~valid])
+                totals.add('transaction_amount', slots[~valid], amounts[~valid])
+                totals.add('unredeemed_amount', slots[~valid], amounts[~valid])
+                transaction_parts.add(pd.DataFrame({'key': keys, 'slot': slots[valid], 'amount': amounts[valid]}))
+        for batch in export_batches(redemption_file, 'redemption', ['card_id', 'transaction_id', 'cashback_amount'],
+                                    source_hashes.get('redemption'), batch_rows):
+            with timer.span('partition', rows=len(batch)):
+                _, slots = card_slots(batch['card_id'])
+                totals.add('redemptions', slots)
+                totals.add('cashback', slots, batch['cashback_amount'].fillna(0).to_numpy(dtype=np.float64))
+                valid, keys = _keys(batch['transaction_id'])
+                unmatched_keys += int((~valid).sum())
+                redemption_parts.add(pd.DataFrame({'key': keys}))
+        transaction_parts.close()
+        redemption_parts.close()
+
+        for number in range(partitions):
+            transactions = transaction_parts.read(number, ['key', 'slot', 'amount'])
+            redemption_keys = redemption_parts.read(number, ['key'])['key']
+            with timer.span('join', rows=len(transactions) + len(redemption_keys)):
+                redeemed_index = pd.Index(pd.unique(redemption_keys))
+                redeemed = redeemed_index.get_indexer(transactions['key']) >= 0
+                transaction_index = pd.Index(pd.unique(transactions['key']))
+                orphans += int((transaction_index.get_indexer(redemption_keys) < 0).sum())
+                slots = transactions['slot'].to_numpy(dtype=np.int64)
+                amounts = transactions['amount'].to_numpy(dtype=np.float64)
+                totals.add('transactions', slots)
+                totals.add('transaction_amount', slots, amounts)
+                totals.add('redeemed_transactions', slots[redeemed])
+                totals.add('unredeemed_amount', slots[~redeemed], amounts[~redeemed])
+
+    totals.add('cards', card_group[enrolled])
+    totals.add('active_cards', card_group[enrolled & transacted])
+
+    columns = {name: totals.get(name) for name in GROUP_COLUMNS}
+    table = pd.DataFrame(columns)
+    for name in GROUP_COLUMNS:
+        if name not in ('transaction_amount', 'cashback'):
+            table[name] = table[name].astype(np.int64)
+    labels = [None, np.nan] + list(groups.values)
+    table.index = pd.Index(labels, dtype=object, name=group_column)
+    # Cards without a group are kept only when there are any
+    table = table.iloc[FIRST_GROUP:] if not table.iloc[NO_GROUP].any() else table.iloc[NO_GROUP:]
+
+    transactions = totals.get('transactions')
+    summary = {
+        'cards': int(enrolled.sum()),
+        'cards_never_transacting': int((enrolled & ~transacted).sum()),
+        'transactions': int(transactions.sum()),
+        'transactions_without_redemption': int(transactions.sum() - totals.get('redeemed_transactions').sum()),
+        'amount_without_redemption': float(totals.get('unredeemed_amount').sum()),
+        'transactions_unknown_card': int(transactions[NOT_ENROLLED]),
+        'redemptions': int(totals.get('redemptions').sum()),
+        'redemptions_without_transaction': orphans + unmatched_keys,
+        'redemptions_unknown_card': int(totals.get('redemptions')[NOT_ENROLLED]),
+    }
+    return JoinMetrics(groups=table, summary=summary, partitions=partitions, stages=timer.results())
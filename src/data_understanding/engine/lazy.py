@@ -0,0 +1,172 @@
+"""On-demand profiling for the interactive analyzers: frequency and pair tables are computed when opened."""
+import math
+from collections.abc import Mapping
+
+import pandas as pd
+
+from engine.cross_analysis import KEY_COLUMNS, STAT_COLUMNS, cross_analysis_table, pair_table, pair_tables
+from engine.instrumentation import StageTimer
+from engine.planner import plan_analysis
+from engine.profiler import (ProfileResult, attribute_types, basic_statistics, data_format_table, duplicate_table,
+                             frequency_counts, frequency_table, missing_table, numeric_stats, quantitative_reports)
+from engine.quantile_sketch import DEFAULT_RANK_ERROR
+
+PAGE_SIZE = 100
+
+
+def page(frame, number, page_size=PAGE_SIZE):
+    """Rows of page ``number`` (0-based, clamped) and the page count."""
+    pages = max(1, math.ceil(len(frame) / page_size))
+    number = min(max(number, 0), pages - 1)
+    return frame.iloc[number * page_size:(number + 1) * page_size], pages
+
+
+class FrequencyTables(Mapping):
+    """``summary_reports_qual`` of a LazyProfile: a column's table is built when first looked up."""
+
+    def __init__(self, df, columns, top_k=None, timer=None):
+        self.df = df
+        self.columns = list(columns)
+        self.top_k = top_k
+        self.timer = timer or StageTimer()
+        self._counts = {}
+        self._tables = {}
+
+    def counts(self, col):
+        """The column's ``value_counts`` (or ``TopValues`` with ``top_k``)."""
+        if col not in self._counts:
+            with self.timer.span('qualitative', len(self.df)):
+                self._counts[col] = frequency_counts(self.df[col], self.top_k)
+        return self._counts[col]
+
+    def __getitem__(self, col):
+        if col not in self.columns:
+            raise KeyError(col)
+        if col not in self._tables:
+            counts = self.counts(col)
+            with self.timer.span('describe'):
+                self._tables[col] = frequency_table(counts)
+        return self._tables[col]
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self):
+        return len(self.columns)
+
+    @property
+    def computed(self):
+        return len(self._tables)
+
+
+class LazyProfile:
+    """A frame profiled up front except for its cross-analysis pairs."""
+
+    def __init__(self, df, quantile_method='exact', rank_error=DEFAULT_RANK_ERROR, timer=None, top_k=None,
+                 planned=False):
+        self.df = df
+        self.quantile_method = quantile_method
+        self.rank_error = rank_error
+        self.top_k = top_k
+        self.planned = planned
+        self.timer = timer or StageTimer()
+        self._overview = None
+        self._pairs = {}
+
+    @classmethod
+    def from_csv(cls, file, quantile_method='exact', rank_error=DEFAULT_RANK_ERROR, progress=None, top_k=None,
+                 planned=False):
+        timer = StageTimer(progress)
+        if hasattr(file, 'seek'):
+            file.seek(0)
+        with timer.span('read') as span:
+            df = pd.read_csv(file)
+            span.rows = len(df)
+        return cls(df, quantile_method=quantile_method, rank_error=rank_error, timer=timer, top_k=top_k,
+                   planned=planned)
+
+    def overview(self):
+        """The ProfileResult without cross-analysis; ``analysis_results`` stays empty and
+        ``summary_reports_qual`` is a FrequencyTables."""
+        if self._overview is None:
+            df, timer, row_count = self.df, self.timer, len(self.df)
+            with timer.span('dtype inference', row_count):
+                qualitative_attributes, quantitative_attributes = attribute_types(df)
+            with timer.span('missing', row_count):
+                null_counts = df.isnull().sum()
+            frequencies = FrequencyTables(df, qualitative_attributes, self.top_k, timer)
+            # describe() of a frame without numbers needs the top value of every column
+            counts = {} if quantitative_attributes else {col: frequencies.counts(col)
+                                                         for col in qualitative_attributes}
+            with timer.span('quantitative', row_count):
+                quant_stats = numeric_stats(df[quantitative_attributes])
+            with timer.span('duplicates', row_count):
+                duplicate_count = int(df.duplicated().sum())
+                distinct = {col: df[col].nunique(dropna=False) for col in df.columns}
+            with timer.span('describe', row_count):
+                cross_table = pd.DataFrame(columns=KEY_COLUMNS + STAT_COLUMNS)
+                overview = ProfileResult(
+                    head=df.head(),
+                    data_format=data_format_table(df.dtypes),
+                    missing_info=missing_table(null_counts, row_count),
+                    duplicate_count=duplicate_count,
+                    duplicate_columns=duplicate_table(df.dtypes, {}, null_counts, distinct, row_count),
+                    basic_stats=basic_statistics(quant_stats, quantitative_attributes, counts, null_counts,
+                                                 row_count),
+                    row_count=row_count,
+                    qualitative_attributes=qualitative_attributes,
+                    quantitative_attributes=quantitative_attributes,
+                    summary_reports_qual=frequencies,
+                    summary_reports_quant=quantitative_reports(quant_stats, quantitative_attributes),
+                    analysis_results=pair_tables(cross_table),
+                    cross_table=cross_table,
+                )
+            overview.stages = timer.finish()
+            if self.planned:
+                # Planned but not executed: steps get their actual cost only in analyze_csv
+                with self.timer.span('planning', len(self.df)):
+                    overview.plan = plan_analysis(self.df, overview.qualitative_attributes,
+                                                  overview.quantitative_attributes,
+                                                  quantile_method=self.quantile_method, rank_error=self.rank_error)
+            self._overview = overview
+            # The callback belongs to the run that built the overview
+            self.timer.progress = None
+        return self._overview
+
+    @property
+    def pair_keys(self):
+        """``(qualitative, quantitative)`` of all analyses, in the order ``analyze_csv`` lists them."""
+        overview = self.overview()
+        if overview.plan is not None:
+            return overview.plan.pairs()
+        return [(qual_col, quant_col)
+                for qual_col in overview.qualitative_attributes
+                for quant_col in overview.quantitative_attributes]
+
+    @property
+    def pairs(self):
+        """Names of all analyses, in the order ``analyze_csv`` lists them."""
+        return [f"{quant_col} by {qual_col}" for qual_col, quant_col in self.pair_keys]
+
+    def pair(self, qual_col, quant_col):
+        """The ``"{quant_col} by {qual_col}"`` table, computed on first use."""
+        key = (qual_col, quant_col)
+        if key not in self._pairs:
+            plan = self.overview().plan
+            with self.timer.span('cross-analysis', len(self.df)):
+                if plan is not None:
+                    table = plan.execute_pair(self.df, qual_col, quant_col, quantile_method=self.quantile_method,
+                                              rank_error=self.rank_error)
+                else:
+                    table = cross_analysis_table(self.df, [qual_col], [quant_col],
+                                                 quantile_method=self.quantile_method, rank_error=self.rank_error)
+                self._pairs[key] = pair_table(table, qual_col, quant_col)
+        return self._pairs[key]
+
+    @property
+    def computed_pairs(self):
+        return len(self._pairs)
+
+    @property
+    def stages(self):
+        return self.timer.results()
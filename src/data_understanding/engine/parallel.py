@@ -0,0 +1,202 @@
+"""Process-pool profiling: per-column work spread over worker processes."""
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+import pyarrow as pa
+
+from engine.cross_analysis import KEY_COLUMNS, STAT_COLUMNS, cross_analysis_table
+from engine.instrumentation import StageTimer
+from engine.profiler import assemble_profile, attribute_types, frequency_counts, numeric_stats
+from engine.quantile_sketch import DEFAULT_RANK_ERROR
+
+WORKERS = int(os.environ.get('DATA_UNDERSTANDING_WORKERS', 0)) or os.cpu_count() or 1
+MEMORY_PER_WORKER = int(os.environ.get('DATA_UNDERSTANDING_WORKER_MEMORY', 0)) or None
+SHARED_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+# Rough per-value overhead of a Python str in an object column
+OBJECT_VALUE_BYTES = 56
+# Per-column stages run together inside the worker tiles
+STAGES = ['read', 'dtype inference', 'duplicates', 'worker tiles', 'describe']
+
+
+def _init_worker(path):
+    # Spawned workers need the same import path as the parent to find ``engine``
+    sys.path[:] = path
+
+
+def _load_columns(ipc_path, columns):
+    with pa.memory_map(ipc_path) as source:
+        table = pa.ipc.open_file(source).read_all()
+        return table.select(columns).to_pandas()
+
+
+def profile_columns(df, qualitative_attributes, quantitative_attributes, top_k=None):
+    """Null counts, frequency tables, moments and distinct counts of ``df``'s columns."""
+    qual = [col for col in df.columns if col in qualitative_attributes]
+    quant = [col for col in df.columns if col in quantitative_attributes]
+    return {
+        'null_counts': df.isnull().sum(),
+        'frequencies': {col: frequency_counts(df[col], top_k) for col in qual},
+        'quant_stats': numeric_stats(df[quant]) if quant else None,
+        'distinct': {col: df[col].nunique(dropna=False) for col in df.columns if col not in qual},
+    }
+
+
+def _column_task(ipc_path, columns, qualitative_attributes, quantitative_attributes, top_k):
+    # With top_k only the top values travel back from the worker
+    return profile_columns(_load_columns(ipc_path, columns), qualitative_attributes, quantitative_attributes, top_k)
+
+
+def _cross_task(ipc_path, qual_col, quant_cols, quantile_method, rank_error):
+    df = _load_columns(ipc_path, [qual_col] + quant_cols)
+    return cross_analysis_table(df, [qual_col], quant_cols, quantile_method=quantile_method, rank_error=rank_error)
+
+
+def _estimated_bytes(column):
+    size = column.nbytes
+    if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+        size += len(column) * OBJECT_VALUE_BYTES
+    return size
+
+
+def pack_tiles(sizes, budget):
+    """Split ``sizes`` (name -> bytes) into consecutive groups of at most ``budget`` bytes."""
+    tiles, current, used = [], [], 0
+    for name, size in sizes.items():
+        if current and used + size > budget:
+            tiles.append(current)
+            current, used = [], 0
+        current.append(name)
+        used += size
+    if current:
+        tiles.append(current)
+    return tiles
+
+
+def _arrow_table(df):
+    # Columns Arrow cannot convert stay behind and are profiled in the parent
+    arrays, local = {}, []
+    for col in df.columns:
+        try:
+            arrays[col] = pa.Array.from_pandas(df[col])
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            local.append(col)
+    return pa.table(arrays), local
+
+
+def _order_cross(tables, quant_cols):
+    # Tiles of one qualitative column share its groups; restore the
+    # (group, quantitative) order of a single cross_analysis_table call
+    table = pd.concat(tables, ignore_index=True)
+    group_order = pd.Index(tables[0]['group'].drop_duplicates())
+    order = pd.DataFrame({
+        'group': group_order.get_indexer(table['group']),
+        'quantitative': pd.Index(quant_cols).get_indexer(table['quantitative']),
+    }).sort_values(['group', 'quantitative'], kind='stable').index
+    return table.loc[order].reset_index(drop=True)
+
+
+def profile_dataframe_parallel(df, workers=None, memory_per_worker=None,
+                               quantile_method='exact', rank_error=DEFAULT_RANK_ERROR, timer=None, top_k=None):
+    """Same result as ``profiler.profile_dataframe``, computed in worker processes."""
+    workers = workers or WORKERS
+    memory_per_worker = memory_per_worker or MEMORY_PER_WORKER
+    timer = timer or StageTimer(stages=STAGES)
+    row_count = len(df)
+    with timer.span('dtype inference', row_count):
+        qualitative_attributes, quantitative_attributes = attribute_types(df)
+        table, local = _arrow_table(df)
+
+    sizes = {col: _estimated_bytes(table.column(col)) for col in table.column_names}
+    # Without a memory budget, aim for two tiles per worker
+    budget = memory_per_worker or max(1, sum(sizes.values()) // (2 * workers))
+    column_tiles = pack_tiles(sizes, budget)
+    cross_tiles = []
+    if quantitative_attributes:
+        for qual_col in qualitative_attributes:
+            if qual_col in sizes:
+                room = max(1, budget - sizes[qual_col])
+                for quant_cols in pack_tiles({col: sizes[col] for col in quantitative_attributes}, room):
+                    cross_tiles.append((qual_col, quant_cols))
+
+    workdir = tempfile.mkdtemp(prefix='profile-', dir=SHARED_DIR)
+    try:
+        ipc_path = os.path.join(workdir, 'frame.arrow')
+        with pa.OSFile(ipc_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        del table
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(list(sys.path),)) as pool:
+            column_futures = [pool.submit(_column_task, ipc_path, tile,
+                                          qualitative_attributes, quantitative_attributes, top_k)
+                              for tile in column_tiles]
+            cross_futures = [pool.submit(_cross_task, ipc_path, qual_col, quant_cols, quantile_method, rank_error)
+                             for qual_col, quant_cols in cross_tiles]
+
+            # The parent works on the whole-row and non-Arrow parts meanwhile
+            with timer.span('duplicates', row_count):
+                duplicate_count = int(df.duplicated().sum())
+                parts = [profile_columns(df[local], qualitative_attributes, quantitative_attributes, top_k)
+                         ] if local else []
+
+            with timer.span('worker tiles', row_count):
+                futures = column_futures + cross_futures
+                start = timer.stages.index('worker tiles') if 'worker tiles' in timer.stages else 0
+                for done, _ in enumerate(as_completed(futures), 1):
+                    timer.report((start + done / len(futures)) / len(timer.stages),
+                                 f"Profiled {done} of {len(futures)} tiles...")
+                parts += [future.result() for future in column_futures]
+                cross_parts = [future.result() for future in cross_futures]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    with timer.span('describe', row_count):
+        null_counts = pd.concat([part['null_counts'] for part in parts]).reindex(df.columns)
+        frequencies, distinct = {}, {}
+        for part in parts:
+            frequencies.update(part['frequencies'])
+            distinct.update(part['distinct'])
+        quant_frames = [part['quant_stats'] for part in parts if part['quant_stats'] is not None]
+        if quant_frames:
+            quant_stats = pd.concat(quant_frames).reindex(quantitative_attributes)
+        else:
+            quant_stats = numeric_stats(df[[]])
+
+        # Cross tables in the order of a sequential run: qualitative columns in
+        # frame order, each with its groups and quantitative columns in order
+        by_qual = {}
+        for (qual_col, quant_cols), part in zip(cross_tiles, cross_parts):
+            by_qual.setdefault(qual_col, []).append(part)
+        cross_tables = []
+        for qual_col in qualitative_attributes:
+            if qual_col in by_qual:
+                cross_tables.append(_order_cross(by_qual[qual_col], quantitative_attributes))
+            elif quantitative_attributes:
+                cross_tables.append(cross_analysis_table(df, [qual_col], quantitative_attributes,
+                                                         quantile_method=quantile_method, rank_error=rank_error))
+        if cross_tables:
+            cross_table = pd.concat(cross_tables, ignore_index=True)
+        else:
+            cross_table = pd.DataFrame(columns=KEY_COLUMNS + STAT_COLUMNS)
+
+        result = assemble_profile(df.head(), df.dtypes, row_count, qualitative_attributes, quantitative_attributes,
+                                  null_counts, frequencies, quant_stats, distinct, duplicate_count, cross_table)
+    result.stages = timer.finish()
+    return result
+
+
+def analyze_csv_parallel(file, workers=None, memory_per_worker=None,
+                         quantile_method='exact', rank_error=DEFAULT_RANK_ERROR, progress=None, top_k=None):
+    """``analyze_csv`` with per-column work spread over ``workers`` processes."""
+    timer = StageTimer(progress, stages=STAGES)
+    with timer.span('read') as span:
+        df = pd.read_csv(file)
+        span.rows = len(df)
+    return profile_dataframe_parallel(df, workers=workers, memory_per_worker=memory_per_worker,
+                                      quantile_method=quantile_method, rank_error=rank_error, timer=timer,
+                                      top_k=top_k)
@@ -0,0 +1,207 @@
+"""Planning of the qualitative x quantitative analysis from semantic column types and group counts."""
+import math
+import os
+import re
+import time
+import warnings
+from dataclasses import asdict, dataclass, field, replace
+
+import pandas as pd
+
+from engine.cross_analysis import KEY_COLUMNS, STAT_COLUMNS, cross_analysis_table
+from engine.heavy_hitters import OTHER
+from engine.quantile_sketch import DEFAULT_RANK_ERROR
+
+PLAN_SAMPLE = 10_000
+MAX_GROUPS = int(os.environ.get('DATA_UNDERSTANDING_MAX_GROUPS', 50))
+# Share of distinct values (of non-null rows) from which a column is an identifier
+IDENTIFIER_RATIO = 0.5
+# Fewer distinct values than this are always few enough to group by
+MIN_IDENTIFIER_DISTINCT = 100
+# Estimated seconds one step may take before it is skipped
+MAX_STEP_SECONDS = float(os.environ.get('DATA_UNDERSTANDING_MAX_STEP_SECONDS', 60))
+# Share of sampled values that must match a pattern for a type to apply
+PATTERN_SHARE = 0.95
+UUID = r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}'
+DATE_LIKE = r'\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}.*'
+ID_NAME = re.compile(r'(^|_)(id|bin|code)$', re.IGNORECASE)
+
+
+def estimate_distinct(sample, rows):
+    """GEE estimate of the distinct non-null values among ``rows`` from ``sample``."""
+    counts = sample.value_counts()
+    counts = counts[counts > 0]
+    seen = int(counts.sum())
+    if not seen:
+        return 0
+    if seen >= rows:
+        return len(counts)
+    singletons = int((counts == 1).sum())
+    if singletons == seen:
+        # No value repeats in the sample: treat the column as unique
+        return rows
+    return int(min(rows, round(math.sqrt(rows / seen) * singletons + (counts > 1).sum())))
+
+
+def _parse_timestamps(values):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        return pd.to_datetime(values, errors='coerce')
+
+
+def semantic_type(name, sample, distinct, non_null_rows):
+    """``identifier``, ``timestamp``, ``category`` or ``measure`` for a column."""
+    unique_per_row = distinct >= max(MIN_IDENTIFIER_DISTINCT, IDENTIFIER_RATIO * non_null_rows)
+    if pd.api.types.is_bool_dtype(sample):
+        return 'category'
+    if pd.api.types.is_datetime64_any_dtype(sample):
+        return 'timestamp'
+    if pd.api.types.is_numeric_dtype(sample):
+        if pd.api.types.is_integer_dtype(sample) and ID_NAME.search(str(name)):
+            return 'identifier' if unique_per_row else 'category'
+        return 'measure'
+    values = sample.dropna().astype(str)
+    if len(values):
+        if values.str.fullmatch(UUID).mean() >= PATTERN_SHARE:
+            return 'identifier'
+        if (values.str.fullmatch(DATE_LIKE).mean() >= PATTERN_SHARE
+                and _parse_timestamps(values).notna().mean() >= PATTERN_SHARE):
+            return 'timestamp'
+    return 'identifier' if unique_per_row else 'category'
+
+
+def group_key(series, action, max_groups=MAX_GROUPS):
+    """The grouping key a step uses for ``series``."""
+    if action == 'by day':
+        return _parse_timestamps(series).dt.floor('D')
+    if action == 'top groups':
+        top = series.value_counts().index[:max_groups]
+        return series.where(series.isin(top) | series.isna(), OTHER)
+    return series
+
+
+@dataclass
+class PlanStep:
+    qualitative: str
+    semantic_type: str
+    estimated_groups: int
+    action: str
+    reason: str
+    measures: list = field(default_factory=list)
+    estimated_seconds: float = 0.0
+    actual_seconds: float = None
+    output_rows: int = None
+
+    @property
+    def runs(self):
+        return self.action != 'skip' and bool(self.measures)
+
+
+@dataclass
+class AnalysisPlan:
+    rows: int
+    sample_rows: int
+    columns: pd.DataFrame
+    steps: list = field(default_factory=list)
+    max_groups: int = MAX_GROUPS
+
+    def steps_frame(self):
+        """The plan as a table, estimated next to actual cost."""
+        frame = pd.DataFrame([asdict(step) for step in self.steps],
+                             columns=[name for name in PlanStep.__dataclass_fields__])
+        frame['measures'] = frame['measures'].map(len)
+        return frame.rename(columns=lambda name: name.replace('_', ' ').capitalize())
+
+    def execute(self, df, quantile_method='exact', rank_error=DEFAULT_RANK_ERROR):
+        """The cross table of the steps that run; fills in their actual cost."""
+        tables = []
+        for step in self.steps:
+            if not step.runs:
+                continue
+            started = time.perf_counter()
+            table = _run_step(df, step, self.max_groups, quantile_method, rank_error)
+            step.actual_seconds = time.perf_counter() - started
+            step.output_rows = len(table)
+            tables.append(table)
+        if not tables:
+            return pd.DataFrame(columns=KEY_COLUMNS + STAT_COLUMNS)
+        return pd.concat(tables, ignore_index=True)
+
+    def pairs(self):
+        """``(qualitative, quantitative)`` pairs of the steps that run, in execution order."""
+        return [(step.qualitative, measure) for step in self.steps if step.runs for measure in step.measures]
+
+    def execute_pair(self, df, qual_col, quant_col, quantile_method='exact', rank_error=DEFAULT_RANK_ERROR):
+        """The cross table of one pair, grouped as its step groups it (see ``engine.lazy``)."""
+        step = next(step for step in self.steps if step.qualitative == qual_col)
+        return _run_step(df, replace(step, measures=[quant_col]), self.max_groups, quantile_method, rank_error)
+
+
+def _run_step(df, step, max_groups, quantile_method, rank_error):
+    data = df[step.measures].assign(**{step.qualitative: group_key(df[step.qualitative], step.action, max_groups)})
+    return cross_analysis_table(data, [step.qualitative], step.measures,
+                                quantile_method=quantile_method, rank_error=rank_error)
+
+
+def _estimate_seconds(sample, step, rows, max_groups, quantile_method, rank_error):
+    # Fixed cost plus a per-row slope, from timings on a tenth of the sample and on all of it
+    timings = []
+    for part in (sample.iloc[:max(1, len(sample) // 10)], sample):
+        started = time.perf_counter()
+        _run_step(part, step, max_groups, quantile_method, rank_error)
+        timings.append((len(part), time.perf_counter() - started))
+    (small_rows, small), (sample_rows, full) = timings
+    slope = max(0.0, (full - small) / (sample_rows - small_rows)) if sample_rows > small_rows else 0.0
+    return full + slope * (rows - sample_rows)
+
+
+def _choose_action(sample, col, kind, groups, rows, max_groups):
+    # (action, estimated groups, reason) of the action that keeps the output readable, or None
+    if kind == 'timestamp':
+        days = estimate_distinct(group_key(sample[col], 'by day').dropna(), rows)
+        if days < groups or groups > max_groups:
+            return 'by day', days, f"timestamp: grouped by calendar day (≈{days:,} days)"
+    if groups <= max_groups:
+        return 'full', groups, f"{kind}: ≈{groups:,} groups"
+    if kind == 'category':
+        return ('top groups', max_groups + 1,
+                f"≈{groups:,} groups: the {max_groups} largest are kept, the rest is '{OTHER}'")
+    return None
+
+
+def plan_analysis(df, qualitative_attributes, quantitative_attributes, sample_rows=PLAN_SAMPLE,
+                  max_groups=MAX_GROUPS, quantile_method='exact', rank_error=DEFAULT_RANK_ERROR, seed=0,
+                  max_seconds=MAX_STEP_SECONDS):
+    """An AnalysisPlan for the cross-analysis of ``df``."""
+    rows = len(df)
+    sample = df.sample(n=sample_rows, random_state=seed) if rows > sample_rows else df
+    scale = rows / len(sample) if len(sample) else 1.0
+
+    columns = {}
+    for col in df.columns:
+        non_null = int(sample[col].notna().sum() * scale)
+        distinct = estimate_distinct(sample[col], non_null)
+        columns[col] = {'Data Type': str(df[col].dtype), 'Estimated Distinct': distinct,
+                        'Semantic Type': semantic_type(col, sample[col], distinct, non_null)}
+    columns = pd.DataFrame.from_dict(columns, orient='index')
+    columns.index.name = 'column'
+
+    measures = [col for col in quantitative_attributes if columns.at[col, 'Semantic Type'] == 'measure']
+    plan = AnalysisPlan(rows=rows, sample_rows=len(sample), columns=columns, max_groups=max_groups)
+    for col in qualitative_attributes:
+        kind, groups = columns.at[col, 'Semantic Type'], int(columns.at[col, 'Estimated Distinct'])
+        reason = f"{kind}: a group per value (≈{groups:,} groups)" if measures else "no measures to analyze"
+        step = PlanStep(qualitative=col, semantic_type=kind, estimated_groups=groups, action='skip',
+                        reason=reason, measures=measures)
+        chosen = _choose_action(sample, col, kind, groups, rows, max_groups) if measures else None
+        if chosen is not None:
+            action, action_groups, reason = chosen
+            step = PlanStep(qualitative=col, semantic_type=kind, estimated_groups=action_groups,
+                            action=action, reason=reason, measures=measures)
+            step.estimated_seconds = _estimate_seconds(sample, step, rows, max_groups, quantile_method, rank_error)
+            if step.estimated_seconds > max_seconds:
+                step = replace(step, action='skip',
+                               reason=f"{action} would take ≈{step.estimated_seconds:.2g}s, "
+                                      f"over the {max_seconds:g}s limit")
+        plan.steps.append(step)
+    return plan
@@ -0,0 +1,314 @@
+import warnings
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from engine.cross_analysis import KEY_COLUMNS, QUANTILES, STAT_COLUMNS, cross_analysis_table, pair_tables
+from engine.heavy_hitters import TopValues, top_values
+from engine.instrumentation import StageTimer
+from engine.planner import plan_analysis
+from engine.quantile_sketch import DEFAULT_RANK_ERROR
+
+PREVIEW_ROWS = 10_000
+
+
+@dataclass
+class ProfileResult:
+    """Everything the CSV analyzers render for one uploaded file."""
+    head: pd.DataFrame
+    data_format: pd.DataFrame
+    missing_info: pd.DataFrame
+    duplicate_count: int
+    duplicate_columns: pd.DataFrame
+    basic_stats: pd.DataFrame
+    row_count: int
+    qualitative_attributes: list
+    quantitative_attributes: list
+    summary_reports_qual: dict = field(default_factory=dict)
+    summary_reports_quant: dict = field(default_factory=dict)
+    analysis_results: dict = field(default_factory=dict)
+    cross_table: pd.DataFrame = None
+    stages: list = field(default_factory=list)
+    plan: object = None
+
+
+def analyze_csv(file, quantile_method='exact', rank_error=DEFAULT_RANK_ERROR, progress=None, top_k=None,
+                planned=False):
+    timer = StageTimer(progress)
+    # Read the CSV file (path or file-like object)
+    with timer.span('read') as span:
+        df = pd.read_csv(file)
+        span.rows = len(df)
+    return profile_dataframe(df, quantile_method=quantile_method, rank_error=rank_error, timer=timer,
+                             top_k=top_k, planned=planned)
+
+
+def analyze_csv_incremental(file, quantile_method='exact', rank_error=DEFAULT_RANK_ERROR, progress=None,
+                            top_k=None, planned=False, preview_rows=PREVIEW_ROWS):
+    """``analyze_csv`` as a generator of ever more complete ProfileResults.
+
+    The first result is a preview of the first ``preview_rows`` rows (head,
+    data types and missing values; ``row_count`` is None); then one result
+    per stage of ``iter_profile``.  The last one equals ``analyze_csv``'s.
+    """
+    timer = StageTimer(progress)
+    with timer.span('read') as span:
+        if hasattr(file, 'seek'):
+            file.seek(0)
+        preview = pd.read_csv(file, nrows=preview_rows)
+        yield ProfileResult(head=preview.head(), data_format=data_format_table(preview.dtypes),
+                            missing_info=missing_table(preview.isnull().sum(), len(preview)),
+                            duplicate_count=None, duplicate_columns=None, basic_stats=None, row_count=None,
+                            qualitative_attributes=None, quantitative_attributes=None,
+                            summary_reports_qual=None, summary_reports_quant=None, analysis_results=None)
+        if hasattr(file, 'seek'):
+            file.seek(0)
+        df = pd.read_csv(file)
+        span.rows = len(df)
+    yield from iter_profile(df, quantile_method=quantile_method, rank_error=rank_error, timer=timer,
+                            top_k=top_k, planned=planned)
+
+
+def profile_dataframe(df, quantile_method='exact', rank_error=DEFAULT_RANK_ERROR, timer=None,
+                      cross_analysis=True, top_k=None, planned=False):
+    """Profile an in-memory frame.
+
+    ``quantile_method='sketch'`` estimates the per-group quartiles of the
+    cross-analysis with a t-digest whose rank error is ``rank_error``.
+    Each stage runs inside a span of ``timer`` (an ``instrumentation.StageTimer``).
+    With ``cross_analysis=False`` the cross table is left empty (see ``engine.lazy``).
+    With ``top_k`` the qualitative summaries keep only the ``top_k`` most
+    frequent values and an "other" bucket (see ``engine.heavy_hitters``).
+    With ``planned=True`` the cross-analysis follows an ``engine.planner``
+    plan, which skips identifier keys and measures and caps the number of
+    groups; the plan, with its estimated and actual costs, is ``result.plan``.
+    """
+    for result in iter_profile(df, quantile_method=quantile_method, rank_error=rank_error, timer=timer,
+                               cross_analysis=cross_analysis, top_k=top_k, planned=planned):
+        pass
+    return result
+
+
+def iter_profile(df, quantile_method='exact', rank_error=DEFAULT_RANK_ERROR, timer=None,
+                 cross_analysis=True, top_k=None, planned=False):
+    """``profile_dataframe`` one stage at a time.
+
+    Yields the same ProfileResult after every stage, with the sections not
+    computed yet left as None; the last yield is the complete result.
+    """
+    timer = timer or StageTimer()
+    row_count = len(df)
+    with timer.span('dtype inference', row_count):
+        qualitative_attributes, quantitative_attributes = attribute_types(df)
+    result = ProfileResult(head=df.head(), data_format=data_format_table(df.dtypes), missing_info=None,
+                           duplicate_count=None, duplicate_columns=None, basic_stats=None, row_count=row_count,
+                           qualitative_attributes=qualitative_attributes,
+                           quantitative_attributes=quantitative_attributes,
+                           summary_reports_qual=None, summary_reports_quant=None, analysis_results=None)
+
+    # Missing values, one null scan for the whole frame
+    with timer.span('missing', row_count):
+        null_counts = df.isnull().sum()
+    with timer.span('describe'):
+        result.missing_info = missing_table(null_counts, row_count)
+    yield result
+
+    # Frequency tables, one value_counts per qualitative column
+    with timer.span('qualitative', row_count):
+        frequencies = {col: frequency_counts(df[col], top_k) for col in qualitative_attributes}
+    with timer.span('describe'):
+        result.summary_reports_qual = {col: frequency_table(frequencies[col]) for col in qualitative_attributes}
+    yield result
+
+    # Moments, min/max and quantiles for every quantitative column at once
+    with timer.span('quantitative', row_count):
+        quant_stats = numeric_stats(df[quantitative_attributes])
+    with timer.span('describe'):
+        result.summary_reports_quant = quantitative_reports(quant_stats, quantitative_attributes)
+        result.basic_stats = basic_statistics(quant_stats, quantitative_attributes, frequencies, null_counts,
+                                              row_count)
+    yield result
+
+    # Duplicate understanding; distinct counts of qualitative columns come
+    # straight from their frequency tables
+    with timer.span('duplicates', row_count):
+        result.duplicate_count = int(df.duplicated().sum())
+        distinct = {col: df[col].nunique(dropna=False) for col in df.columns if col not in frequencies}
+    with timer.span('describe'):
+        result.duplicate_columns = duplicate_table(df.dtypes, frequencies, null_counts, distinct, row_count)
+    yield result
+
+    if cross_analysis and planned:
+        with timer.span('planning', row_count):
+            result.plan = plan_analysis(df, qualitative_attributes, quantitative_attributes,
+                                        quantile_method=quantile_method, rank_error=rank_error)
+        with timer.span('cross-analysis', row_count):
+            cross_table = result.plan.execute(df, quantile_method=quantile_method, rank_error=rank_error)
+    elif cross_analysis:
+        with timer.span('cross-analysis', row_count):
+            cross_table = cross_analysis_table(df, qualitative_attributes, quantitative_attributes,
+                                               quantile_method=quantile_method, rank_error=rank_error)
+    else:
+        cross_table = pd.DataFrame(columns=KEY_COLUMNS + STAT_COLUMNS)
+
+    with timer.span('describe', row_count):
+        result.cross_table = cross_table
+        result.analysis_results = pair_tables(cross_table)
+    result.stages = timer.finish()
+    yield result
+
+
+def attribute_types(df):
+    # Identification of qualitative and quantitative attributes
+    qualitative_attributes = df.select_dtypes(include=['object', 'category']).columns.tolist()
+    quantitative_attributes = df.select_dtypes(include=['number']).columns.tolist()
+    return qualitative_attributes, quantitative_attributes
+
+
+def assemble_profile(head, dtypes, row_count, qualitative_attributes, quantitative_attributes,
+                     null_counts, frequencies, quant_stats, distinct, duplicate_count, cross_table):
+    """Build the ProfileResult from per-column pieces.
+
+    ``distinct`` holds the distinct count (NaN included) of every column
+    that has no frequency table; ``quant_stats`` is a ``numeric_stats`` frame.
+    A frequency table is a ``value_counts`` Series or a ``TopValues``.
+    """
+    summary_reports_qual = {col: frequency_table(frequencies[col]) for col in qualitative_attributes}
+    return ProfileResult(
+        head=head,
+        data_format=data_format_table(dtypes),
+        missing_info=missing_table(null_counts, row_count),
+        duplicate_count=duplicate_count,
+        duplicate_columns=duplicate_table(dtypes, frequencies, null_counts, distinct, row_count),
+        basic_stats=basic_statistics(quant_stats, quantitative_attributes, frequencies, null_counts, row_count),
+        row_count=row_count,
+        qualitative_attributes=qualitative_attributes,
+        quantitative_attributes=quantitative_attributes,
+        summary_reports_qual=summary_reports_qual,
+        summary_reports_quant=quantitative_reports(quant_stats, quantitative_attributes),
+        analysis_results=pair_tables(cross_table),
+        cross_table=cross_table,
+    )
+
+
+def data_format_table(dtypes):
+    return pd.DataFrame(dtypes, columns=['Data Type'])
+
+
+def missing_table(null_counts, row_count):
+    return pd.concat([
+        null_counts.to_frame('Missing Values'),
+        (null_counts / row_count * 100).to_frame('Percentage Missing'),
+    ], axis=1)
+
+
+def quantitative_reports(quant_stats, quantitative_attributes):
+    return {col: quant_stats.loc[[col], STAT_COLUMNS + ['Variance', 'Standard Deviation', 'Skewness']]
+            for col in quantitative_attributes}
+
+
+def basic_statistics(quant_stats, quantitative_attributes, frequencies, null_counts, row_count):
+    if quantitative_attributes:
+        return quant_stats[STAT_COLUMNS].T
+    return qualitative_describe(frequencies, null_counts, row_count)
+
+
+def duplicate_table(dtypes, frequencies, null_counts, distinct, row_count):
+    # Rows minus distinct values (NaN included) per column; an estimated distinct count may exceed the rows
+    distinct = {
+        col: distinct_values(frequencies[col]) + int(null_counts[col] > 0) if col in frequencies else distinct[col]
+        for col in dtypes.index
+    }
+    return (row_count - pd.Series(distinct, dtype='int64')).clip(lower=0).to_frame('Duplicate Count')
+
+
+def frequency_counts(values, top_k=None):
+    # The full value_counts, or only its top_k values
+    return values.value_counts() if top_k is None else top_values(values, top_k)
+
+
+def distinct_values(counts):
+    return counts.distinct if isinstance(counts, TopValues) else len(counts)
+
+
+def frequency_table(counts):
+    # Percentages are relative to non-null values, like value_counts(normalize=True)
+    if isinstance(counts, TopValues):
+        return counts.table()
+    total = counts.sum()
+    percentages = counts / total * 100 if total else counts.astype('float64')
+    return pd.concat([counts.to_frame('Frequency'), percentages.to_frame('Percentage')], axis=1)
+
+
+def numeric_stats(num_df):
+    """Per-column describe() plus variance, std and (biased) skewness.
+
+    The numeric block is materialised once as a float matrix and every
+    statistic is a column-wise reduction over it.
+    """
+    columns = num_df.columns
+    values = num_df.to_numpy(dtype='float64', na_value=np.nan)
+    mask = ~np.isnan(values)
+    count = mask.sum(axis=0)
+    filled = np.where(mask, values, 0.0)
+
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean = filled.sum(axis=0) / count
+        centered = np.where(mask, values - mean, 0.0)
+        m2 = (centered ** 2).sum(axis=0) / count
+        m3 = (centered ** 3).sum(axis=0) / count
+        minimum = np.nanmin(values, axis=0) if values.size else np.full(len(columns), np.nan)
+        maximum = np.nanmax(values, axis=0) if values.size else np.full(len(columns), np.nan)
+        if values.size:
+            quantiles = np.nanquantile(values, QUANTILES, axis=0)
+        else:
+            quantiles = np.full((len(QUANTILES), len(columns)), np.nan)
+
+    return moments_frame(columns, count, mean, m2, m3, minimum, maximum, quantiles)
+
+
+def moments_frame(columns, count, mean, m2, m3, minimum, maximum, quantiles):
+    """Assemble the quantitative summary from per-column arrays.
+
+    ``m2`` and ``m3`` are the biased central moments (sums divided by n);
+    ``quantiles`` holds one row per entry of QUANTILES.
+    """
+    count = np.asarray(count, dtype='float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = np.where(count > 1, m2 * count / (count - 1), np.nan)
+        # Same convention as scipy.stats.skew: NaN for constant columns
+        constant = m2 <= (np.finfo(np.float64).resolution * mean) ** 2
+        skewness = np.where(constant, np.nan, m3 / m2 ** 1.5)
+        std = np.sqrt(variance)
+
+    return pd.DataFrame({
+        'count': count,
+        'mean': mean,
+        'std': std,
+        'min': minimum,
+        '25%': quantiles[0],
+        '50%': quantiles[1],
+        '75%': quantiles[2],
+        'max': maximum,
+        'Variance': variance,
+        'Standard Deviation': std,
+        'Skewness': skewness,
+    }, index=columns)
+
+
+def qualitative_describe(frequencies, null_counts, row_count):
+    # describe() falls back to count/unique/top/freq when nothing is numeric
+    stats = {}
+    for col, counts in frequencies.items():
+        unique = distinct_values(counts)
+        if isinstance(counts, TopValues):
+            counts = counts.counts
+        stats[col] = {
+            'count': row_count - null_counts[col],
+            'unique': unique,
+            'top': counts.index[0] if len(counts) else np.nan,
+            'freq': counts.iloc[0] if len(counts) else np.nan,
+        }
+    return pd.DataFrame(stats, index=['count', 'unique', 'top', 'freq'], dtype=object)
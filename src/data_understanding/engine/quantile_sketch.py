@@ -0,0 +1,159 @@
+"""Mergeable per-group quantile sketches (a vectorized merging t-digest)."""
+import numpy as np
+import pandas as pd
+
+DEFAULT_RANK_ERROR = 0.01
+
+
+class GroupQuantileSketch:
+    """Quantile sketches for one numeric column split by a grouping key."""
+
+    def __init__(self, rank_error=DEFAULT_RANK_ERROR):
+        if not 0 < rank_error < 1:
+            raise ValueError("rank_error must be between 0 and 1")
+        self.rank_error = rank_error
+        self.compression = int(np.ceil(np.pi / rank_error))
+        self.labels = pd.Index([])
+        self.group = np.empty(0, dtype='int64')
+        self.mean = np.empty(0, dtype='float64')
+        self.weight = np.empty(0, dtype='float64')
+        self.min = np.empty(0, dtype='float64')
+        self.max = np.empty(0, dtype='float64')
+
+    @classmethod
+    def from_values(cls, keys, values, rank_error=DEFAULT_RANK_ERROR):
+        """Build a sketch from aligned key and value arrays (NaNs are skipped)."""
+        codes, labels = pd.factorize(pd.Series(keys), sort=True)
+        return cls.from_codes(codes, labels, values, rank_error)
+
+    @classmethod
+    def from_codes(cls, codes, labels, values, rank_error=DEFAULT_RANK_ERROR):
+        """Build a sketch from an already factorized key (code -1 means missing)."""
+        sketch = cls(rank_error)
+        codes = np.asarray(codes, dtype='int64')
+        values = pd.Series(values).to_numpy(dtype='float64', na_value=np.nan)
+        valid = (codes >= 0) & ~np.isnan(values)
+        sketch._load(labels, codes[valid], values[valid], np.ones(int(valid.sum())))
+        return sketch
+
+    def merge(self, other):
+        """Fold another sketch into this one and return self."""
+        if other.rank_error < self.rank_error:
+            self.rank_error, self.compression = other.rank_error, other.compression
+        labels = self.labels.append(other.labels)
+        codes, union = pd.factorize(labels, sort=True)
+        remap_self, remap_other = codes[:len(self.labels)], codes[len(self.labels):]
+        minimum = np.full(len(union), np.nan)
+        maximum = np.full(len(union), np.nan)
+        for remap, sketch in ((remap_self, self), (remap_other, other)):
+            np.fmin.at(minimum, remap, sketch.min)
+            np.fmax.at(maximum, remap, sketch.max)
+        self._load(union,
+                   np.concatenate([remap_self[self.group], remap_other[other.group]]),
+                   np.concatenate([self.mean, other.mean]),
+                   np.concatenate([self.weight, other.weight]),
+                   minimum, maximum)
+        return self
+
+    def _load(self, labels, group, mean, weight, minimum=None, maximum=None):
+        # Sort centroids by (group, mean), then re-bucket them with the k1 scale
+        order = np.lexsort((mean, group))
+        group, mean, weight = group[order], mean[order], weight[order]
+        n_groups = len(labels)
+
+        totals = np.bincount(group, weights=weight, minlength=n_groups)
+        cumulative = np.cumsum(weight)
+        group_start = np.concatenate([[0.0], np.cumsum(totals)[:-1]])
+        before = cumulative - weight - group_start[group]
+        q = (before + weight / 2) / totals[group]
+        k = self.compression / (2 * np.pi) * (np.arcsin(2 * q - 1) + np.pi / 2)
+        bucket = np.floor(k).astype('int64')
+
+        # Singletons stay exact; only neighbours in the same k-bucket combine
+        new = np.ones(len(group), dtype=bool)
+        new[1:] = (group[1:] != group[:-1]) | (bucket[1:] != bucket[:-1])
+        ids = np.cumsum(new) - 1
+        merged_weight = np.bincount(ids, weights=weight)
+        merged_mean = np.bincount(ids, weights=mean * weight) / merged_weight
+
+        self.labels = pd.Index(labels)
+        self.group = group[new]
+        self.weight = merged_weight
+        self.mean = merged_mean
+        if minimum is not None:
+            self.min, self.max = minimum, maximum
+            return
+        # Without explicit extremes the input is raw values, whose ends are exact
+        self.min = np.full(n_groups, np.nan)
+        self.max = np.full(n_groups, np.nan)
+        if len(group):
+            first = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+            last = np.r_[first[1:] - 1, len(group) - 1]
+            self.min[group[first]] = mean[first]
+            self.max[group[last]] = mean[last]
+
+    def count(self):
+        return np.bincount(self.group, weights=self.weight, minlength=len(self.labels))
+
+    def quantiles(self, qs=(0.25, 0.5, 0.75)):
+        """Estimated quantiles as a frame indexed by group label, one column per q.
+
+        Positions follow pandas' linear interpolation (rank ``q * (n - 1)``).
+        """
+        n_groups = len(self.labels)
+        totals = self.count()
+        result = pd.DataFrame(index=self.labels, columns=list(qs), dtype='float64')
+        if not len(self.group):
+            return result
+
+        # Knots: min at rank 0, every centroid at its centre rank, max at n - 1
+        cumulative = np.cumsum(self.weight)
+        group_start = np.concatenate([[0.0], np.cumsum(totals)[:-1]])
+        centre = cumulative - self.weight - group_start[self.group] + (self.weight - 1) / 2
+        present = np.flatnonzero(totals > 0)
+        knot_group = np.concatenate([present, self.group, present])
+        knot_rank = np.concatenate([np.zeros(len(present)), centre, totals[present] - 1])
+        knot_value = np.concatenate([self.min[present], self.mean, self.max[present]])
+        order = np.lexsort((knot_rank, knot_group))
+        knot_group, knot_rank, knot_value = knot_group[order], knot_rank[order], knot_value[order]
+
+        # Lay groups end to end on one axis so a single searchsorted finds every interval
+        offset = np.concatenate([[0.0], np.cumsum(totals + 1)[:-1]])
+        axis = offset[knot_group] + knot_rank
+        for q in qs:
+            target = offset[present] + q * (totals[present] - 1)
+            right = np.clip(np.searchsorted(axis, target, side='left'), 0, len(axis) - 1)
+            left = np.clip(np.searchsorted(axis, target, side='right') - 1, 0, len(axis) - 1)
+            span = axis[right] - axis[left]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                fraction = np.where(span > 0, (target - axis[left]) / span, 0.0)
+            estimate = knot_value[left] + (knot_value[right] - knot_value[left]) * fraction
+            column = np.full(n_groups, np.nan)
+            column[present] = estimate
+            result[q] = column
+        return result
+
+    def to_frame(self):
+        """Centroids as a flat table, e.g. for writing to Parquet."""
+        return pd.DataFrame({
+            'group': self.labels.take(self.group) if len(self.group) else pd.Index([]),
+            'mean': self.mean,
+            'weight': self.weight,
+            'group_min': self.min[self.group],
+            'group_max': self.max[self.group],
+            'rank_error': self.rank_error,
+        })
+
+    @classmethod
+    def from_frame(cls, frame):
+        rank_error = float(frame['rank_error'].iloc[0]) if len(frame) else DEFAULT_RANK_ERROR
+        sketch = cls(rank_error)
+        codes, labels = pd.factorize(frame['group'], sort=True)
+        codes = codes.astype('int64')
+        minimum = np.full(len(labels), np.nan)
+        maximum = np.full(len(labels), np.nan)
+        minimum[codes] = frame['group_min'].to_numpy(dtype='float64')
+        maximum[codes] = frame['group_max'].to_numpy(dtype='float64')
+        sketch._load(labels, codes, frame['mean'].to_numpy(dtype='float64'),
+                     frame['weight'].to_numpy(dtype='float64'), minimum, maximum)
+        return sketch
@@ -0,0 +1,270 @@
+"""Sample-based first look at a CSV, with confidence intervals."""
+import io
+import math
+import os
+from dataclasses import dataclass, field
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from engine.profiler import analyze_csv, attribute_types
+from engine.quantile_sketch import DEFAULT_RANK_ERROR
+
+SAMPLE_SIZES = (10_000, 100_000)
+SAMPLE_BLOCKS = 200
+CONFIDENCE = 0.95
+TOP_VALUES = 10
+BLOCK_COLUMN = '__block__'
+WEIGHT_COLUMN = '__weight__'
+# Bytes read at a time when seeking back to the start of a line
+SEEK_WINDOW = 64 * 1024
+
+
+def _open(file):
+    if isinstance(file, (str, os.PathLike)):
+        return open(file, 'rb'), os.path.getsize(file)
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(0)
+    return file, size
+
+
+def _line_start(handle, offset, floor):
+    # Just after the last newline before ``offset``; ``floor`` is the start of the first data line
+    end = offset
+    while end > floor:
+        start = max(floor, end - SEEK_WINDOW)
+        handle.seek(start)
+        newline = handle.read(end - start).rfind(b'\n')
+        if newline >= 0:
+            return start + newline + 1
+        end = start
+    return floor
+
+
+def block_sample(file, rows, blocks=SAMPLE_BLOCKS, seed=0):
+    """``(sample, estimated_rows, exact)``; ``sample`` has a block id and a block weight column.
+
+    Reads the whole file when it is not much larger than the sample would be.
+    """
+    handle, size = _open(file)
+    try:
+        header = handle.readline()
+        per_block = max(1, math.ceil(rows / blocks))
+        body = size - len(header)
+
+        # Read a first block to learn the bytes per row; small files are read whole
+        first = [handle.readline() for _ in range(per_block)]
+        first = [line for line in first if line]
+        row_bytes = sum(map(len, first)) / max(len(first), 1)
+        if not first or body <= 2 * rows * row_bytes:
+            handle.seek(0)
+            sample = pd.read_csv(handle)
+            sample[BLOCK_COLUMN] = np.arange(len(sample))
+            return sample, len(sample), True
+
+        rng = np.random.default_rng(seed)
+        offsets = np.sort(rng.integers(len(header), size, blocks))
+        lines, block_ids, weights, position = [], [], [], 0
+        for block, offset in enumerate(offsets):
+            if offset < position:
+                continue
+            # The offset fell in the skipped line, so the block's chance is that line's length
+            start = _line_start(handle, offset, len(header))
+            handle.seek(offset)
+            skipped = offset - start + len(handle.readline())
+            for _ in range(per_block):
+                line = handle.readline()
+                if not line:
+                    break
+                lines.append(line if line.endswith(b'\n') else line + b'\n')
+                block_ids.append(block)
+                weights.append(1 / skipped)
+            position = handle.tell()
+    finally:
+        # Uploads are left rewound for the exact profile
+        if handle is file:
+            file.seek(0)
+        else:
+            handle.close()
+
+    weights = np.asarray(weights)
+    sample = pd.read_csv(io.BytesIO(header + b''.join(lines)), on_bad_lines='skip')
+    if len(sample) == len(block_ids):
+        sample[BLOCK_COLUMN] = block_ids
+        sample[WEIGHT_COLUMN] = weights
+    else:
+        # A broken line was skipped; fall back to one unweighted block per row
+        sample[BLOCK_COLUMN] = np.arange(len(sample))
+        sample[WEIGHT_COLUMN] = 1.0
+    sampled_bytes = (weights * [len(line) for line in lines]).sum()
+    estimated_rows = int(round(body * weights.sum() / sampled_bytes)) if lines else 0
+    return sample, max(estimated_rows, len(sample)), False
+
+
+def reservoir_sample(file, rows, chunksize=100_000, seed=0):
+    """``(sample, row_count, exact)`` from one chunked pass over the file."""
+    rng = np.random.default_rng(seed)
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    kept, keys, row_count = None, None, 0
+    for chunk in pd.read_csv(file, chunksize=chunksize):
+        row_count += len(chunk)
+        chunk_keys = rng.random(len(chunk))
+        if kept is None:
+            kept, keys = chunk, chunk_keys
+        else:
+            kept = pd.concat([kept, chunk], ignore_index=True)
+            keys = np.concatenate([keys, chunk_keys])
+        if len(kept) > rows:
+            smallest = np.argpartition(keys, rows)[:rows]
+            kept, keys = kept.iloc[smallest].reset_index(drop=True), keys[smallest]
+    if kept is None:
+        raise ValueError("The CSV file has no rows to sample")
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    sample = kept.iloc[np.argsort(keys, kind='stable')].reset_index(drop=True)
+    sample[BLOCK_COLUMN] = np.arange(len(sample))
+    return sample, row_count, len(sample) == row_count
+
+
+def ratio_interval(totals, counts, sample_fraction=0.0, confidence=CONFIDENCE, weights=None):
+    """Ratio estimates ``sum(totals) / sum(counts)`` with confidence bounds.
+
+    ``totals`` and ``counts`` are (blocks x estimates) arrays of per-block sums;
+    ``weights`` (one per block) scales both.
+    """
+    totals = np.asarray(totals, dtype='float64')
+    counts = np.asarray(counts, dtype='float64')
+    if weights is not None:
+        weights = np.asarray(weights, dtype='float64')[:, None] / np.mean(weights)
+        totals, counts = totals * weights, counts * weights
+    blocks = len(totals)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = totals.sum(axis=0) / counts.sum(axis=0)
+        if blocks > 1:
+            residuals = totals - ratio * counts
+            variance = (residuals ** 2).sum(axis=0) / (blocks * (blocks - 1)) / counts.mean(axis=0) ** 2
+        else:
+            variance = np.full(ratio.shape, np.inf)
+    margin = z * np.sqrt(variance * max(0.0, 1 - sample_fraction))
+    return ratio, ratio - margin, ratio + margin
+
+
+def _proportion_bounds(ratio, low, high, counts, sample_fraction=0.0, confidence=CONFIDENCE):
+    # Zero-width intervals at 0 or 1 get the rule-of-three bound instead, unless nothing was left out
+    n = np.asarray(counts, dtype='float64').sum(axis=0)
+    with np.errstate(divide='ignore'):
+        edge = np.minimum(1.0, -np.log(1 - confidence) / n) if sample_fraction < 1 else np.zeros_like(n)
+    low = np.where(ratio >= 1, 1 - edge, np.clip(low, 0, 1))
+    high = np.where(ratio <= 0, edge, np.clip(high, 0, 1))
+    return low, high
+
+
+@dataclass
+class SampleEstimate:
+    """Estimates from a sample; every interval is at ``confidence``."""
+    method: str
+    sample_rows: int
+    blocks: int
+    row_count: int
+    row_count_exact: bool
+    confidence: float
+    head: pd.DataFrame
+    data_format: pd.DataFrame
+    missing: pd.DataFrame
+    means: pd.DataFrame
+    frequencies: dict = field(default_factory=dict)
+    qualitative_attributes: list = field(default_factory=list)
+    quantitative_attributes: list = field(default_factory=list)
+
+    @property
+    def exact(self):
+        # The "sample" was the whole file
+        return self.row_count_exact and self.sample_rows == self.row_count
+
+
+def estimate(sample, row_count, row_count_exact=False, method='block', confidence=CONFIDENCE,
+             top_values=TOP_VALUES):
+    """SampleEstimate of ``sample`` (with its block id and weight columns) for a file of ``row_count`` rows."""
+    blocks = sample[BLOCK_COLUMN]
+    data = sample.drop(columns=[BLOCK_COLUMN, WEIGHT_COLUMN], errors='ignore')
+    block_count = blocks.nunique()
+    if WEIGHT_COLUMN in sample:
+        weights = sample[WEIGHT_COLUMN].groupby(blocks).first().to_numpy()
+    else:
+        weights = None
+    fraction = len(data) / row_count if row_count else 1.0
+    qualitative_attributes, quantitative_attributes = attribute_types(data)
+
+    # Missing rates: nulls per block over rows per block
+    nulls = data.isnull().groupby(blocks).sum()
+    rows = pd.DataFrame({col: blocks.value_counts().sort_index() for col in data.columns})
+    rate, low, high = ratio_interval(nulls.to_numpy(), rows.to_numpy(), fraction, confidence, weights)
+    low, high = _proportion_bounds(rate, low, high, rows.to_numpy(), fraction, confidence)
+    missing = pd.DataFrame({'Percentage Missing': rate * 100, 'Low': low * 100, 'High': high * 100},
+                           index=data.columns)
+
+    # Means: sum of non-null values per block over non-null count per block
+    values = data[quantitative_attributes].astype('float64')
+    present = values.notna()
+    sums = values.fillna(0).groupby(blocks).sum()
+    counts = present.groupby(blocks).sum()
+    mean, low, high = ratio_interval(sums.to_numpy(), counts.to_numpy(), fraction, confidence, weights)
+    means = pd.DataFrame({'mean': mean, 'Low': low, 'High': high}, index=quantitative_attributes)
+
+    # Percentages of the most frequent values among non-null values
+    frequencies = {}
+    for col in qualitative_attributes:
+        top = data[col].value_counts().index[:top_values]
+        if not len(top):
+            continue
+        hits = pd.DataFrame({value: data[col] == value for value in top}).groupby(blocks).sum()
+        non_null = data[col].notna().groupby(blocks).sum().to_numpy()[:, None].repeat(len(top), axis=1)
+        share, low, high = ratio_interval(hits.to_numpy(), non_null, fraction, confidence, weights)
+        low, high = _proportion_bounds(share, low, high, non_null, fraction, confidence)
+        table = pd.DataFrame({'Percentage': share * 100, 'Low': low * 100, 'High': high * 100}, index=top)
+        table.index.name = col
+        frequencies[col] = table
+
+    return SampleEstimate(
+        method=method,
+        sample_rows=len(data),
+        blocks=int(block_count),
+        row_count=int(row_count),
+        row_count_exact=row_count_exact,
+        confidence=confidence,
+        head=data.head(),
+        data_format=pd.DataFrame(data.dtypes, columns=['Data Type']),
+        missing=missing,
+        means=means,
+        frequencies=frequencies,
+        qualitative_attributes=qualitative_attributes,
+        quantitative_attributes=quantitative_attributes,
+    )
+
+
+def progressive_estimates(file, sample_sizes=SAMPLE_SIZES, method='block', blocks=SAMPLE_BLOCKS,
+                          confidence=CONFIDENCE, seed=0):
+    """SampleEstimates for each of ``sample_sizes``; stops early once a sample is the whole file."""
+    if method not in ('block', 'reservoir'):
+        raise ValueError(f"Unknown sampling method '{method}', expected 'block' or 'reservoir'")
+    for rows in sample_sizes:
+        if method == 'block':
+            sample, row_count, exact = block_sample(file, rows, blocks=blocks, seed=seed)
+        else:
+            sample, row_count, exact = reservoir_sample(file, rows, seed=seed)
+        result = estimate(sample, row_count, row_count_exact=exact, method=method, confidence=confidence)
+        yield result
+        if result.exact:
+            return
+
+
+def analyze_csv_progressive(file, sample_sizes=SAMPLE_SIZES, method='block', quantile_method='exact',
+                            rank_error=DEFAULT_RANK_ERROR, progress=None):
+    """Yield SampleEstimates for growing samples, then the exact ProfileResult."""
+    for result in progressive_estimates(file, sample_sizes, method):
+        yield result
+    yield analyze_csv(file, quantile_method=quantile_method, rank_error=rank_error, progress=progress)
@@ -0,0 +1,390 @@
+"""Out-of-core profiling: read the CSV in chunks and merge per-chunk statistics.
+
+Memory is bounded except for ``duplicate_mode='exact'``, which keeps 16 bytes per distinct row.
+"""
+import os
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from engine.cross_analysis import (KEY_COLUMNS, QUANTILES, QUARTILE_COLUMNS, STAT_COLUMNS,
+                                   factorize_key)
+from engine.duplicates import DuplicateDetector
+from engine.heavy_hitters import CAPACITY, SpaceSaving
+from engine.hll import HyperLogLog
+from engine.instrumentation import StageTimer
+from engine.profiler import assemble_profile, distinct_values, moments_frame
+from engine.quantile_sketch import DEFAULT_RANK_ERROR, GroupQuantileSketch
+
+CHUNK_SIZE = 100_000
+
+
+class MomentAccumulator:
+    """Count, mean, central sums M2/M3, min and max for a set of columns."""
+
+    def __init__(self, width):
+        self.n = np.zeros(width)
+        self.mean = np.zeros(width)
+        self.m2 = np.zeros(width)
+        self.m3 = np.zeros(width)
+        self.min = np.full(width, np.nan)
+        self.max = np.full(width, np.nan)
+
+    @classmethod
+    def from_values(cls, values):
+        # Two-pass moments over one chunk; values is a 2-D float array
+        acc = cls(values.shape[1])
+        mask = ~np.isnan(values)
+        acc.n = mask.sum(axis=0).astype('float64')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            acc.mean = np.where(acc.n > 0, np.where(mask, values, 0.0).sum(axis=0) / acc.n, 0.0)
+        centered = np.where(mask, values - acc.mean, 0.0)
+        acc.m2 = (centered ** 2).sum(axis=0)
+        acc.m3 = (centered ** 3).sum(axis=0)
+        if len(values):
+            acc.min = np.fmin.reduce(values, axis=0)
+            acc.max = np.fmax.reduce(values, axis=0)
+        return acc
+
+    def merge(self, other):
+        # Chan et al. / Pébay pairwise update, vectorized over columns
+        n_a, n_b = self.n, other.n
+        n = n_a + n_b
+        with np.errstate(divide='ignore', invalid='ignore'):
+            delta = other.mean - self.mean
+            mean = np.where(n > 0, self.mean + delta * n_b / n, 0.0)
+            m2 = self.m2 + other.m2 + np.where(n > 0, delta ** 2 * n_a * n_b / n, 0.0)
+            m3 = (self.m3 + other.m3
+                  + np.where(n > 0, delta ** 3 * n_a * n_b * (n_a - n_b) / n ** 2, 0.0)
+                  + np.where(n > 0, 3 * delta * (n_a * other.m2 - n_b * self.m2) / n, 0.0))
+        self.n, self.mean, self.m2, self.m3 = n, mean, m2, m3
+        self.min = np.fmin(self.min, other.min)
+        self.max = np.fmax(self.max, other.max)
+        return self
+
+    def drop(self, position):
+        for name in ('n', 'mean', 'm2', 'm3', 'min', 'max'):
+            setattr(self, name, np.delete(getattr(self, name), position))
+
+
+def as_text(values):
+    """Numbers as the text a whole-file read keeps in an object column (``1.0`` as ``1``); NaN stays missing."""
+    present = values.dropna()
+    text = present.astype(str)
+    if pd.api.types.is_float_dtype(present.dtype):
+        integral = (present % 1 == 0) & (present.abs() < 2 ** 63)
+        text[integral] = present[integral].astype('int64').astype(str)
+    return text.reindex(values.index).astype(object)
+
+
+def counts_quantiles(counts, quantiles=QUANTILES):
+    # Linear-interpolated quantiles (pandas' default) from a value -> count map
+    if not counts:
+        return [np.nan] * len(quantiles)
+    values = np.array(sorted(counts))
+    cumulative = np.cumsum([counts[v] for v in values])
+    total = cumulative[-1]
+    result = []
+    for q in quantiles:
+        position = q * (total - 1)
+        lower = int(np.floor(position))
+        fraction = position - lower
+        lo_value = values[np.searchsorted(cumulative, lower, side='right')]
+        hi_value = values[np.searchsorted(cumulative, min(lower + 1, total - 1), side='right')]
+        result.append(lo_value + (hi_value - lo_value) * fraction)
+    return result
+
+
+class NumericValues:
+    """Value counts of a numeric column, exact while it has at most ``capacity`` distinct values.
+
+    Past that the counts are folded into a t-digest for the quantiles and
+    the distinct count continues in a HyperLogLog.
+    """
+
+    def __init__(self, capacity=CAPACITY, rank_error=DEFAULT_RANK_ERROR):
+        self.capacity = capacity
+        self.rank_error = rank_error
+        self.counts = Counter()
+        self.total = 0
+        self.digest = None
+        self.sketch = None
+
+    @property
+    def exact(self):
+        return self.digest is None
+
+    def update(self, values):
+        self.total += int(values.notna().sum())
+        if self.exact:
+            self.counts.update(values.value_counts().to_dict())
+            if len(self.counts) > self.capacity:
+                self._fold()
+            return self
+        values = values.dropna().to_numpy(dtype='float64')
+        self.sketch.add(values)
+        self.digest.merge(GroupQuantileSketch.from_values(np.zeros(len(values)), values, self.rank_error))
+        return self
+
+    def _fold(self):
+        values = np.fromiter(self.counts, dtype='float64', count=len(self.counts))
+        weights = np.fromiter(self.counts.values(), dtype='float64', count=len(self.counts))
+        self.sketch = HyperLogLog()
+        self.sketch.add(values)
+        self.digest = GroupQuantileSketch.from_frame(pd.DataFrame({
+            'group': 0, 'mean': values, 'weight': weights, 'group_min': values.min(),
+            'group_max': values.max(), 'rank_error': self.rank_error,
+        }))
+        self.counts = None
+
+    def quantiles(self):
+        if self.exact:
+            return counts_quantiles(self.counts)
+        return self.digest.quantiles(QUANTILES).iloc[0].tolist()
+
+    def distinct(self):
+        return len(self.counts) if self.exact else self.sketch.count()
+
+    def as_text(self, name):
+        """SpaceSaving of the counts with the values as text, for a column demoted to qualitative.
+
+        Folded values have no counts left: they go to the "other" bucket and
+        the summary is marked approximate.
+        """
+        summary = SpaceSaving(self.capacity, name=name)
+        if not self.exact:
+            summary.total, summary.evicted, summary.sketch = self.total, True, self.sketch
+        elif self.counts:
+            counts = pd.Series(self.counts, dtype='int64')
+            counts.index = as_text(pd.Series(counts.index, dtype='float64'))
+            summary.update_counts(counts.groupby(level=0, sort=False).sum())
+        return summary
+
+
+class GroupMoments:
+    """Per-group count/mean/M2/min/max and quartile sketches of every
+    quantitative column against one qualitative column."""
+
+    def __init__(self, qual_col, quant_cols, rank_error=DEFAULT_RANK_ERROR):
+        self.qual_col = qual_col
+        self.quant_cols = quant_cols
+        self.stats = None
+        self.sketches = {col: GroupQuantileSketch(rank_error) for col in quant_cols}
+
+    def drop(self, col):
+        self.quant_cols = [name for name in self.quant_cols if name != col]
+        del self.sketches[col]
+        if self.stats is not None:
+            self.stats = {name: frame.drop(columns=col) for name, frame in self.stats.items()}
+
+    def update(self, chunk):
+        # The key is factorized once per chunk and shared by all numeric columns
+        codes, labels = factorize_key(chunk[self.qual_col])
+        values = chunk[self.quant_cols]
+        for col, sketch in self.sketches.items():
+            sketch.merge(GroupQuantileSketch.from_codes(codes, labels, values[col], sketch.rank_error))
+
+        keys = pd.Categorical.from_codes(codes, categories=labels)
+        grouped = values.groupby(keys, observed=True)
+        stats = {name: grouped.agg(name) for name in ('count', 'mean', 'var', 'min', 'max')}
+        stats['m2'] = stats.pop('var').fillna(0.0) * (stats['count'] - 1).clip(lower=0)
+        for name, frame in stats.items():
+            frame.index = pd.Index(frame.index.astype(object))
+        if self.stats is None:
+            self.stats = stats
+            return
+
+        old = self.stats
+        index = old['count'].index.union(stats['count'].index)
+        n_a = old['count'].reindex(index, fill_value=0)
+        n_b = stats['count'].reindex(index, fill_value=0)
+        mean_a = old['mean'].reindex(index).fillna(0)
+        mean_b = stats['mean'].reindex(index).fillna(0)
+        n = n_a + n_b
+        delta = mean_b - mean_a
+        self.stats = {
+            'count': n,
+            'mean': (mean_a * n_a + mean_b * n_b) / n.where(n > 0),
+            'min': np.fmin(old['min'].reindex(index), stats['min'].reindex(index)),
+            'max': np.fmax(old['max'].reindex(index), stats['max'].reindex(index)),
+            'm2': (old['m2'].reindex(index, fill_value=0) + stats['m2'].reindex(index, fill_value=0)
+                   + (delta ** 2 * n_a * n_b / n.where(n > 0)).fillna(0)),
+        }
+
+    def result(self):
+        """Long-format rows in the layout of ``cross_analysis_table``."""
+        stats = {name: frame.sort_index() for name, frame in self.stats.items()}
+        count = stats['count']
+        stats['std'] = np.sqrt(stats['m2'] / (count - 1).where(count > 1))
+        columns = {}
+        for name in ('count', 'mean', 'std', 'min', 'max'):
+            columns[name] = stats[name].stack(future_stack=True)
+        table = pd.DataFrame(columns)
+        table.index.names = ['group', 'quantitative']
+        quartiles = pd.concat({
+            col: sketch.quantiles(QUANTILES) for col, sketch in self.sketches.items()
+        }, names=['quantitative', 'group']).swaplevel().reindex(table.index)
+        quartiles.columns = QUARTILE_COLUMNS
+        table = pd.concat([table, quartiles], axis=1)[STAT_COLUMNS].reset_index()
+        table.insert(0, 'qualitative', self.qual_col)
+        return table
+
+
+def _byte_size(source):
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    if hasattr(source, 'seek'):
+        position = source.tell()
+        size = source.seek(0, os.SEEK_END)
+        source.seek(position)
+        return size
+    return None
+
+
+def profile_csv_chunked(file, chunksize=CHUNK_SIZE, rank_error=DEFAULT_RANK_ERROR, duplicate_mode='exact',
+                        progress=None, top_k=None, capacity=CAPACITY):
+    """Profile a CSV without loading it whole; returns a ProfileResult.
+
+    Stage spans accumulate over the chunks; ``progress(fraction, message)``
+    is called after every chunk with the share of the file's bytes read.
+    Every column keeps at most ``capacity`` values; its frequency table and
+    quantiles are exact up to that many distinct values and approximate
+    after.  With ``top_k`` the qualitative summaries keep only the
+    ``top_k`` most frequent values.  ``duplicate_mode='exact'`` keeps 16
+    bytes per distinct row (O(distinct rows) memory); use ``'approximate'``
+    for a fixed-size Bloom filter on files with many distinct rows.
+    """
+    timer = StageTimer()
+    total_bytes = _byte_size(file)
+    handle = open(file, 'rb') if isinstance(file, (str, os.PathLike)) else file
+    try:
+        chunks = iter(pd.read_csv(handle, chunksize=chunksize))
+
+        head = None
+        dtypes = None
+        qualitative_attributes = quantitative_attributes = None
+        row_count = 0
+        null_counts = None
+        moments = None
+        value_counts = {}
+        duplicates = DuplicateDetector(duplicate_mode, track_columns=False)
+        group_moments = {}
+
+        while True:
+            with timer.span('read') as span:
+                chunk = next(chunks, None)
+                span.rows += 0 if chunk is None else len(chunk)
+            if chunk is None:
+                break
+            rows = len(chunk)
+
+            with timer.span('dtype inference', rows):
+                if head is None:
+                    head = chunk.head()
+                    dtypes = chunk.dtypes.copy()
+                    qualitative_attributes = chunk.select_dtypes(include=['object', 'category']).columns.tolist()
+                    quantitative_attributes = chunk.select_dtypes(include=['number']).columns.tolist()
+                    null_counts = pd.Series(0, index=chunk.columns, dtype='int64')
+                    moments = MomentAccumulator(len(quantitative_attributes))
+                    value_counts = {col: NumericValues(capacity, rank_error) for col in chunk.columns}
+                    for col in qualitative_attributes:
+                        value_counts[col] = SpaceSaving(max(capacity, top_k or 0), name=col)
+                    group_moments = {}
+                    if quantitative_attributes:
+                        group_moments = {col: GroupMoments(col, quantitative_attributes, rank_error)
+                                         for col in qualitative_attributes}
+
+                for col in [col for col in quantitative_attributes if not pd.api.types.is_numeric_dtype(chunk[col])]:
+                    # Text in a column that was numeric so far: qualitative from this chunk on
+                    position = quantitative_attributes.index(col)
+                    had_values = moments.n[position] > 0
+                    quantitative_attributes.remove(col)
+                    moments.drop(position)
+                    for acc in group_moments.values():
+                        acc.drop(col)
+                    dtypes[col] = np.dtype(object)
+                    value_counts[col] = value_counts[col].as_text(col)
+                    qualitative_attributes = [name for name in chunk.columns
+                                              if name in qualitative_attributes or name == col]
+                    if quantitative_attributes and not had_values:
+                        group_moments[col] = GroupMoments(col, quantitative_attributes, rank_error)
+                    if not quantitative_attributes:
+                        group_moments = {}
+                for col in qualitative_attributes:
+                    # Group keys and counts of a text column stay text when a chunk reads it as numbers
+                    if chunk[col].dtype != object:
+                        chunk[col] = as_text(chunk[col])
+                for col in quantitative_attributes:
+                    if chunk[col].dtype != dtypes[col]:
+                        dtypes[col] = np.result_type(dtypes[col], chunk[col].dtype)
+
+            row_count += rows
+            with timer.span('missing', rows):
+                null_counts += chunk.isnull().sum()
+
+            with timer.span('quantitative', rows):
+                values = chunk[quantitative_attributes].to_numpy(dtype='float64', na_value=np.nan)
+                moments.merge(MomentAccumulator.from_values(values))
+
+            # Value maps of every column: frequency tables, distinct counts and exact quantiles
+            with timer.span('qualitative', rows):
+                for col in chunk.columns:
+                    value_counts[col].update(chunk[col])
+
+            with timer.span('duplicates', rows):
+                duplicates.update(chunk)
+
+            with timer.span('cross-analysis', rows):
+                for acc in group_moments.values():
+                    acc.update(chunk)
+
+            if progress is not None and total_bytes:
+                progress(min(handle.tell() / total_bytes, 0.99), f"Profiled {row_count:,} rows...")
+    finally:
+        if handle is not file:
+            handle.close()
+
+    if head is None:
+        raise ValueError("The CSV file has no rows to profile")
+
+    with timer.span('describe', row_count):
+        frequencies = {}
+        for col in qualitative_attributes:
+            summary = value_counts[col]
+            if top_k is not None or summary.evicted:
+                frequencies[col] = summary.result(top_k)
+                continue
+            # Nothing evicted: the exact value_counts
+            counts = summary.counts.sort_values(ascending=False, kind='stable')
+            counts.index.name = col
+            counts.name = 'count'
+            frequencies[col] = counts
+
+        quantiles = np.array([
+            value_counts[col].quantiles()
+            for col in quantitative_attributes
+        ], dtype='float64').T.reshape(len(QUANTILES), len(quantitative_attributes))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            quant_stats = moments_frame(pd.Index(quantitative_attributes), moments.n, moments.mean,
+                                        moments.m2 / moments.n, moments.m3 / moments.n,
+                                        moments.min, moments.max, quantiles)
+
+        # NaN is kept out of the value maps, so it adds one distinct value when present
+        distinct = {col: (distinct_values(frequencies[col]) if col in frequencies else counts.distinct())
+                         + int(null_counts[col] > 0)
+                    for col, counts in value_counts.items()}
+
+        if group_moments:
+            cross_table = pd.concat([group_moments[col].result() for col in qualitative_attributes
+                                     if col in group_moments], ignore_index=True)
+        else:
+            cross_table = pd.DataFrame(columns=KEY_COLUMNS + STAT_COLUMNS)
+
+        result = assemble_profile(head, dtypes, row_count, qualitative_attributes, quantitative_attributes,
+                                  null_counts, frequencies, quant_stats, distinct, duplicates.duplicate_rows,
+                                  cross_table)
+    result.stages = timer.results()
+    if progress is not None:
+        progress(1.0, "Analysis complete!")
+    return result
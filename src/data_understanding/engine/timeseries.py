@@ -0,0 +1,61 @@
+"""Parse ``created_at`` once and keep a small pre-aggregated time rollup."""
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+TIME_COLUMN = 'created_at'
+
+
+def parse_timestamps(series, fmt=TIMESTAMP_FORMAT):
+    """Datetime version of ``series``; already-parsed columns are returned as is."""
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return series
+    try:
+        return pd.to_datetime(series, format=fmt)
+    except (ValueError, TypeError):
+        return pd.to_datetime(series, format='ISO8601')
+
+
+def build_rollup(df, time_col=TIME_COLUMN, sum_columns=(), freq='h'):
+    """Count and sums of ``sum_columns`` per ``freq`` period of ``time_col``."""
+    times = parse_timestamps(df[time_col])
+    periods = times.dt.floor(freq).rename('period')
+    grouped = df[list(sum_columns)].groupby(periods)
+    rollup = grouped.sum() if sum_columns else pd.DataFrame(index=grouped.size().index)
+    rollup.insert(0, 'count', grouped.size())
+    rollup.attrs['freq'] = freq
+    return rollup
+
+
+def last_days(rollup, days=7, now=None, time_col=TIME_COLUMN, freq='D'):
+    """Per-day (or per-``freq``) totals of the rollup periods that fall in the last ``days`` days.
+
+    The window starts ``days`` days before ``now``, floored to the rollup's
+    period: the first period is counted whole, so with an hourly rollup up to
+    59 minutes of events before the exact cutoff are included (the raw rows
+    are no longer there to split it).  The period column is named after
+    ``time_col`` and holds dates for ``freq='D'``, timestamps otherwise.
+    """
+    now = now or datetime.now()
+    # Approximate boundary: the rollup period containing the cutoff is included whole
+    start = pd.Timestamp(now - timedelta(days=days)).floor(rollup.attrs.get('freq', 'h'))
+    window = rollup[rollup.index >= start]
+    periods = window.index.date if freq == 'D' else window.index.floor(freq)
+    totals = window.groupby(periods).sum()
+    totals.index.name = time_col
+    return totals.reset_index()
+
+
+def merge_rollups(rollup, other):
+    """Period-wise sum of two rollups of the same frequency; ``rollup`` may be None."""
+    if rollup is None:
+        return other
+    freq = rollup.attrs.get('freq', 'h')
+    if other.attrs.get('freq', freq) != freq:
+        raise ValueError("Only rollups with the same frequency can be merged")
+    merged = rollup.add(other, fill_value=0).sort_index()
+    merged['count'] = merged['count'].astype('int64')
+    merged.index.name = 'period'
+    merged.attrs['freq'] = freq
+    return merged
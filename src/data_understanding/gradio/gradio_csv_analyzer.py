@@ -1,118 +1,207 @@
+import os
+import sys
+
 import gradio as gr
 import pandas as pd
-from scipy.stats import skew
-
-def analyze_csv(file):
-    # Read the CSV file
-    df = pd.read_csv(file.name)
-    
-    # Get the first few rows (head)
-    head = df.head()
-    
-    # Data format of every column
-    data_format = pd.DataFrame(df.dtypes, columns=['Data Type'])
-    
-    # Calculate missing values
-    missing_values = df.isnull().sum().to_frame('Missing Values')
-    missing_percentage = (df.isnull().sum() / len(df) * 100).to_frame('Percentage Missing')
-    missing_info = pd.concat([missing_values, missing_percentage], axis=1)
-    
-    # Duplicate understanding
-    duplicate_count = df.duplicated().sum()
-    duplicate_columns = df.apply(lambda x: x.duplicated().sum()).to_frame('Duplicate Count')
-    
-    # Compute basic statistics
-    basic_stats = df.describe()
-    
-    # Row count
-    row_count = len(df)
-    
-    # Identification of qualitative and quantitative attributes
-    qualitative_attributes = df.select_dtypes(include=['object', 'category']).columns.tolist()
-    quantitative_attributes = df.select_dtypes(include=['number']).columns.tolist()
-    
-    # Summary reports for qualitative attributes
-    summary_reports_qual = []
-    for col in qualitative_attributes:
-        frequencies = df[col].value_counts().to_frame('Frequency')
-        percentages = (df[col].value_counts(normalize=True) * 100).to_frame('Percentage')
-        summary_report = pd.concat([frequencies, percentages], axis=1)
-        summary_reports_qual.append((col, summary_report))
-    
-    # Summary reports for quantitative attributes
-    summary_reports_quant = []
-    for col in quantitative_attributes:
-        descriptive_stats = df[col].describe().to_frame().T
-        variance = df[col].var()
-        std_dev = df[col].std()
-        skewness = skew(df[col].dropna())
-        
-        summary_report = descriptive_stats.copy()
-        summary_report['Variance'] = variance
-        summary_report['Standard Deviation'] = std_dev
-        summary_report['Skewness'] = skewness
-        
-        summary_reports_quant.append((col, summary_report))
-    
-    # Analysis against qualitative and quantitative attributes
-    analysis_results = []
-    for qual_col in qualitative_attributes:
-        for quant_col in quantitative_attributes:
-            group_stats = df.groupby(qual_col)[quant_col].agg([
-                'count',
-                'mean',
-                'std',
-                'min',
-                lambda x: x.quantile(0.25),
-                'median',
-                lambda x: x.quantile(0.75),
-                'max'
-            ]).reset_index()
-            group_stats.columns = [qual_col, 'count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
-            analysis_results.append((f"{quant_col} by {qual_col}", group_stats))
-    
-    return (head, data_format, missing_info, duplicate_count, duplicate_columns, basic_stats, 
-            row_count, qualitative_attributes, quantitative_attributes, summary_reports_qual, 
-            summary_reports_quant, analysis_results)
-
-def display_results(file):
-    results = analyze_csv(file)
-    (head, data_format, missing_info, duplicate_count, duplicate_columns, basic_stats, 
-     row_count, qualitative_attributes, quantitative_attributes, summary_reports_qual, 
-     summary_reports_quant, analysis_results) = results
-    
-    summary_tables_qual = create_summary_tables(summary_reports_qual)
-    summary_tables_quant = create_summary_tables(summary_reports_quant)
-    
-    return head, data_format, missing_info, str(duplicate_count), duplicate_columns, basic_stats, \
-           str(row_count), ", ".join(qualitative_attributes), ", ".join(quantitative_attributes), summary_tables_qual, \
-           summary_tables_quant, analysis_results
-
-def create_summary_tables(summary_reports):
-    summary_tables = {}
-    for col, summary_report in summary_reports:
-        summary_tables[col] = summary_report
-    return summary_tables
-
-iface = gr.Interface(
-    fn=display_results, 
-    inputs=gr.File(label="Upload CSV file"), 
-    outputs=[
-        gr.Dataframe(label="First Few Rows"),
-        gr.Dataframe(label="Data Format of Each Column"),
-        gr.Dataframe(label="Missing Values"),
-        gr.Textbox(label="Total Duplicate Rows"),
-        gr.Dataframe(label="Duplicate Columns"),
-        gr.Dataframe(label="Basic Statistics"),
-        gr.Textbox(label="Row Count"),
-        gr.Textbox(label="Qualitative Attributes"),
-        gr.Textbox(label="Quantitative Attributes"),
-        gr.Dataframe(label="Summary Reports for Qualitative Attributes"),
-        gr.Dataframe(label="Summary Reports for Quantitative Attributes"),
-        gr.Dataframe(label="Analysis of Qualitative vs Quantitative Attributes")
-    ],
-    title="Data Analysis with CSV",
-    description="🦸‍♂️🛠️ Visa data superhero tool engineered by Pulse AI 🛠️🦸‍♂️"
-)
-
-iface.launch(debug=True)
\ No newline at end of file
+
+# The profiling engine lives one directory up, next to the Streamlit app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine.cache import ResultCache
+from engine.instrumentation import stages_frame
+from engine.jobs import shared_service
+from engine.lazy import page
+from engine.parallel import analyze_csv_parallel
+from engine.profiler import PREVIEW_ROWS, analyze_csv, analyze_csv_incremental
+from engine.streaming import profile_csv_chunked
+
+# Sessions following an analysis at once; the analyses themselves run in the shared job
+# service, which admits them by memory, and browsing pages of finished results is not limited
+ANALYSIS_CONCURRENCY = int(os.environ.get('DATA_UNDERSTANDING_GRADIO_CONCURRENCY', 16))
+# Sessions waiting for a slot before new ones are turned away
+QUEUE_SIZE = int(os.environ.get('DATA_UNDERSTANDING_GRADIO_QUEUE', 32))
+ALL_ANALYSES = "All analyses"
+
+cache = ResultCache()
+jobs = shared_service(cache)
+
+def shown(frame):
+    # gr.Dataframe drops the index, which holds the column names and values of most tables
+    if isinstance(frame, pd.DataFrame) and not isinstance(frame.index, pd.RangeIndex):
+        return frame.reset_index()
+    return frame
+
+def changed(value, sent, name):
+    # Each section is sent to the browser once, when it is computed (again for the preview's replacements)
+    previous = sent.get(name)
+    if value is None or previous is value or (isinstance(value, str) and previous == value):
+        return gr.update()
+    sent[name] = value
+    return shown(value)
+
+def display_results(file, streaming_mode=False, approximate_quartiles=False, parallel_mode=False):
+    """Yields the outputs as the profile fills in: head, data types and missing
+    values first, the cross-analysis last."""
+    if file is None:
+        return
+    quantile_method = 'sketch' if approximate_quartiles else 'exact'
+    # Sessions submitting the same file and options follow the same job
+    if streaming_mode:
+        job = jobs.submit(profile_csv_chunked, file.name)
+    elif parallel_mode:
+        job = jobs.submit(analyze_csv_parallel, file.name, quantile_method=quantile_method)
+    else:
+        # Only this in-memory path has partial results; a cached profile arrives complete
+        job = jobs.submit(analyze_csv, file.name, incremental=analyze_csv_incremental,
+                          quantile_method=quantile_method)
+
+    sent = {}
+    for job in jobs.watch(job):
+        if job.state == 'failed':
+            raise gr.Error(job.message)
+        # The last update collects the result; the service then releases its copy
+        results = job.wait() if job.done else job.partial
+        message = f"{jobs.status(job)} ({job.fraction:.0%})" if job.state == 'running' else jobs.status(job)
+        if results is None:
+            yield status_update(message), *[gr.update()] * (len(OUTPUTS) - 1)
+        else:
+            yield profile_updates(results, sent, message)
+
+def status_update(message):
+    return f"⏳ {message}"
+
+def joined(names):
+    return None if names is None else ", ".join(names)
+
+def profile_updates(results, sent, message):
+    complete = bool(results.stages) and results.cross_table is not None
+    if results.row_count is None:
+        message = f"Preview of the first {PREVIEW_ROWS:,} rows; profiling the whole file..."
+    status = "✅ Analysis complete!" if complete else status_update(message)
+
+    updates = [
+        status,
+        results,
+        changed(results.head, sent, 'head'),
+        changed(results.data_format, sent, 'data_format'),
+        changed(results.missing_info, sent, 'missing_info'),
+        changed(None if results.duplicate_count is None else str(results.duplicate_count), sent, 'duplicate_count'),
+        changed(results.duplicate_columns, sent, 'duplicate_columns'),
+        changed(results.basic_stats, sent, 'basic_stats'),
+        changed(None if results.row_count is None else str(results.row_count), sent, 'row_count'),
+        changed(joined(results.qualitative_attributes), sent, 'qualitative_attributes'),
+        changed(joined(results.quantitative_attributes), sent, 'quantitative_attributes'),
+    ]
+    # Frequency and cross tables stay on the server; the first page goes out when they are ready
+    if results.summary_reports_qual is not None and 'qual' not in sent:
+        sent['qual'] = True
+        columns = list(results.summary_reports_qual)
+        column = columns[0] if columns else None
+        rows, pages, caption = qualitative_page(results, column, 1)
+        updates += [gr.update(choices=columns, value=column), gr.update(value=1, maximum=pages), rows, caption]
+    else:
+        updates += [gr.update()] * 4
+    if results.summary_reports_quant is not None and 'quant' not in sent:
+        sent['quant'] = True
+        reports = list(results.summary_reports_quant.values())
+        updates.append(shown(pd.concat(reports)) if reports else None)
+    else:
+        updates.append(gr.update())
+    if complete and 'cross' not in sent:
+        sent['cross'] = True
+        rows, pages, caption = cross_page(results, ALL_ANALYSES, 1)
+        updates += [gr.update(choices=[ALL_ANALYSES] + list(results.analysis_results), value=ALL_ANALYSES),
+                    gr.update(value=1, maximum=pages), rows, caption,
+                    shown(stages_frame(results.stages))]
+    else:
+        updates += [gr.update()] * 5
+    return tuple(updates)
+
+def paged(table, number):
+    rows, pages = page(table, int(number or 1) - 1)
+    number = min(max(int(number or 1), 1), pages)
+    return rows, pages, f"Page {number} of {pages} ({len(table):,} rows)"
+
+def qualitative_page(results, column, number):
+    if results is None or not results.summary_reports_qual or column not in results.summary_reports_qual:
+        return None, 1, ""
+    return paged(shown(results.summary_reports_qual[column]), number)
+
+def cross_page(results, analysis, number):
+    if results is None or results.cross_table is None:
+        return None, 1, ""
+    table = results.cross_table if analysis == ALL_ANALYSES else results.analysis_results.get(analysis)
+    if table is None:
+        return None, 1, ""
+    return paged(table, number)
+
+def show_qualitative_page(results, column, number):
+    rows, pages, caption = qualitative_page(results, column, number)
+    return rows, gr.update(maximum=pages), caption
+
+def show_cross_page(results, analysis, number):
+    rows, pages, caption = cross_page(results, analysis, number)
+    return rows, gr.update(maximum=pages), caption
+
+with gr.Blocks(title="Data Analysis with CSV") as iface:
+    gr.Markdown("# Data Analysis with CSV\n🦸‍♂️🛠️ Visa data superhero tool engineered by Pulse AI 🛠️🦸‍♂️")
+    file_input = gr.File(label="Upload CSV file")
+    streaming_input = gr.Checkbox(label="Streaming mode for files larger than memory (reads the CSV in chunks)")
+    quartiles_input = gr.Checkbox(label="Approximate group quartiles (t-digest sketch, faster on large files)")
+    parallel_input = gr.Checkbox(label="Parallel profiling (one worker process per CPU, for large or wide files)")
+    run_button = gr.Button("Analyze", variant="primary")
+    status_output = gr.Markdown()
+    # The session's profile is kept server-side; the tables below only get the page being browsed
+    profile_state = gr.State()
+
+    head_output = gr.Dataframe(label="First Few Rows")
+    with gr.Row():
+        data_format_output = gr.Dataframe(label="Data Format of Each Column")
+        missing_output = gr.Dataframe(label="Missing Values")
+    with gr.Row():
+        duplicate_count_output = gr.Textbox(label="Total Duplicate Rows")
+        row_count_output = gr.Textbox(label="Row Count")
+    duplicate_columns_output = gr.Dataframe(label="Duplicate Columns")
+    basic_stats_output = gr.Dataframe(label="Basic Statistics")
+    qualitative_output = gr.Textbox(label="Qualitative Attributes")
+    quantitative_output = gr.Textbox(label="Quantitative Attributes")
+
+    gr.Markdown("## Summary Reports for Qualitative Attributes")
+    with gr.Row():
+        qual_column_input = gr.Dropdown(label="Qualitative attribute", choices=[])
+        qual_page_input = gr.Number(label="Page", value=1, minimum=1, precision=0)
+    qual_table_output = gr.Dataframe()
+    qual_caption_output = gr.Markdown()
+    quant_summaries_output = gr.Dataframe(label="Summary Reports for Quantitative Attributes")
+
+    gr.Markdown("## Analysis of Qualitative vs Quantitative Attributes")
+    with gr.Row():
+        analysis_input = gr.Dropdown(label="Analysis", choices=[])
+        cross_page_input = gr.Number(label="Page", value=1, minimum=1, precision=0)
+    cross_table_output = gr.Dataframe()
+    cross_caption_output = gr.Markdown()
+    stages_output = gr.Dataframe(label="Stage Timings")
+
+    OUTPUTS = [status_output, profile_state, head_output, data_format_output, missing_output,
+               duplicate_count_output, duplicate_columns_output, basic_stats_output, row_count_output,
+               qualitative_output, quantitative_output,
+               qual_column_input, qual_page_input, qual_table_output, qual_caption_output, quant_summaries_output,
+               analysis_input, cross_page_input, cross_table_output, cross_caption_output, stages_output]
+    run_button.click(display_results, inputs=[file_input, streaming_input, quartiles_input, parallel_input],
+                     outputs=OUTPUTS, concurrency_limit=ANALYSIS_CONCURRENCY, concurrency_id='analysis',
+                     show_progress='hidden')
+
+    # Paging slices a profile that is already computed, so it never waits behind an analysis
+    for trigger in (qual_column_input.change, qual_page_input.submit):
+        trigger(show_qualitative_page, inputs=[profile_state, qual_column_input, qual_page_input],
+                outputs=[qual_table_output, qual_page_input, qual_caption_output], concurrency_limit=None,
+                show_progress='hidden')
+    for trigger in (analysis_input.change, cross_page_input.submit):
+        trigger(show_cross_page, inputs=[profile_state, analysis_input, cross_page_input],
+                outputs=[cross_table_output, cross_page_input, cross_caption_output], concurrency_limit=None,
+                show_progress='hidden')
+
+iface.queue(max_size=QUEUE_SIZE, default_concurrency_limit=ANALYSIS_CONCURRENCY)
+
+# Guarded so the profiling worker processes can import this module without relaunching the app
+if __name__ == '__main__':
+    iface.launch(debug=True)
@@ -0,0 +1,152 @@
+"""The VISA campaign report as plain data: every table and chart it shows."""
+from dataclasses import dataclass
+
+import pandas as pd
+
+from engine.cache import content_hash
+from engine.compact import SharedDictionaries
+from engine.timeseries import build_rollup
+from functionalities import issuer_activity, top_issuers
+from functionalities.card_data import (REPORT_COLUMNS as CARD_COLUMNS, card_count_chart, card_count_display,
+                                       card_count_table, cardholder_card_count, daily_cardholder_enrollment,
+                                       get_unique_cardholders, get_unique_cards, load_card_data)
+from functionalities.redemption_data import (REPORT_COLUMNS as REDEMPTION_COLUMNS, daily_redemptions_count,
+                                             daily_redemptions_value, load_redemption_data,
+                                             merchant_redemption_chart, merchant_table, merchant_wise_redemption,
+                                             redemption_metrics, redemption_metrics_table)
+from functionalities.transaction_data import (REPORT_COLUMNS as TRANSACTION_COLUMNS, load_transaction_data,
+                                              transaction_metrics, transaction_metrics_table)
+
+
+@dataclass
+class CampaignReport:
+    unique_cardholders: int
+    unique_cards: int
+    card_counts: pd.DataFrame
+    top_issuers: pd.DataFrame
+    transaction_metrics: pd.DataFrame
+    redemption_metrics: pd.DataFrame
+    merchant_redemptions: pd.DataFrame
+    card_rollup: pd.DataFrame
+    redemption_rollup: pd.DataFrame
+    approximate: bool = False
+    # From the joined exports; None when the report is read from an AggregateStore
+    issuer_activity: pd.DataFrame = None
+    join_summary: pd.DataFrame = None
+
+    @property
+    def count_prefix(self):
+        return '≈' if self.approximate else ''
+
+    def tables(self):
+        """The report's tables as displayed, by section title."""
+        tables = {
+            "Card Count Analysis (Cards per Cardholder)": card_count_display(self.card_counts),
+            "Top Issuer Analysis": self.top_issuers.rename(columns={'card_id_count': 'Card Count'}),
+            "Transaction Analysis": self.transaction_metrics,
+            "Redemption Analysis": self.redemption_metrics,
+            "Merchant-wise Total Redemption Analysis": self.merchant_redemptions,
+        }
+        if self.issuer_activity is not None:
+            tables["Issuer Activity Analysis"] = self.issuer_activity
+            tables["Cross-dataset Checks"] = self.join_summary
+        return tables
+
+    def figures(self):
+        """The report's Plotly figures in display order."""
+        tables = self.tables()
+        figures = [
+            card_count_chart(tables["Card Count Analysis (Cards per Cardholder)"]),
+            daily_cardholder_enrollment(self.card_rollup),
+            top_issuers.top_issuer_chart(tables["Top Issuer Analysis"]),
+            daily_redemptions_value(self.redemption_rollup),
+            daily_redemptions_count(self.redemption_rollup),
+            merchant_redemption_chart(self.merchant_redemptions),
+        ]
+        if self.issuer_activity is not None:
+            figures.append(issuer_activity.redemption_rate_chart(self.issuer_activity))
+        return figures
+
+
+def build_campaign_report(card_file, transaction_file, redemption_file, approximate=False, compact=True,
+                          dictionaries=None, cache=None, source_hashes=None):
+    """Load the three exports and compute the report.
+
+    With a ``ResultCache`` every result is cached by the content hash of its
+    upload (``source_hashes`` maps dataset name to hash when already known).
+    """
+    source_hashes = source_hashes or {}
+    if cache is not None:
+        source_hashes = {
+            'card': source_hashes.get('card') or content_hash(card_file),
+            'transaction': source_hashes.get('transaction') or content_hash(transaction_file),
+            'redemption': source_hashes.get('redemption') or content_hash(redemption_file),
+        }
+
+    def call(func, df, dataset, **kwargs):
+        if cache is None:
+            return func(df, **kwargs)
+        return cache.call(func, df, source_hash=source_hashes[dataset], **kwargs)
+
+    # ID codes are shared by the three frames of this build only; the dictionaries
+    # are dropped with the frames once the report is computed
+    if compact and dictionaries is None:
+        dictionaries = SharedDictionaries()
+    # Loads go through the Parquet ingest copy and read only the columns the report uses
+    card_df = load_card_data(card_file, columns=CARD_COLUMNS, source_hash=source_hashes.get('card'),
+                             compact=compact, dictionaries=dictionaries)
+    transaction_df = load_transaction_data(transaction_file, columns=TRANSACTION_COLUMNS,
+                                           source_hash=source_hashes.get('transaction'),
+                                           compact=compact, dictionaries=dictionaries)
+    redemption_df = load_redemption_data(redemption_file, columns=REDEMPTION_COLUMNS,
+                                         source_hash=source_hashes.get('redemption'),
+                                         compact=compact, dictionaries=dictionaries)
+
+    # Hash joins over the exports in bounded memory, keyed by all three uploads; only the
+    # per-BIN metrics are cached, the BIN table lookup reflects the current table
+    if cache is None:
+        joins = issuer_activity.issuer_join_metrics(card_file, transaction_file, redemption_file,
+                                                    source_hashes=source_hashes)
+    else:
+        joined_hash = content_hash('|'.join(source_hashes[name] for name in sorted(source_hashes)).encode())
+        joins = cache.call(issuer_activity.issuer_join_metrics, card_file, transaction_file, redemption_file,
+                           source_hash=joined_hash, source_hashes=source_hashes)
+
+    # created_at is parsed once at load; one hourly rollup per dataset feeds every time-series chart
+    return CampaignReport(
+        unique_cardholders=call(get_unique_cardholders, card_df, 'card', approximate=approximate),
+        unique_cards=call(get_unique_cards, card_df, 'card', approximate=approximate),
+        card_counts=call(cardholder_card_count, card_df, 'card'),
+        # Only the per-BIN counts are cached; the BIN table lookup reflects the current table
+        top_issuers=top_issuers.top_issuers_from_counts(call(top_issuers.issuer_card_counts, card_df, 'card')),
+        transaction_metrics=call(transaction_metrics, transaction_df, 'transaction', approximate=approximate),
+        redemption_metrics=call(redemption_metrics, redemption_df, 'redemption', approximate=approximate),
+        merchant_redemptions=call(merchant_wise_redemption, redemption_df, 'redemption'),
+        card_rollup=call(build_rollup, card_df, 'card'),
+        redemption_rollup=call(build_rollup, redemption_df, 'redemption', sum_columns=['cashback_amount']),
+        approximate=approximate,
+        issuer_activity=issuer_activity.issuer_activity_table(joins.groups),
+        join_summary=issuer_activity.join_summary_table(joins.summary),
+    )
+
+
+def campaign_report_from_store(store):
+    """The report from an ``AggregateStore``; transaction and redemption IDs are HyperLogLog estimates."""
+    return CampaignReport(
+        unique_cardholders=store.unique_cardholders(),
+        unique_cards=store.unique_cards(),
+        card_counts=card_count_table(store.card_histogram),
+        top_issuers=top_issuers.top_issuers_from_counts(store.issuer_cards),
+        transaction_metrics=transaction_metrics_table(
+            store.distinct_count('transaction'),
+            store.total('transaction', 'transaction_amount'), store.mean('transaction', 'transaction_amount'),
+            store.total('transaction', 'cashback_amount'), store.mean('transaction', 'cashback_amount'),
+            approximate=True),
+        redemption_metrics=redemption_metrics_table(
+            store.distinct_count('redemption'),
+            store.total('redemption', 'cashback_amount'), store.mean('redemption', 'cashback_amount'),
+            approximate=True),
+        merchant_redemptions=merchant_table(store.merchant_cashback),
+        card_rollup=store.card_rollup,
+        redemption_rollup=store.redemption_rollup,
+    )
@@ -1,27 +1,50 @@
 import pandas as pd
 import plotly.express as px
-from datetime import datetime, timedelta
+from engine.charts import finish_figure, time_series_chart
+from engine.hll import DEFAULT_PRECISION, distinct_count
+from engine.ingest import load_dataset
+from engine.timeseries import last_days
 
-def load_card_data(file):
-    return pd.read_csv(file)
+# Columns the report functions below actually read
+REPORT_COLUMNS = ['cardholder_id', 'card_id', 'issuer_bin', 'created_at']
 
-def get_unique_cardholders(df):
-    return df['cardholder_id'].nunique()
+def load_card_data(file, columns=None, source_hash=None, compact=False, dictionaries=None):
+    return load_dataset(file, 'card', columns=columns, source_hash=source_hash,
+                        compact=compact, dictionaries=dictionaries)
 
-def get_unique_cards(df):
-    return df['card_id'].nunique()
+def get_unique_cardholders(df, approximate=False, precision=DEFAULT_PRECISION):
+    return distinct_count(df['cardholder_id'], approximate, precision)
+
+def get_unique_cards(df, approximate=False, precision=DEFAULT_PRECISION):
+    return distinct_count(df['card_id'], approximate, precision)
 
 def cardholder_card_count(df):
     new_df = df.groupby('cardholder_id')['card_id'].count().reset_index(name='card_id_count')
-    value_counts = new_df['card_id_count'].value_counts().reset_index()
+    return card_count_table(new_df['card_id_count'].value_counts())
+
+def card_count_table(histogram):
+    # histogram: number of cardholders per card count, e.g. AggregateStore.card_histogram
+    value_counts = histogram.sort_values(ascending=False, kind='stable').reset_index()
     value_counts.columns = ['card_count', 'unique_cardholder_count']
     return value_counts
 
-def daily_cardholder_enrollment(df):
-    df['created_at'] = pd.to_datetime(df['created_at'])
-    last_7_days = datetime.now() - timedelta(days=7)
-    df_last_7_days = df[df['created_at'] >= last_7_days]
-    daily_enrollment = df_last_7_days.groupby(df_last_7_days['created_at'].dt.date).size().reset_index(name='count')
-    fig = px.bar(daily_enrollment, x='created_at', y='count', title='Daily Cardholder Enrollment for the Last 7 Days')
+def card_count_display(value_counts):
+    # Column names and percentages as the report shows them
+    value_counts = value_counts.rename(columns={'card_count': 'Card Count'})
+    value_counts = value_counts.rename(columns={'unique_cardholder_count': 'Unique Cardholder Count'})
+    value_counts['Percentage'] = (value_counts['Unique Cardholder Count'] / value_counts['Unique Cardholder Count'].sum()) * 100
+    value_counts['Percentage'] = value_counts['Percentage'].apply(lambda x: f"{x:.2f}%")
+    return value_counts
+
+def card_count_chart(value_counts):
+    # value_counts: card_count_display(...)
+    fig = px.pie(value_counts, values="Unique Cardholder Count", names="Card Count", title="Cardholder Distribution by Card Count", hole=0.5)
+    return finish_figure(fig, source_rows=len(value_counts))
+
+def daily_cardholder_enrollment(rollup, days=7, freq='D'):
+    # rollup: engine.timeseries.build_rollup(card_df)
+    daily_enrollment = last_days(rollup, days=days, freq=freq)[['created_at', 'count']]
+    fig = time_series_chart(daily_enrollment, x='created_at', y='count',
+                            title=f'Daily Cardholder Enrollment for the Last {days} Days')
     fig.update_layout(xaxis_title='Date', yaxis_title='Number of Enrollments')
-    return fig
+    return finish_figure(fig, source_rows=len(daily_enrollment))
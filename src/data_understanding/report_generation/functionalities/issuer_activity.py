@@ -0,0 +1,58 @@
+# Code for Issuer Activity Analysis across the card, transaction and redemption exports
+
+# Import necessary libraries
+import pandas as pd
+import plotly.express as px
+
+from engine.charts import finish_figure
+from engine.joins import join_exports
+from functionalities.top_issuers import TOP_ISSUERS, issuer_names
+
+# Join metrics per issuer_bin (engine/joins.py); independent of the BIN table, so it can be cached
+def issuer_join_metrics(card_file, transaction_file, redemption_file, source_hashes=None, progress=None):
+    return join_exports(card_file, transaction_file, redemption_file, source_hashes=source_hashes,
+                        group_column='issuer_bin', progress=progress)
+
+# groups: JoinMetrics.groups, summed per issuer name
+def issuer_activity_table(groups, bin_index=None):
+    names = issuer_names(pd.Series(groups.index, dtype=object), bin_index).to_numpy()
+    totals = groups.groupby(names).sum()
+    rate = 100 * totals['redeemed_transactions'] / totals['transactions'].where(totals['transactions'] > 0)
+    activity = pd.DataFrame({
+        'Bank Name': totals.index,
+        'Cards': totals['cards'].to_numpy(),
+        'Active Cards': totals['active_cards'].to_numpy(),
+        'Transactions': totals['transactions'].to_numpy(),
+        'Redeemed Transactions': totals['redeemed_transactions'].to_numpy(),
+        'Redemption Rate (%)': rate.round(2).to_numpy(),
+        'Total Cashback': totals['cashback'].to_numpy(),
+    })
+    activity = activity.sort_values(by='Transactions', ascending=False, kind='stable').reset_index(drop=True)
+    return activity[:TOP_ISSUERS]
+
+# summary: JoinMetrics.summary
+def join_summary_table(summary):
+    metrics_data = {
+        'Metrics': [
+            'Transactions without a Redemption',
+            'Value of Transactions without a Redemption',
+            'Cards Enrolled but Never Transacting',
+            'Redemptions without a Matching Transaction',
+            'Transactions on Cards not in the Card Data'
+        ],
+        'Value': [
+            f"{summary['transactions_without_redemption']:,}",
+            '¥' + f"{summary['amount_without_redemption']:,.0f}",
+            f"{summary['cards_never_transacting']:,} of {summary['cards']:,}",
+            f"{summary['redemptions_without_transaction']:,}",
+            f"{summary['transactions_unknown_card']:,}"
+        ]
+    }
+    return pd.DataFrame(metrics_data)
+
+# activity_df: issuer_activity_table
+def redemption_rate_chart(activity_df):
+    activity_df = activity_df.sort_values(by='Redemption Rate (%)', ascending=True)
+    fig = px.bar(activity_df, x="Redemption Rate (%)", y="Bank Name", orientation='h',
+                 title="Redemption Rate by Top Issuers", hover_data=['Transactions', 'Total Cashback'])
+    return finish_figure(fig, source_rows=len(activity_df))
@@ -1,11 +1,23 @@
 import pandas as pd
-import plotly.express as px
-from datetime import datetime, timedelta
+from engine.charts import category_bar_chart, finish_figure, time_series_chart
+from engine.hll import DEFAULT_PRECISION, distinct_count
+from engine.ingest import load_dataset
+from engine.timeseries import last_days
 
-def load_redemption_data(file):
-    return pd.read_csv(file)
+# Columns the report functions below actually read
+REPORT_COLUMNS = ['transaction_id', 'cashback_amount', 'created_at', 'name']
 
-def redemption_metrics(df):
+def load_redemption_data(file, columns=None, source_hash=None, compact=False, dictionaries=None):
+    return load_dataset(file, 'redemption', columns=columns, source_hash=source_hash,
+                        compact=compact, dictionaries=dictionaries)
+
+def redemption_metrics(df, approximate=False, precision=DEFAULT_PRECISION):
+    return redemption_metrics_table(distinct_count(df['transaction_id'], approximate, precision),
+                                    df['cashback_amount'].sum(), df['cashback_amount'].mean(),
+                                    approximate)
+
+def redemption_metrics_table(count, cashback_sum, cashback_mean, approximate=False):
+    count_prefix = '≈' if approximate else ''
     metrics_data = {
         'Metrics': [
             'Total Redemption Count',
@@ -13,33 +25,41 @@ def redemption_metrics(df):
             'Average Cashback Given'
         ],
         'Value': [
-            f"{df['transaction_id'].nunique():,}",
-            '¥' + f"{df['cashback_amount'].sum():,}",
-            '¥' + f"{round(df['cashback_amount'].mean(), 2):,}"
+            count_prefix + f"{count:,}",
+            '¥' + f"{cashback_sum:,}",
+            '¥' + f"{round(cashback_mean, 2):,}"
         ]
     }
     return pd.DataFrame(metrics_data)
 
-def daily_redemptions_value(df):
-    df['created_at'] = pd.to_datetime(df['created_at'])
-    last_7_days = datetime.now() - timedelta(days=7)
-    df_last_7_days = df[df['created_at'] >= last_7_days]
-    daily_redemptions = df_last_7_days.groupby(df_last_7_days['created_at'].dt.date)['cashback_amount'].sum().reset_index(name='total_value')
-    fig = px.bar(daily_redemptions, x='created_at', y='total_value', title='Daily Redemptions Value for the Last 7 Days')
+def daily_redemptions_value(rollup, days=7, freq='D'):
+    # rollup: engine.timeseries.build_rollup(redemption_df, sum_columns=['cashback_amount'])
+    # Bars per day; long windows or short freqs become a downsampled line (engine/charts.py)
+    daily_redemptions = last_days(rollup, days=days, freq=freq)[['created_at', 'cashback_amount']]
+    daily_redemptions = daily_redemptions.rename(columns={'cashback_amount': 'total_value'})
+    fig = time_series_chart(daily_redemptions, x='created_at', y='total_value',
+                            title=f'Daily Redemptions Value for the Last {days} Days')
     fig.update_layout(xaxis_title='Date', yaxis_title='Total Redemption Value')
-    return fig
-
-def daily_redemptions_count(df):
-    df['created_at'] = pd.to_datetime(df['created_at'])
-    last_7_days = datetime.now() - timedelta(days=7)
-    df_last_7_days = df[df['created_at'] >= last_7_days]
-    daily_redemptions = df_last_7_days.groupby(df_last_7_days['created_at'].dt.date).size().reset_index(name='count')
-    fig = px.bar(daily_redemptions, x='created_at', y='count', title='Daily Redemptions Count for the Last 7 Days')
+    return finish_figure(fig, source_rows=len(daily_redemptions))
+
+def daily_redemptions_count(rollup, days=7, freq='D'):
+    daily_redemptions = last_days(rollup, days=days, freq=freq)[['created_at', 'count']]
+    fig = time_series_chart(daily_redemptions, x='created_at', y='count',
+                            title=f'Daily Redemptions Count for the Last {days} Days')
     fig.update_layout(xaxis_title='Date', yaxis_title='Number of Redemptions')
-    return fig
+    return finish_figure(fig, source_rows=len(daily_redemptions))
 
 def merchant_wise_redemption(df):
-    new_df = df.groupby('name')['cashback_amount'].sum().reset_index()
+    return merchant_table(df.groupby('name')['cashback_amount'].sum())
+
+def merchant_table(cashback_sums):
+    # cashback_sums: cashback per merchant name, e.g. AggregateStore.merchant_cashback
+    new_df = cashback_sums.reset_index()
     new_df.columns = ['Merchant Name', 'Sum of cashback']
     new_df = new_df.sort_values(by='Sum of cashback', ascending=False)
     return new_df
+
+def merchant_redemption_chart(merchant_df):
+    # Top merchants as bars, the rest summed into one '(other)' bar
+    fig = category_bar_chart(merchant_df, "Merchant Name", "Sum of cashback", title="Total Redemption by Merchants")
+    return finish_figure(fig, source_rows=len(merchant_df))
@@ -1,41 +1,54 @@
 # Code for Top Issuer Analysis
 
 # Import necessary libraries
+import os
+from functools import lru_cache
+
 import pandas as pd
+import plotly.express as px
+
+from engine.bin_index import BinIndex
+from engine.charts import finish_figure
+
+# Issuer BIN ranges (see engine/bin_index.py for the format); point
+# DATA_UNDERSTANDING_BIN_TABLE at another CSV to swap the table
+BIN_TABLE = os.environ.get('DATA_UNDERSTANDING_BIN_TABLE',
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), 'issuer_bins.csv'))
+UNKNOWN_ISSUER = 'Unknown issuer'
+TOP_ISSUERS = 20
+
+@lru_cache(maxsize=4)
+def _load_index(path, modified):
+    return BinIndex.load(path)
 
-# Define the bank mapping
-bank_mapping = {
-    '4980': 'Sumitomo Mitsui Card Company Limited',
-    '4708': 'YES BANK, LTD.',
-    '4297': 'RAKUTEN KC CO., LTD.',
-    '4537': 'WELLS FARGO BANK, N.A.',
-    '4205': 'AEON CREDIT SERVICE CO., LTD.',
-    '4534': 'DC CARD CO., LTD.',
-    '4541': 'REDIT SAISON CO., LTD.',
-    '4363': 'UNITED COMMERCIAL BANK',
-    '4649': 'YAMAGIN CREDIT CO., LTD.',
-    '4616': 'U.S. BANK N.A. ND',
-    '4986': 'MITSUBISHI UFJ FINANCIAL GROUP, INC.',
-    '4539': 'OSTGIROT BANK AB',
-    '4097': 'CAJA AHORROS GERONA',
-    '4924': 'BANK OF AMERICA, N.A.',
-    '4987': 'YAMAGIN CREDIT CO., LTD.',
-    '4162': 'UNKNOWN',
-    '4721': 'WELLS FARGO BANK IOWA, N.A.',
-    '4538': 'MITSUBISHI UFJ FINANCIAL GROUP, INC.',
-    '4984': 'BANCO DO BRASIL, S.A.',
-    '4122': 'UNITED BANK, LTD.',
-    '4901': 'OMC CARD, INC.'
-}
+# The BinIndex of a BIN table, reloaded when the file changes
+def issuer_index(path=None):
+    path = path or BIN_TABLE
+    return _load_index(path, os.path.getmtime(path))
+
+# Issuer of every BIN in one vectorized lookup; unmatched BINs are UNKNOWN_ISSUER
+def issuer_names(bins, bin_index=None):
+    bin_index = issuer_index() if bin_index is None else bin_index
+    return bin_index.lookup(bins, default=UNKNOWN_ISSUER)
+
+# Unique cards per issuer_bin; independent of the BIN table, so it can be cached
+def issuer_card_counts(card_df):
+    return card_df.groupby('issuer_bin')['card_id'].nunique()
 
 # Function to perform Top Issuer Analysis
-def top_issuer_analysis(card_df):
-    new_df = card_df.groupby('issuer_bin')['card_id'].nunique().reset_index(name='card_id_count')
-    new_df = new_df.sort_values(by='card_id_count', ascending=False)
-    new_df["issuer_bin"] = new_df["issuer_bin"].astype(str)
-    new_df["first_4_digits"] = new_df["issuer_bin"].str[:4]
-    grouped_df = new_df.groupby("first_4_digits")["card_id_count"].sum().reset_index()
-    grouped_df = grouped_df.sort_values(by="card_id_count", ascending=False).reset_index(drop=True)
-    grouped_df['Bank Name'] = grouped_df['first_4_digits'].map(bank_mapping)
-    grouped_df = grouped_df[['Bank Name', 'card_id_count']][:20]
-    return  grouped_df
\ No newline at end of file
+def top_issuer_analysis(card_df, bin_index=None):
+    return top_issuers_from_counts(issuer_card_counts(card_df), bin_index)
+
+# issuer_card_counts: unique cards per issuer_bin, e.g. AggregateStore.issuer_cards
+def top_issuers_from_counts(issuer_card_counts, bin_index=None):
+    names = issuer_names(issuer_card_counts.index, bin_index)
+    grouped = pd.Series(issuer_card_counts.to_numpy(), index=names.to_numpy()).groupby(level=0).sum()
+    grouped_df = grouped.rename_axis('Bank Name').reset_index(name='card_id_count')
+    grouped_df = grouped_df.sort_values(by='card_id_count', ascending=False, kind='stable').reset_index(drop=True)
+    return grouped_df[:TOP_ISSUERS]
+
+# grouped_df: top issuers with card_id_count renamed to 'Card Count'
+def top_issuer_chart(grouped_df):
+    grouped_df = grouped_df.sort_values(by='Card Count', ascending=True)
+    fig = px.bar(grouped_df, x="Card Count", y="Bank Name", orientation='h', title="Card ID Counts by Top Issuers")
+    return finish_figure(fig, source_rows=len(grouped_df))
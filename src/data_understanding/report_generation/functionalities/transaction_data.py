@@ -1,11 +1,24 @@
 import pandas as pd
 import plotly.express as px
 from datetime import datetime, timedelta
+from engine.hll import DEFAULT_PRECISION, distinct_count
+from engine.ingest import load_dataset
 
-def load_transaction_data(file):
-    return pd.read_csv(file)
+# Columns the report functions below actually read
+REPORT_COLUMNS = ['transaction_id', 'transaction_amount', 'cashback_amount']
 
-def transaction_metrics(df):
+def load_transaction_data(file, columns=None, source_hash=None, compact=False, dictionaries=None):
+    return load_dataset(file, 'transaction', columns=columns, source_hash=source_hash,
+                        compact=compact, dictionaries=dictionaries)
+
+def transaction_metrics(df, approximate=False, precision=DEFAULT_PRECISION):
+    return transaction_metrics_table(distinct_count(df['transaction_id'], approximate, precision),
+                                     df['transaction_amount'].sum(), df['transaction_amount'].mean(),
+                                     df['cashback_amount'].sum(), df['cashback_amount'].mean(),
+                                     approximate)
+
+def transaction_metrics_table(count, amount_sum, amount_mean, cashback_sum, cashback_mean, approximate=False):
+    count_prefix = '≈' if approximate else ''
     metrics_data = {
         'Metrics': [
             'Authorized & Eligible Total Transaction Count',
@@ -15,11 +28,11 @@ def transaction_metrics(df):
             'Authorized & Eligible Average Cashback'
         ],
         'Value': [
-            f"{df['transaction_id'].nunique():,}",
-            '¥' + f"{df['transaction_amount'].sum():,}",
-            '¥' + f"{round(df['transaction_amount'].mean(), 2):,}",
-            '¥' + f"{df['cashback_amount'].sum():,}",
-            '¥' + f"{round(df['cashback_amount'].mean(), 2):,}"
+            count_prefix + f"{count:,}",
+            '¥' + f"{amount_sum:,}",
+            '¥' + f"{round(amount_mean, 2):,}",
+            '¥' + f"{cashback_sum:,}",
+            '¥' + f"{round(cashback_mean, 2):,}"
         ]
     }
     return pd.DataFrame(metrics_data)
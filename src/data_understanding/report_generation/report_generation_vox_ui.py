@@ -1,18 +1,37 @@
 import streamlit as st
 import pandas as pd
-from functionalities.card_data import load_card_data, get_unique_cardholders, get_unique_cards, cardholder_card_count, daily_cardholder_enrollment
-from functionalities.transaction_data import load_transaction_data, transaction_metrics
-from functionalities.redemption_data import load_redemption_data, redemption_metrics, daily_redemptions_value, daily_redemptions_count, merchant_wise_redemption
-from functionalities import top_issuers
+import sys
+import os
+# The shared analysis engine lives in src/data_understanding/engine
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from functionalities.card_data import load_card_data, card_count_display, REPORT_COLUMNS as CARD_COLUMNS
+from functionalities.transaction_data import load_transaction_data, REPORT_COLUMNS as TRANSACTION_COLUMNS
+from functionalities.redemption_data import load_redemption_data, REPORT_COLUMNS as REDEMPTION_COLUMNS
 from datetime import datetime
 import pytz
-import os
-import plotly.express as px
 from other.helper_components  import spacer
+from engine.cache import ResultCache, content_hash
+from engine.aggregate_store import AggregateStore
+from engine.charts import figure_stats, telemetry_frame
+from campaign_report import build_campaign_report, campaign_report_from_store
+from report_snapshot import SNAPSHOT_PATH, load_snapshot
 
 def generate_header_text(base_text, session_key):
     return f"**{base_text} (Generated at: {st.session_state[session_key]} JST)**" if session_key in st.session_state and st.session_state[session_key] else base_text
 
+@st.cache_resource
+def get_result_cache():
+    return ResultCache()
+
+@st.cache_resource
+def get_aggregate_store():
+    return AggregateStore()
+
+@st.cache_resource
+def get_snapshot(path, modified):
+    # Keyed by modification time so a regenerated snapshot is picked up
+    return load_snapshot(path)
+
 # Initialize session state variables if they don't exist
 if 'generated_cardholder' not in st.session_state:
     st.session_state['generated_cardholder'] = ''
@@ -25,9 +44,35 @@ tab1, tab2 = st.sidebar.tabs(["Upload Data Files", "Generated Time"])
 
 with tab1:
     st.header('Upload Data Files')
-    card_data = st.file_uploader("Upload Card Data", type=['csv'])
-    transaction_data = st.file_uploader("Upload Transaction Data", type=['csv'])
-    redemption_data = st.file_uploader("Upload Redemption Data", type=['csv'])
+    source = st.radio("Report source", ["Full files", "Daily deltas (aggregate store)", "Precomputed snapshot"])
+    use_store = source == "Daily deltas (aggregate store)"
+    use_snapshot = source == "Precomputed snapshot"
+    if use_snapshot:
+        # Produced offline by report_snapshot.py; no CSVs are read
+        snapshot_path = st.text_input("Snapshot directory or .zip", value=SNAPSHOT_PATH)
+        card_data = transaction_data = redemption_data = None
+    elif use_store:
+        # Each delta is folded into the persistent store once; the report renders from the store
+        card_data = st.file_uploader("Upload Card Data Deltas", type=['csv'], accept_multiple_files=True)
+        transaction_data = st.file_uploader("Upload Transaction Data Deltas", type=['csv'], accept_multiple_files=True)
+        redemption_data = st.file_uploader("Upload Redemption Data Deltas", type=['csv'], accept_multiple_files=True)
+    else:
+        card_data = st.file_uploader("Upload Card Data", type=['csv'])
+        transaction_data = st.file_uploader("Upload Transaction Data", type=['csv'])
+        redemption_data = st.file_uploader("Upload Redemption Data", type=['csv'])
+    approximate_counts = st.checkbox("Approximate unique counts (HyperLogLog, for very large files)")
+    compact_ids = st.checkbox("Compact ID columns (int32 codes, lower memory)", value=True)
+
+snapshot = None
+if use_snapshot and snapshot_path:
+    if os.path.exists(snapshot_path):
+        snapshot = get_snapshot(snapshot_path, os.path.getmtime(snapshot_path))
+        # The snapshot's "Generated at" times fill the sidebar once per snapshot
+        if st.session_state.get('snapshot_loaded') != (snapshot_path, snapshot.created_at):
+            st.session_state.update({key: value for key, value in snapshot.generated.items() if value})
+            st.session_state['snapshot_loaded'] = (snapshot_path, snapshot.created_at)
+    else:
+        tab1.error(f"No snapshot at {snapshot_path}")
 
 with tab2:
     st.header('Data Source Generated Time ')
@@ -36,67 +81,109 @@ with tab2:
     st.session_state['generated_redemptions'] = st.text_input("Generated Redemptions Time", value=st.session_state['generated_redemptions'])
     st.markdown('[Time Converter](https://savvytime.com/converter/sri-lanka-colombo-to-japan-ueno-ebisumachi)')
 
-if card_data and transaction_data and redemption_data:
-    card_df = load_card_data(card_data)
-    transaction_df = load_transaction_data(transaction_data)
-    redemption_df = load_redemption_data(redemption_data)
-
-    num_unique_cardholders = get_unique_cardholders(card_df)
-    num_unique_cards = get_unique_cards(card_df)
-    value_counts = cardholder_card_count(card_df)
-
-    current_date = datetime.now().strftime("%B %d, %Y")
+cache = get_result_cache()
+report = None
+
+if snapshot is not None:
+    report = snapshot.report
+    st.sidebar.caption(f"Snapshot created at {snapshot.created_at}")
+
+elif use_store:
+    store = get_aggregate_store()
+    loaders = {'card': (load_card_data, CARD_COLUMNS, card_data),
+               'transaction': (load_transaction_data, TRANSACTION_COLUMNS, transaction_data),
+               'redemption': (load_redemption_data, REDEMPTION_COLUMNS, redemption_data)}
+    applied = 0
+    for dataset, (loader, columns, uploads) in loaders.items():
+        for upload in uploads or []:
+            upload_hash = content_hash(upload)
+            if not store.has_ingested(dataset, upload_hash):
+                # The store keys on the original ID strings, so deltas are not compacted
+                store.update(dataset, loader(upload, columns=columns, source_hash=upload_hash), upload_hash)
+                applied += 1
+    if applied:
+        store.save()
+    if all(store.ingested.values()):
+        # Transaction and redemption IDs are counted with the store's HyperLogLog sketches
+        report = campaign_report_from_store(store)
+        st.sidebar.caption(f"Aggregate store updated at {store.updated_at} from "
+                           + ", ".join(f"{len(hashes)} {dataset}" for dataset, hashes in store.ingested.items())
+                           + " deltas")
+
+elif card_data and transaction_data and redemption_data:
+    # Results are cached by the content hash of each upload; loads go through
+    # the Parquet ingest copy and read only the columns the report uses
+    report = build_campaign_report(card_data, transaction_data, redemption_data,
+                                   approximate=approximate_counts, compact=compact_ids, cache=cache)
+
+report_ready = report is not None
+if report_ready:
+    num_unique_cardholders, num_unique_cards = report.unique_cardholders, report.unique_cards
+    count_prefix = report.count_prefix
+    value_counts, grouped_df = report.card_counts, report.top_issuers
+    transaction_metrics_df, redemption_metrics_df = report.transaction_metrics, report.redemption_metrics
+    merchant_redemptions_df = report.merchant_redemptions
+    # Charts in display order: card count, enrollment, issuers, redemption value, count, merchants
+    # and, for joined exports, redemption rate by issuer
+    charts = snapshot.charts if snapshot is not None else report.figures()
+
+    report_date = datetime.fromisoformat(snapshot.created_at) if snapshot is not None else datetime.now()
+    current_date = report_date.strftime("%B %d, %Y")
 
     st.image('./other/assets/banner+pulse+id.png')
     st.title(f"VISA Japan Campaign Analysis {current_date}")
 
     st.header(generate_header_text("Card and Cardholder Information Analysis", 'generated_cardholder'))
-    st.write(f"Number of unique Cardholders: **{num_unique_cardholders:,}**")
-    st.write(f"Number of unique Cards: **{num_unique_cards:,}**")
+    st.write(f"Number of unique Cardholders: **{count_prefix}{num_unique_cardholders:,}**")
+    st.write(f"Number of unique Cards: **{count_prefix}{num_unique_cards:,}**")
     st.header("Card Count Analysis (Cards per Cardholder)")
     # rename column name
-    value_counts = value_counts.rename(columns={'card_count': 'Card Count'})
-    value_counts = value_counts.rename(columns={'unique_cardholder_count': 'Unique Cardholder Count'})
-    value_counts['Percentage'] = (value_counts['Unique Cardholder Count'] / value_counts['Unique Cardholder Count'].sum()) * 100
-    value_counts['Percentage'] = value_counts['Percentage'].apply(lambda x: f"{x:.2f}%")
+    value_counts = card_count_display(value_counts)
     st.dataframe(value_counts, use_container_width=True, hide_index=True)
 
     spacer(1)
-    fig2 = px.pie(value_counts, values="Unique Cardholder Count", names="Card Count", title="Cardholder Distribution by Card Count", hole=0.5)
-    st.plotly_chart(fig2)
-    st.plotly_chart(daily_cardholder_enrollment(card_df))
+    st.plotly_chart(charts[0])
+    st.plotly_chart(charts[1])
     
     spacer(1)
 
     st.header("Top Issuer Analysis")
-    grouped_df = top_issuers.top_issuer_analysis(card_df=card_df)
     grouped_df = grouped_df.rename(columns={'card_id_count': 'Card Count'})
 
     st.dataframe(grouped_df, use_container_width=True, hide_index=True)
     # st.table(grouped_df.reset_index(drop=True))
-    grouped_df = grouped_df.sort_values(by='Card Count', ascending=True)
 
     spacer(1)
     st.divider()
-    fig3 = px.bar(grouped_df, x="Card Count", y="Bank Name", orientation='h', title="Card ID Counts by Top Issuers")
-    st.plotly_chart(fig3, use_container_width=True)
+    st.plotly_chart(charts[2], use_container_width=True)
     
     st.header(generate_header_text("Transaction Analysis", 'generated_transactions'))
-    transaction_metrics_df = transaction_metrics(transaction_df)
     st.dataframe(transaction_metrics_df, use_container_width=True, hide_index=True)
 
     st.header(generate_header_text("Redemption Analysis", 'generated_redemptions'))
-    redemption_metrics_df = redemption_metrics(redemption_df)
     st.dataframe(redemption_metrics_df, use_container_width=True, hide_index=True)
     st.divider()
 
-    st.plotly_chart(daily_redemptions_value(redemption_df))
-    st.plotly_chart(daily_redemptions_count(redemption_df))
+    st.plotly_chart(charts[3])
+    st.plotly_chart(charts[4])
 
     spacer(1)
     st.header(generate_header_text("Merchant-wise Total Redemption Analysis", 'generated_redemptions'))
-    merchant_redemptions_df = merchant_wise_redemption(redemption_df)
     st.dataframe(merchant_redemptions_df, use_container_width=True, hide_index=True)
 
-    fig = px.bar(merchant_redemptions_df, x="Merchant Name", y="Sum of cashback", title="Total Redemption by Merchants")
-    st.plotly_chart(fig)
+    st.plotly_chart(charts[5])
+
+    # Joined across the three exports; not available from the aggregate store
+    if report.issuer_activity is not None:
+        spacer(1)
+        st.header("Issuer Activity Analysis")
+        st.dataframe(report.issuer_activity, use_container_width=True, hide_index=True)
+        st.plotly_chart(charts[6], use_container_width=True)
+        st.header("Cross-dataset Checks")
+        st.dataframe(report.join_summary, use_container_width=True, hide_index=True)
+
+    st.caption(f"Result cache: {cache.hits} hits, {cache.misses} misses")
+    with st.expander("Chart payloads"):
+        # Traces, points and JSON bytes each chart above sends to the browser
+        st.dataframe(telemetry_frame([figure_stats(chart) for chart in charts]),
+                     use_container_width=True, hide_index=True)
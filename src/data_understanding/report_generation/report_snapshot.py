@@ -0,0 +1,159 @@
+"""Precomputed campaign report snapshots, as a directory or a .zip.
+
+    python report_snapshot.py --card card.csv --transaction tx.csv --redemption red.csv --output snapshot.zip
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import zipfile
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+
+import pandas as pd
+import plotly.io as pio
+
+# The shared analysis engine lives in src/data_understanding/engine
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from campaign_report import CampaignReport, build_campaign_report, campaign_report_from_store
+from engine.aggregate_store import AggregateStore
+from engine.cache import content_hash
+
+FORMAT_VERSION = 1
+SNAPSHOT_PATH = os.environ.get('DATA_UNDERSTANDING_SNAPSHOT', '')
+# "Generated at" times of the three exports, as kept in the vox UI's session state
+GENERATED_KEYS = ['generated_cardholder', 'generated_transactions', 'generated_redemptions']
+
+
+@dataclass
+class ReportSnapshot:
+    report: object
+    charts: list
+    created_at: str
+    generated: dict = field(default_factory=dict)
+    sources: dict = field(default_factory=dict)
+
+
+def _table_fields(report_class, required=False):
+    # required: only the tables every report has (and every snapshot format 1 holds)
+    return [item.name for item in fields(report_class) if item.type is pd.DataFrame
+            and not (required and item.default is None)]
+
+
+def export_sources(paths):
+    """Path and content hash of each export a snapshot was computed from."""
+    return {dataset: {'file': os.path.abspath(path), 'hash': content_hash(path)} for dataset, path in paths.items()}
+
+
+def save_snapshot(report, path, generated=None, sources=None):
+    """Write ``report`` (a CampaignReport) as a snapshot directory, or a zip if ``path`` ends in .zip."""
+    archive = path.endswith('.zip')
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    target = tempfile.mkdtemp(prefix='.snapshot-', dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        os.makedirs(os.path.join(target, 'tables'))
+        os.makedirs(os.path.join(target, 'charts'))
+        tables = [name for name in _table_fields(type(report)) if getattr(report, name) is not None]
+        for name in tables:
+            getattr(report, name).to_parquet(os.path.join(target, 'tables', f"{name}.parquet"))
+        figures = report.figures()
+        for number, fig in enumerate(figures):
+            with open(os.path.join(target, 'charts', f"{number}.json"), 'w', encoding='utf-8') as f:
+                f.write(pio.to_json(fig))
+        metadata = {
+            'format_version': FORMAT_VERSION,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'unique_cardholders': int(report.unique_cardholders),
+            'unique_cards': int(report.unique_cards),
+            'approximate': report.approximate,
+            'charts': len(figures),
+            'tables': tables,
+            'generated': {key: (generated or {}).get(key, '') for key in GENERATED_KEYS},
+            'sources': sources or {},
+        }
+        with open(os.path.join(target, 'metadata.json'), 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2)
+
+        # Replace an older snapshot only once the new one is complete
+        if archive:
+            staged = shutil.make_archive(target, 'zip', target)
+            os.replace(staged, path)
+        else:
+            os.chmod(target, 0o755)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            os.replace(target, path)
+    finally:
+        shutil.rmtree(target, ignore_errors=True)
+    return path
+
+
+class _Reader:
+    # Snapshot members from a directory or a zip archive, by relative path
+    def __init__(self, path):
+        self.zip = zipfile.ZipFile(path) if zipfile.is_zipfile(path) else None
+        self.path = path
+
+    def read(self, member):
+        if self.zip is not None:
+            return self.zip.read(member)
+        with open(os.path.join(self.path, member), 'rb') as f:
+            return f.read()
+
+    def close(self):
+        if self.zip is not None:
+            self.zip.close()
+
+
+def load_snapshot(path):
+    """The ReportSnapshot at ``path`` (directory or zip)."""
+    reader = _Reader(path)
+    try:
+        metadata = json.loads(reader.read('metadata.json'))
+        if metadata.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format {metadata.get('format_version')} in {path}")
+        tables = {name: pd.read_parquet(io.BytesIO(reader.read(f"tables/{name}.parquet")))
+                  for name in metadata.get('tables', _table_fields(CampaignReport, required=True))}
+        charts = [json.loads(reader.read(f"charts/{number}.json")) for number in range(metadata['charts'])]
+    finally:
+        reader.close()
+
+    report = CampaignReport(unique_cardholders=metadata['unique_cardholders'],
+                            unique_cards=metadata['unique_cards'],
+                            approximate=metadata['approximate'], **tables)
+    return ReportSnapshot(report=report, charts=charts, created_at=metadata['created_at'],
+                          generated=metadata['generated'], sources=metadata['sources'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute a campaign report snapshot for the vox UI.")
+    parser.add_argument('--card', help="card export")
+    parser.add_argument('--transaction', help="transaction export")
+    parser.add_argument('--redemption', help="redemption export")
+    parser.add_argument('--store', help="aggregate store directory to read instead of the exports")
+    parser.add_argument('--approximate', action='store_true', help="HyperLogLog unique counts")
+    parser.add_argument('--generated-cardholder', default='', help="when the card export was generated (JST)")
+    parser.add_argument('--generated-transactions', default='', help="when the transaction export was generated (JST)")
+    parser.add_argument('--generated-redemptions', default='', help="when the redemption export was generated (JST)")
+    parser.add_argument('--output', required=True, help="snapshot directory, or a path ending in .zip")
+    args = parser.parse_args()
+
+    exports = {'card': args.card, 'transaction': args.transaction, 'redemption': args.redemption}
+    if args.store:
+        report = campaign_report_from_store(AggregateStore(args.store))
+        sources = {'store': os.path.abspath(args.store)}
+    elif all(exports.values()):
+        report = build_campaign_report(args.card, args.transaction, args.redemption, approximate=args.approximate)
+        sources = export_sources(exports)
+    else:
+        parser.error("give --card, --transaction and --redemption, or --store")
+
+    generated = {key: getattr(args, key) for key in GENERATED_KEYS}
+    print(f"Snapshot written to {save_snapshot(report, args.output, generated, sources)}")
+
+
+if __name__ == '__main__':
+    main()
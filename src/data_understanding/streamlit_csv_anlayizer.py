@@ -1,104 +1,141 @@
+import io
+
 import streamlit as st
-import pandas as pd
-from scipy.stats import skew
-import time
+from engine.cache import ResultCache, content_hash
+from engine.duplicates import find_duplicates
+from engine.instrumentation import stages_frame, stages_to_json, stages_to_prometheus
+from engine.jobs import shared_service
+from engine.lazy import LazyProfile, page
+from engine.parallel import WORKERS, analyze_csv_parallel
+from engine.profiler import analyze_csv
+from engine.sampling import progressive_estimates
+from engine.streaming import profile_csv_chunked
 
-def analyze_csv(file):
-    # Read the CSV file
-    df = pd.read_csv(file)
-    
-    # Get the first few rows (head)
-    head = df.head()
-    
-    # Data format of every column
-    data_format = pd.DataFrame(df.dtypes, columns=['Data Type'])
-    
-    # Calculate missing values
-    missing_values = df.isnull().sum().to_frame('Missing Values')
-    missing_percentage = (df.isnull().sum() / len(df) * 100).to_frame('Percentage Missing')
-    missing_info = pd.concat([missing_values, missing_percentage], axis=1)
-    
-    # Duplicate understanding
-    duplicate_count = df.duplicated().sum()
-    duplicate_columns = df.apply(lambda x: x.duplicated().sum()).to_frame('Duplicate Count')
-    
-    # Compute basic statistics
-    basic_stats = df.describe()
-    
-    # Row count
-    row_count = len(df)
-    
-    # Identification of qualitative and quantitative attributes
-    qualitative_attributes = df.select_dtypes(include=['object', 'category']).columns.tolist()
-    quantitative_attributes = df.select_dtypes(include=['number']).columns.tolist()
-    
-    # Summary reports for qualitative attributes
-    summary_reports_qual = {}
-    for col in qualitative_attributes:
-        frequencies = df[col].value_counts().to_frame('Frequency')
-        percentages = (df[col].value_counts(normalize=True) * 100).to_frame('Percentage')
-        summary_report = pd.concat([frequencies, percentages], axis=1)
-        summary_reports_qual[col] = summary_report
-    
-    # Summary reports for quantitative attributes
-    summary_reports_quant = {}
-    for col in quantitative_attributes:
-        descriptive_stats = df[col].describe().to_frame().T
-        variance = df[col].var()
-        std_dev = df[col].std()
-        skewness = skew(df[col].dropna())
-        
-        summary_report = descriptive_stats.copy()
-        summary_report['Variance'] = variance
-        summary_report['Standard Deviation'] = std_dev
-        summary_report['Skewness'] = skewness
-        
-        summary_reports_quant[col] = summary_report
-    
-    # Analysis against qualitative and quantitative attributes
-    analysis_results = {}
-    for qual_col in qualitative_attributes:
-        for quant_col in quantitative_attributes:
-            group_stats = df.groupby(qual_col)[quant_col].agg([
-                'count',
-                'mean',
-                'std',
-                'min',
-                lambda x: x.quantile(0.25),
-                'median',
-                lambda x: x.quantile(0.75),
-                'max'
-            ]).reset_index()
-            group_stats.columns = [qual_col, 'count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
-            analysis_results[f"{quant_col} by {qual_col}"] = group_stats
-    
-    return (head, data_format, missing_info, duplicate_count, duplicate_columns, basic_stats, 
-            row_count, qualitative_attributes, quantitative_attributes, summary_reports_qual, 
-            summary_reports_quant, analysis_results)
+@st.cache_resource
+def get_result_cache():
+    return ResultCache()
+
+@st.cache_resource
+def get_job_service():
+    # One worker pool for every session of this server
+    return shared_service(get_result_cache())
+
+def paged_dataframe(frame, key):
+    # Only the selected page of a long table is sent to the browser
+    rows, pages = page(frame, 0)
+    if pages > 1:
+        number = st.number_input(f"Page (1-{pages})", min_value=1, max_value=pages, value=1, key=key)
+        rows, _ = page(frame, number - 1)
+        st.caption(f"{len(frame):,} rows in total")
+    st.dataframe(rows)
+
+def show_estimate(estimate):
+    # Every figure here comes from a sample and is marked as an estimate
+    level = f"{estimate.confidence:.0%}"
+    st.info(f"Estimates from a {estimate.sample_rows:,}-row {estimate.method} sample ({estimate.blocks:,} blocks), "
+            f"with {level} confidence intervals; replaced by the exact results when they are ready.")
+    prefix = '' if estimate.row_count_exact else '≈'
+    st.write(f"**Row Count:** {prefix}{estimate.row_count:,}")
+    st.dataframe(estimate.head)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("≈ Missing Values (%)")
+        st.dataframe(estimate.missing)
+    with col2:
+        st.subheader("≈ Means")
+        st.dataframe(estimate.means)
+    for col, table in estimate.frequencies.items():
+        st.markdown(f"**≈ Most frequent values of {col} (% of non-missing)**")
+        st.dataframe(table)
 
 # Streamlit app
 st.title("Data Analysis with CSV")
 st.write("🦸‍♂️🛠️ Visa data superhero tool engineered by Pulse AI 🛠️🦸‍♂️")
 
 uploaded_file = st.file_uploader("Upload CSV file", type=["csv"])
+streaming_mode = st.checkbox("Streaming mode for files larger than memory (reads the CSV in chunks)")
+approximate_quartiles = st.checkbox("Approximate group quartiles (t-digest sketch, faster on large files)")
+approximate_duplicates = st.checkbox("Approximate duplicate detection (Bloom filter, fixed memory; exact "
+                                     "detection keeps 16 bytes per distinct row)")
+duplicate_mode = 'approximate' if approximate_duplicates else 'exact'
+parallel_mode = st.checkbox("Parallel profiling (worker processes, for large or wide files)")
+if parallel_mode:
+    workers = st.slider("Worker processes", 1, WORKERS, WORKERS)
+    memory_per_worker = st.number_input("Memory per worker (MB, 0 = split evenly)", min_value=0, value=0, step=256)
+lazy_mode = st.checkbox("Lazy mode (computes only the analyses you open, kept for this session, not shared "
+                        "with other sessions)")
+top_k = st.number_input("Top values per qualitative column (0 = all values)", min_value=0, value=0, step=10) or None
+planned_mode = st.checkbox("Planned cross-analysis (skips ID columns, groups timestamps by day, caps the groups)")
+progressive_mode = st.checkbox("Progressive mode (estimates from a sample first, then the exact results)")
 
 if uploaded_file is not None:
     progress_bar = st.progress(0)
     status_text = st.empty()
-    
-    progress_bar.progress(10)
-    status_text.text("Reading CSV file...")
-    
-    results = analyze_csv(uploaded_file)
-    progress_bar.progress(30)
-    status_text.text("Analyzing data format...")
-    
-    (head, data_format, missing_info, duplicate_count, duplicate_columns, basic_stats, 
-     row_count, qualitative_attributes, quantitative_attributes, summary_reports_qual, 
-     summary_reports_quant, analysis_results) = results
-    
-    progress_bar.progress(50)
-    status_text.text("Generating summaries and statistics...")
+
+    # Driven by the profiler's stage spans; a cached result reports nothing
+    def report_progress(fraction, message):
+        progress_bar.progress(int(fraction * 100))
+        status_text.text(message)
+
+    cache = get_result_cache()
+    jobs = get_job_service()
+
+    first_look = st.empty()
+
+    def show_estimates(job=None):
+        # Each larger sample replaces the previous estimates until the exact job is done; the
+        # samples read their own copy of the upload, since the job reads the upload meanwhile
+        for estimate in progressive_estimates(io.BytesIO(uploaded_file.getvalue())):
+            if job is not None and job.done:
+                break
+            with first_look.container():
+                show_estimate(estimate)
+            if job is not None:
+                report_progress(job.fraction, jobs.status(job))
+
+    def run_job(func, **kwargs):
+        # Sessions submitting the same upload and options wait on the same job
+        job = jobs.submit(func, uploaded_file, **kwargs)
+        if progressive_mode:
+            show_estimates(job)
+        for job in jobs.watch(job):
+            report_progress(job.fraction, jobs.status(job))
+        return job.wait()
+
+    if lazy_mode:
+        if progressive_mode:
+            show_estimates()
+        # One in-memory profile per session, outside the shared job pool because it keeps the
+        # frame for the pairs opened later; it is rebuilt when an option it depends on changes
+        quantile_method = 'sketch' if approximate_quartiles else 'exact'
+        lazy_key = (content_hash(uploaded_file), quantile_method, top_k, planned_mode)
+        if st.session_state.get('lazy_key') != lazy_key:
+            st.session_state.lazy_profile = LazyProfile.from_csv(uploaded_file, quantile_method=quantile_method,
+                                                                 progress=report_progress, top_k=top_k,
+                                                                 planned=planned_mode)
+            st.session_state.lazy_key = lazy_key
+        lazy_profile = st.session_state.lazy_profile
+        results = lazy_profile.overview()
+    elif streaming_mode:
+        results = run_job(profile_csv_chunked, duplicate_mode=duplicate_mode, top_k=top_k)
+    elif parallel_mode:
+        results = run_job(analyze_csv_parallel, workers=workers,
+                          memory_per_worker=int(memory_per_worker * 2 ** 20) or None,
+                          quantile_method='sketch' if approximate_quartiles else 'exact', top_k=top_k)
+    else:
+        results = run_job(analyze_csv, quantile_method='sketch' if approximate_quartiles else 'exact',
+                          top_k=top_k, planned=planned_mode)
+    report_progress(1.0, "Analysis complete!")
+    first_look.empty()
+    
+    head, data_format, missing_info = results.head, results.data_format, results.missing_info
+    duplicate_count, duplicate_columns = results.duplicate_count, results.duplicate_columns
+    basic_stats, row_count = results.basic_stats, results.row_count
+    qualitative_attributes = results.qualitative_attributes
+    quantitative_attributes = results.quantitative_attributes
+    summary_reports_qual = results.summary_reports_qual
+    summary_reports_quant = results.summary_reports_quant
+    analysis_results = results.analysis_results
     
     st.subheader("First Few Rows")
     st.dataframe(head)
@@ -116,13 +153,16 @@ if uploaded_file is not None:
         st.subheader("Duplicates")
         st.write(f"Total duplicate rows: {duplicate_count}")
         st.dataframe(duplicate_columns)
+        key_columns = st.multiselect("Most repeated values of", head.columns.tolist())
+        if key_columns:
+            duplicate_report = cache.call(find_duplicates, uploaded_file, key_columns=key_columns, mode=duplicate_mode)
+            for col, top_keys in duplicate_report.top_keys.items():
+                st.markdown(f"**{col}**")
+                st.dataframe(top_keys, hide_index=True)
         
         st.subheader("Basic Statistics")
         st.dataframe(basic_stats)
 
-    progress_bar.progress(70)
-    status_text.text("Summarizing qualitative attributes...")
-    
     # Additional Information
     st.subheader("Additional Information")
     
@@ -134,29 +174,63 @@ if uploaded_file is not None:
     st.subheader("Quantitative Attributes")
     st.write(", ".join(quantitative_attributes))
 
-    progress_bar.progress(90)
-    status_text.text("Summarizing quantitative attributes...")
-    
     # Summary reports for qualitative attributes
     st.subheader("Summary Reports for Qualitative Attributes")
-    for col, report in summary_reports_qual.items():
-        st.markdown(f"**{col}**")
-        st.dataframe(report)
+    if lazy_mode:
+        if qualitative_attributes:
+            col = st.selectbox("Qualitative attribute", qualitative_attributes)
+            paged_dataframe(summary_reports_qual[col], key=f"qual_page_{col}")
+            st.caption(f"{summary_reports_qual.computed} of {len(qualitative_attributes)} frequency tables "
+                       f"computed this session")
+    else:
+        for col, report in summary_reports_qual.items():
+            st.markdown(f"**{col}**")
+            st.dataframe(report)
     
     # Summary reports for quantitative attributes
     st.subheader("Summary Reports for Quantitative Attributes")
-    for col, report in summary_reports_quant.items():
-        st.markdown(f"**{col}**")
-        st.dataframe(report)
+    if lazy_mode:
+        if quantitative_attributes:
+            col = st.selectbox("Quantitative attribute", quantitative_attributes)
+            st.dataframe(summary_reports_quant[col])
+    else:
+        for col, report in summary_reports_quant.items():
+            st.markdown(f"**{col}**")
+            st.dataframe(report)
     
     st.divider()
     
     # Analysis against qualitative and quantitative attributes
     st.subheader("Analysis of Qualitative vs Quantitative Attributes")
-    for analysis, result in analysis_results.items():
-        st.markdown(f"**{analysis}**")
-        st.dataframe(result)
-    
-    progress_bar.progress(100)
-    status_text.text("Analysis complete!")
-    progress_bar.empty()
\ No newline at end of file
+    if lazy_mode:
+        available = lazy_profile.pair_keys
+        if available:
+            qual_col, quant_col = st.selectbox("Analysis", available,
+                                               format_func=lambda pair: f"{pair[1]} by {pair[0]}")
+            paged_dataframe(lazy_profile.pair(qual_col, quant_col), key=f"pair_page_{qual_col}_{quant_col}")
+            st.caption(f"{lazy_profile.computed_pairs} of {len(available)} analyses computed this session")
+    else:
+        for analysis, result in analysis_results.items():
+            st.markdown(f"**{analysis}**")
+            st.dataframe(result)
+    
+    if results.plan is not None:
+        st.subheader("Analysis Plan")
+        st.caption(f"Semantic types and group counts estimated from {results.plan.sample_rows:,} sampled rows")
+        st.dataframe(results.plan.columns)
+        st.dataframe(results.plan.steps_frame(), hide_index=True)
+
+    stages = lazy_profile.stages if lazy_mode else results.stages
+    with st.expander("Stage timings"):
+        st.dataframe(stages_frame(stages), hide_index=True)
+        col1, col2 = st.columns(2)
+        col1.download_button("Download as JSON", stages_to_json(stages, file=uploaded_file.name),
+                             file_name="stage_timings.json", mime="application/json")
+        col2.download_button("Download as Prometheus text", stages_to_prometheus(stages, file=uploaded_file.name),
+                             file_name="stage_timings.prom", mime="text/plain")
+
+    progress_bar.empty()
+    status_text.empty()
+    st.caption(f"Result cache: {cache.hits} hits, {cache.misses} misses")
+    with st.expander("Analysis jobs on this server"):
+        st.dataframe(jobs.jobs_frame(), hide_index=True)
\ No newline at end of file
@@ -0,0 +1,60 @@
+import json
+import sys
+
+import pandas as pd
+import pytest
+
+import batch_report
+from batch_report import report_names
+
+
+def run_main(monkeypatch, *args):
+    monkeypatch.setattr(sys, 'argv', ['batch_report.py', *map(str, args)])
+    batch_report.main()
+
+
+@pytest.fixture
+def exports(tmp_path):
+    for folder in ('a', 'b'):
+        (tmp_path / folder).mkdir()
+        pd.DataFrame({'merchant': ['x', 'y', 'x'], 'amount': [1.0, 2.0, 4.0]}).to_csv(
+            tmp_path / folder / 'sales.csv', index=False)
+    pd.DataFrame({'status': ['ok', 'ok'], 'value': [3, 5]}).to_csv(tmp_path / 'a' / 'index.csv', index=False)
+    return tmp_path
+
+
+def test_report_names_are_distinct():
+    names = report_names(['a/sales.csv', 'b/sales.csv', 'c/sales.tsv', 'index.csv', 'summary.csv'])
+    assert names == {'a/sales.csv': 'sales', 'b/sales.csv': 'sales-2', 'c/sales.tsv': 'sales-3',
+                     'index.csv': 'index-2', 'summary.csv': 'summary-2'}
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_main_writes_every_report(exports, monkeypatch, streaming):
+    output = exports / 'reports'
+    run_main(monkeypatch, str(exports / '*' / '*.csv'), '--output', output, '--jobs', 2, '--plotlyjs', 'cdn',
+             *(['--streaming'] if streaming else []))
+
+    summary = json.loads((output / 'summary.json').read_text())
+    assert summary['files'] == 3 and summary['failed'] == 0
+    assert sorted(entry['name'] for entry in summary['reports']) == ['index-2', 'sales', 'sales-2']
+    for entry in summary['reports']:
+        document = json.loads((output / entry['json']).read_text())
+        assert document['row_count'] == entry['rows'] == (2 if entry['name'] == 'index-2' else 3)
+        assert (output / entry['html']).read_text().startswith('<!DOCTYPE html>')
+    index = (output / 'index.html').read_text()
+    assert all(f'href="{name}.html"' in index for name in ('index-2', 'sales', 'sales-2'))
+
+
+def test_a_failing_file_exits_with_status_1(exports, monkeypatch):
+    (exports / 'a' / 'empty.csv').write_text('')
+    output = exports / 'reports'
+    with pytest.raises(SystemExit) as exit_info:
+        run_main(monkeypatch, str(exports / 'a' / '*.csv'), '--output', output, '--plotlyjs', 'cdn')
+
+    assert exit_info.value.code == 1
+    summary = json.loads((output / 'summary.json').read_text())
+    assert summary['files'] == 2 and summary['failed'] == 1
+    failed = next(entry for entry in summary['reports'] if 'error' in entry)
+    assert failed['name'] == 'empty' and failed['error'].startswith('EmptyDataError')
+    assert not (output / 'empty.html').exists() and (output / 'sales.html').exists()
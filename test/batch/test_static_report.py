@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from engine.profiler import analyze_csv
+from static_report import profile_html, profile_to_dict, render_html, table_record
+
+
+def test_tables_are_cut_to_max_rows():
+    frame = pd.DataFrame({'value': [1.0, np.nan, 3.0, 4.0]}, index=list('abcd'))
+    record = table_record(frame, max_rows=2)
+    assert record == {'columns': ['value'], 'index': ['a', 'b'], 'data': [[1.0], [None]], 'rows': 4}
+
+    page = render_html('<Sales>', {'Values': frame}, [], max_rows=2)
+    assert '<title>&lt;Sales&gt;</title>' in page
+    assert 'First 2 of 4 rows' in page
+
+
+def test_profile_rendering(tmp_path):
+    path = tmp_path / 'sales.csv'
+    pd.DataFrame({'merchant': ['x', 'y', 'x', 'x'], 'amount': [1.0, 2.0, 4.0, 1.0]}).to_csv(path, index=False)
+    result = analyze_csv(path)
+
+    document = profile_to_dict(result, 'sales.csv', max_rows=1)
+    assert document['row_count'] == 4
+    assert document['tables']['head']['rows'] == 4 and len(document['tables']['head']['data']) == 1
+    assert document['summary_reports_qual']['merchant']['index'] == ['x']
+    assert 'Data Analysis of sales.csv' in profile_html(result, 'sales.csv')
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The engine and the apps import each other as top-level modules from src/data_understanding
+SOURCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'data_understanding')
+sys.path.insert(0, SOURCE)
+sys.path.insert(0, os.path.join(SOURCE, 'report_generation'))
+sys.path.insert(0, os.path.join(SOURCE, 'batch'))
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.aggregate_store import AggregateStore
+
+
+@pytest.fixture
+def exports():
+    rng = np.random.default_rng(9)
+    rows = 6000
+
+    def times(count):
+        return pd.Timestamp('2024-05-01') + pd.to_timedelta(rng.integers(0, 10 * 86400, count), 's')
+
+    card = pd.DataFrame({
+        'cardholder_id': [f"h{i}" for i in rng.integers(0, 1500, rows)],
+        'card_id': [f"c{i}" for i in rng.integers(0, 4000, rows)],
+        'issuer_bin': rng.choice([411111, 422222, 433333], rows),
+        'created_at': times(rows),
+    })
+    transaction = pd.DataFrame({
+        'transaction_id': np.arange(rows * 2),
+        'transaction_amount': rng.integers(100, 9000, rows * 2).astype('float64'),
+        'cashback_amount': rng.integers(0, 300, rows * 2).astype('float64'),
+    })
+    redemption = pd.DataFrame({
+        'transaction_id': rng.choice(rows * 2, rows, replace=False),
+        'cashback_amount': rng.integers(0, 300, rows).astype('float64'),
+        'name': rng.choice(['Shop A', 'Shop B', 'Cafe'], rows),
+        'created_at': times(rows),
+    })
+    return {'card': card, 'transaction': transaction, 'redemption': redemption}
+
+
+def assert_same_aggregates(store, other):
+    assert store.unique_cardholders() == other.unique_cardholders()
+    assert store.unique_cards() == other.unique_cards()
+    pd.testing.assert_series_equal(store.card_histogram, other.card_histogram, check_names=False,
+                                   check_index_type=False)
+    pd.testing.assert_series_equal(store.issuer_cards.sort_index(), other.issuer_cards.sort_index(),
+                                   check_names=False, check_index_type=False)
+    pd.testing.assert_series_equal(store.merchant_cashback.sort_index(), other.merchant_cashback.sort_index(),
+                                   check_names=False)
+    pd.testing.assert_frame_equal(store.card_rollup, other.card_rollup, check_names=False)
+    pd.testing.assert_frame_equal(store.redemption_rollup, other.redemption_rollup, check_names=False)
+    for dataset in ('transaction', 'redemption'):
+        assert store.distinct_count(dataset) == other.distinct_count(dataset)
+        assert store.total(dataset, 'cashback_amount') == pytest.approx(other.total(dataset, 'cashback_amount'))
+
+
+def test_deltas_equal_a_full_rebuild(exports, tmp_path):
+    incremental = AggregateStore(tmp_path / 'incremental')
+    for dataset, df in exports.items():
+        for number, delta in enumerate(np.array_split(np.arange(len(df)), 4)):
+            assert incremental.update(dataset, df.iloc[delta], f"{dataset}-{number}")
+    rebuilt = AggregateStore(tmp_path / 'rebuilt')
+    for dataset, df in exports.items():
+        rebuilt.update(dataset, df, dataset)
+    assert_same_aggregates(incremental, rebuilt)
+
+
+def test_aggregates_match_pandas(exports, tmp_path):
+    store = AggregateStore(tmp_path / 'store')
+    for dataset, df in exports.items():
+        store.update(dataset, df, dataset)
+    card, redemption = exports['card'], exports['redemption']
+
+    assert store.unique_cardholders() == card['cardholder_id'].nunique()
+    assert store.unique_cards() == card['card_id'].nunique()
+    histogram = card.groupby('cardholder_id')['card_id'].count().value_counts().sort_index()
+    pd.testing.assert_series_equal(store.card_histogram, histogram, check_names=False, check_index_type=False)
+    issuer_cards = card.groupby('issuer_bin')['card_id'].nunique()
+    pd.testing.assert_series_equal(store.issuer_cards.sort_index(), issuer_cards, check_names=False,
+                                   check_index_type=False)
+    merchants = redemption.groupby('name')['cashback_amount'].sum()
+    pd.testing.assert_series_equal(store.merchant_cashback.sort_index(), merchants, check_names=False)
+    assert store.mean('transaction', 'transaction_amount') == pytest.approx(
+        exports['transaction']['transaction_amount'].mean())
+    assert store.distinct_count('redemption') == pytest.approx(len(redemption), rel=0.04)
+
+
+def test_saved_store_reloads_and_ignores_repeated_deltas(exports, tmp_path):
+    store = AggregateStore(tmp_path / 'store')
+    for dataset, df in exports.items():
+        store.update(dataset, df, dataset)
+    store.save()
+
+    reloaded = AggregateStore(tmp_path / 'store')
+    assert_same_aggregates(reloaded, store)
+    assert not reloaded.update('card', exports['card'], 'card')
+    assert reloaded.unique_cards() == store.unique_cards()
+    with pytest.raises(ValueError):
+        reloaded.update('merchant', exports['card'], 'merchant')
+
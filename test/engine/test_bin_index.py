@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.bin_index import BinIndex
+from functionalities.top_issuers import BIN_TABLE, UNKNOWN_ISSUER, issuer_names
+
+TABLE = pd.DataFrame({
+    'bin_low': [4111, 411100, 41110050, 412345, 5000],
+    'bin_high': [4111, 411150, 41110099, 412345, 5999],
+    'issuer': ['Four', 'Six', 'Eight', 'Single', 'Master'],
+})
+
+
+def longest_prefix(bin_value):
+    # Reference: the longest range whose card numbers include all of the BIN's
+    if pd.isna(bin_value):
+        return None
+    text = str(int(bin_value))
+    best = None
+    for row in TABLE.itertuples():
+        digits = len(str(row.bin_low))
+        if len(text) < digits:
+            continue
+        if row.bin_low <= int(text[:digits]) <= row.bin_high and (best is None or digits > best[0]):
+            best = (digits, row.issuer)
+    return best[1] if best else None
+
+
+def test_lookup_matches_longest_prefix():
+    index = BinIndex.from_frame(TABLE)
+    bins = pd.Series([411100, 41110075, 41110049, 4111, 411170, 412345, 5500, 6011, None, 411150],
+                     index=list('abcdefghij'))
+
+    names = index.lookup(bins, default=None)
+
+    assert names.index.equals(bins.index)
+    assert list(names) == [longest_prefix(value) for value in bins]
+    # A 6-digit query only partly inside an 8-digit range gets the enclosing 6-digit range
+    assert names['a'] == 'Six'
+
+
+@pytest.mark.parametrize('bins', [[411100, 6011], np.array([411100, 6011]), pd.Index([411100, 6011])])
+def test_lookup_accepts_sequences(bins):
+    names = BinIndex.from_frame(TABLE).lookup(bins, default='Unknown')
+    assert list(names) == ['Six', 'Unknown']
+    assert names.index.equals(pd.RangeIndex(2))
+
+
+def test_load_and_validation(tmp_path):
+    path = tmp_path / 'bins.csv'
+    TABLE.drop(columns='bin_high').iloc[:2].to_csv(path, index=False)
+    index = BinIndex.load(path)
+    assert len(index) == 2
+    assert list(index.lookup([41115, 411100])) == ['Four', 'Six']
+
+    with pytest.raises(ValueError):
+        BinIndex([411100], [4111], ['bad'])
+    empty = BinIndex([], [], [])
+    assert list(empty.lookup([411100], default='none')) == ['none']
+
+
+def test_shipped_table_has_one_unknown_bucket():
+    table = pd.read_csv(BIN_TABLE)
+    assert not table['issuer'].str.fullmatch('unknown( issuer)?', case=False).any()
+    assert list(issuer_names(pd.Series([4162, 4097]))) == [UNKNOWN_ISSUER, 'CAJA AHORROS GERONA']
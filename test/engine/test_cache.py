@@ -0,0 +1,98 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from engine.cache import CACHE_VERSION, ResultCache, cache_key, content_hash
+
+
+def summarize(source, scale=1):
+    return {'frame': pd.DataFrame({'value': [len(source) * scale]}), 'scale': scale}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(tmp_path / 'cache', max_bytes=10 ** 9, shared=(tmp_path / 'ingest',),
+                       reserved=(tmp_path / 'store',))
+
+
+def test_call_hits_on_the_same_content(cache):
+    first = cache.call(summarize, b'abc', scale=2)
+    second = cache.call(summarize, bytearray(b'abc'), scale=2)
+    assert (cache.hits, cache.misses) == (1, 1)
+    pd.testing.assert_frame_equal(first['frame'], second['frame'])
+    cache.call(summarize, b'abc', scale=3)
+    assert cache.misses == 2
+
+
+def test_keys_ignore_progress_callbacks(cache):
+    cache.call(summarize, b'abc', scale=2)
+    assert cache.get(cache_key(content_hash(b'abc'), summarize, (), {'scale': 2}))[0]
+
+
+def test_stream_caches_the_last_result(cache):
+    def partial_results(source, scale=1):
+        yield 'partial'
+        yield summarize(source, scale)
+
+    streamed = list(cache.stream(summarize, partial_results, b'abcd'))
+    assert streamed[0] == 'partial'
+    assert cache.call(summarize, b'abcd')['frame'].iloc[0, 0] == 4
+    assert cache.hits == 1
+
+
+def test_keys_change_with_the_cache_version(monkeypatch):
+    key = cache_key('hash', summarize, (), {'scale': 2})
+    monkeypatch.setattr('engine.cache.CACHE_VERSION', CACHE_VERSION + 1)
+    assert cache_key('hash', summarize, (), {'scale': 2}) != key
+
+
+# Empty, garbage, truncated, and classes that no longer exist
+@pytest.mark.parametrize('content', [b'', b'not a pickle', b'\x80\x04\x95\x10',
+                                     b'cengine.no_such_module\nGone\n.', b'cengine.cache\nGone\n.'])
+def test_unreadable_entries_are_misses_and_removed(cache, content):
+    cache.put('entry', {'scale': 1})
+    with open(os.path.join(cache.directory, 'entry', 'result.pkl'), 'wb') as f:
+        f.write(content)
+
+    assert cache.get('entry') == (False, None)
+    assert cache.misses == 1
+    assert not os.path.exists(os.path.join(cache.directory, 'entry'))
+    # The next call computes and stores the result again
+    assert cache.call(summarize, b'abc')['scale'] == 1
+    assert cache.call(summarize, b'abc')['scale'] == 1 and cache.hits == 1
+
+
+def write(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+
+
+def test_eviction_covers_shared_files_and_counts_reserved(tmp_path):
+    write(tmp_path / 'store' / 'manifest.json', 40_000)
+    write(tmp_path / 'ingest' / 'old.parquet', 30_000)
+    write(tmp_path / 'ingest' / 'new.parquet', 30_000)
+    past = time.time() - 100
+    os.utime(tmp_path / 'ingest' / 'old.parquet', (past, past))
+    cache = ResultCache(tmp_path / 'cache', max_bytes=100_000, shared=(tmp_path / 'ingest',),
+                        reserved=(tmp_path / 'store',))
+
+    cache.put('entry', b'y' * 20_000)
+
+    # The oldest ingest copy goes; the store is never evicted
+    assert not (tmp_path / 'ingest' / 'old.parquet').exists()
+    assert (tmp_path / 'ingest' / 'new.parquet').exists()
+    assert (tmp_path / 'store' / 'manifest.json').exists()
+    assert cache.get('entry')[0]
+    assert cache.size() <= 100_000
+
+
+def test_evict_keeps_the_given_paths(tmp_path):
+    write(tmp_path / 'ingest' / 'copy.parquet', 50_000)
+    cache = ResultCache(tmp_path / 'cache', max_bytes=1000, shared=(tmp_path / 'ingest',), reserved=())
+    cache.evict(keep=[tmp_path / 'ingest' / 'copy.parquet'])
+    assert (tmp_path / 'ingest' / 'copy.parquet').exists()
+    cache.evict()
+    assert not (tmp_path / 'ingest' / 'copy.parquet').exists()
@@ -0,0 +1,91 @@
+import json
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+import pytest
+
+from engine.charts import (CHART_TELEMETRY, FigureStats, category_bar_chart, downsample, figure_stats,
+                           finish_figure, lttb, minmax, telemetry_frame, time_series_chart, top_categories)
+from engine.heavy_hitters import OTHER
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    x = pd.date_range('2024-01-01', periods=10_000, freq='min')
+    y = np.sin(np.arange(10_000) / 500) + rng.normal(scale=0.05, size=10_000)
+    y[4321] = 10
+    return pd.DataFrame({'time': x, 'value': y})
+
+
+@pytest.mark.parametrize('method', [lttb, minmax])
+def test_downsampling_keeps_ends_and_the_spike(series, method):
+    kept = method(series['time'], series['value'], 200)
+    assert kept[0] == 0 and kept[-1] == len(series) - 1
+    assert (np.diff(kept) > 0).all()
+    assert len(kept) <= 200
+    assert 4321 in kept
+    # Fewer points than the budget are kept as they are
+    assert list(method(series['time'][:50], series['value'][:50], 200)) == list(range(50))
+
+
+def test_lttb_keeps_the_point_budget(series):
+    assert len(lttb(series['time'], series['value'], 300)) == 300
+
+
+def test_minmax_keeps_every_column_extreme(series):
+    kept = set(minmax(series['time'], series['value'], 102))
+    x = series['time'].astype('int64').to_numpy(dtype=np.float64)
+    column = np.minimum(((x - x[0]) / (x[-1] - x[0]) * 50).astype(np.int64), 49)
+    grouped = series['value'].groupby(column)
+    assert set(grouped.idxmin()) <= kept and set(grouped.idxmax()) <= kept
+
+
+def test_downsample_sorts_and_drops_missing(series):
+    shuffled = series.sample(frac=1, random_state=1)
+    shuffled.loc[shuffled.index[:10], 'value'] = np.nan
+    line = downsample(shuffled, 'time', 'value', points=100)
+    assert line['time'].is_monotonic_increasing and line['value'].notna().all()
+    assert len(line) == 100
+
+
+def test_top_categories_sums_the_rest():
+    frame = pd.DataFrame({'issuer': [f"bank {i}" for i in range(40)], 'cards': np.arange(40, 0, -1)})
+    top = top_categories(frame, 'issuer', 'cards', n=10)
+    assert len(top) == 11
+    assert list(top['issuer'][:10]) == list(frame['issuer'][:10])
+    assert top['issuer'].iloc[-1] == f"{OTHER} (30)"
+    assert top['cards'].sum() == frame['cards'].sum()
+    # One row over n is shown as it is rather than as an OTHER bar of one
+    assert OTHER not in ''.join(top_categories(frame.iloc[:11], 'issuer', 'cards', n=10)['issuer'])
+
+
+def test_charts_stay_within_the_budget(series):
+    daily = series.iloc[:20]
+    assert time_series_chart(daily, 'time', 'value', 'Short', max_bars=60).data[0].type == 'bar'
+    line = time_series_chart(series, 'time', 'value', 'Long', max_bars=60, points=500)
+    assert line.data[0].type == 'scatter' and len(line.data[0].x) == 500
+    frame = pd.DataFrame({'label': list('abcdefgh'), 'value': range(8)})
+    assert len(category_bar_chart(frame, 'label', 'value', 'Bars', n=3).data[0].x) == 4
+
+
+def test_finish_figure_uses_webgl_and_records_telemetry():
+    x = np.arange(5000)
+    fig = go.Figure([go.Scatter(x=x, y=x * 2, mode='lines'), go.Scatter(x=x[:10], y=x[:10])])
+    fig.update_layout(title='Large')
+    before = len(CHART_TELEMETRY)
+
+    finish_figure(fig, source_rows=123)
+
+    assert [trace.type for trace in fig.data] == ['scattergl', 'scatter']
+    assert len(CHART_TELEMETRY) == before + 1
+    stats = CHART_TELEMETRY[-1]
+    assert (stats.title, stats.traces, stats.points, stats.source_rows, stats.webgl) == ('Large', 2, 5010, 123, True)
+    # A stored JSON spec measures the same
+    spec = figure_stats(json.loads(pio.to_json(fig, validate=False)), source_rows=123)
+    assert (spec.traces, spec.points, spec.webgl) == (2, 5010, True)
+    assert spec.json_bytes == stats.json_bytes
+    frame = telemetry_frame([stats])
+    assert list(frame.columns) == list(FigureStats.__dataclass_fields__)
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from engine.compact import IdDictionary, SharedDictionaries, compact_frame, downcast_numeric
+
+
+def test_codes_are_shared_and_round_trip():
+    dictionaries = SharedDictionaries()
+    cards = pd.DataFrame({'card_id': ['c1', 'c2', None, 'c1'], 'amount': [100.0, 250.0, 300.0, 5.0]})
+    transactions = pd.DataFrame({'card_id': ['c2', 'c3', 'c1']})
+    encoded_cards = compact_frame(cards, dictionaries)
+    encoded_transactions = compact_frame(transactions, dictionaries)
+
+    assert list(encoded_cards['card_id'].iloc[[0, 1, 3]]) == [0, 1, 0]
+    assert encoded_cards['card_id'].isna().iloc[2]
+    assert list(encoded_transactions['card_id']) == [1, 2, 0]
+    decoded = dictionaries['card_id'].decode(encoded_cards['card_id'])
+    assert list(decoded[[0, 1, 3]]) == ['c1', 'c2', 'c1'] and pd.isna(decoded[2])
+    assert encoded_cards['card_id'].nunique() == cards['card_id'].nunique()
+    assert encoded_cards['amount'].dtype.kind == 'i'
+
+
+def test_many_batches_match_one_factorize():
+    rng = np.random.default_rng(7)
+    values = pd.Series([f"id-{i}" for i in rng.integers(0, 20_000, 100_000)])
+    dictionary = IdDictionary()
+    codes = np.concatenate([np.asarray(dictionary.encode(values.iloc[start:start + 2700]))
+                            for start in range(0, len(values), 2700)])
+    expected, uniques = pd.factorize(values)
+    np.testing.assert_array_equal(codes, expected)
+    assert len(dictionary) == len(uniques)
+    # Chunks are merged as they grow, so lookups search few of them
+    assert len(dictionary._chunks) <= np.log2(37) + 1
+    pd.testing.assert_index_equal(dictionary.values, pd.Index(uniques, dtype=object))
+
+
+def test_lookup_does_not_grow_the_dictionary():
+    dictionary = IdDictionary()
+    dictionary.encode(pd.Series(['a', 'b']))
+    assert list(dictionary.lookup(['b', 'zzz', None])) == [1, -1, -1]
+    assert len(dictionary) == 2
+
+
+def test_downcast_keeps_every_value():
+    integral = pd.Series([1.0, 2.0, 70_000.0])
+    fractional = pd.Series([1.5, 2.0])
+    assert downcast_numeric(integral).dtype == np.int32
+    assert downcast_numeric(fractional).dtype == np.float64
+    assert (downcast_numeric(integral) == integral).all()
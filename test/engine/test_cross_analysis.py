@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.cross_analysis import STAT_COLUMNS, cross_analysis_table, pair_table, pair_tables
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(4)
+    rows = 20_000
+    df = pd.DataFrame({
+        'merchant': rng.choice(['A', 'B', 'C', 'D'], rows),
+        'channel': rng.choice(['web', 'store', None], rows),
+        'amount': rng.integers(0, 1000, rows).astype('float64'),
+        'rate': rng.normal(size=rows),
+    })
+    df.loc[rng.choice(rows, 300), 'amount'] = np.nan
+    return df
+
+
+def test_batched_table_matches_per_pair_describe(frame):
+    table = cross_analysis_table(frame, ['merchant', 'channel'], ['amount', 'rate'])
+    assert len(table) == (4 + 2) * 2
+    for qual_col in ['merchant', 'channel']:
+        for quant_col in ['amount', 'rate']:
+            expected = frame.groupby(qual_col)[quant_col].describe()
+            pair = pair_table(table, qual_col, quant_col).set_index(qual_col)
+            pd.testing.assert_frame_equal(pair, expected[STAT_COLUMNS], check_dtype=False, check_names=False)
+
+
+def test_pair_tables_are_keyed_like_the_analyzers(frame):
+    table = cross_analysis_table(frame, ['merchant'], ['amount', 'rate'])
+    assert list(pair_tables(table)) == ['amount by merchant', 'rate by merchant']
+
+
+def test_sketch_quartiles_are_close(frame):
+    exact = cross_analysis_table(frame, ['merchant'], ['rate'])
+    sketch = cross_analysis_table(frame, ['merchant'], ['rate'], quantile_method='sketch', rank_error=0.01)
+    pd.testing.assert_frame_equal(sketch[['group', 'count', 'mean', 'min', 'max']],
+                                  exact[['group', 'count', 'mean', 'min', 'max']])
+    # Quartiles of a standard normal: 0.01 in rank is about 0.03 in value
+    np.testing.assert_allclose(sketch[['25%', '50%', '75%']], exact[['25%', '50%', '75%']], atol=0.05)
+
+
+def test_no_quantitative_columns_gives_an_empty_table(frame):
+    assert cross_analysis_table(frame, ['merchant'], []).empty
+
+
+def test_unknown_quantile_method(frame):
+    with pytest.raises(ValueError):
+        cross_analysis_table(frame, ['merchant'], ['rate'], quantile_method='median')
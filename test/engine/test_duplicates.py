@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.duplicates import BloomFilter, DuplicateDetector, KeyCounts, find_duplicates
+
+
+@pytest.fixture
+def redemptions(tmp_path):
+    rng = np.random.default_rng(10)
+    rows = 20_000
+    df = pd.DataFrame({
+        'transaction_id': rng.integers(0, 15_000, rows),
+        'merchant': rng.choice(['A', 'B', None], rows),
+        'cashback_amount': rng.integers(0, 50, rows).astype('float64'),
+    })
+    df.loc[rng.choice(rows, 100), 'cashback_amount'] = np.nan
+    df = pd.concat([df, df.sample(500, random_state=1)], ignore_index=True)
+    path = tmp_path / 'redemption_data.csv'
+    df.to_csv(path, index=False)
+    return df, path
+
+
+def test_exact_mode_matches_duplicated(redemptions):
+    df, path = redemptions
+    report = find_duplicates(path, key_columns=['transaction_id'], chunksize=3000)
+
+    assert report.row_count == len(df)
+    assert report.duplicate_rows == df.duplicated().sum()
+    for col in df.columns:
+        assert report.duplicate_columns.loc[col, 'Duplicate Count'] == df[col].duplicated().sum()
+    counts = df['transaction_id'].value_counts()
+    top = report.top_keys['transaction_id']
+    assert list(top['Occurrences']) == list(counts.iloc[:len(top)])
+    assert (counts[top['transaction_id']].to_numpy() == top['Occurrences'].to_numpy()).all()
+
+
+def test_approximate_mode_only_overcounts(redemptions):
+    df, path = redemptions
+    report = find_duplicates(path, mode='approximate', chunksize=3000, capacity=50_000, error_rate=0.01)
+    exact = df.duplicated().sum()
+    assert exact <= report.duplicate_rows <= exact + 0.01 * len(df)
+    distinct = df['transaction_id'].nunique()
+    counted = report.duplicate_columns.loc['transaction_id', 'Duplicate Count']
+    assert df['transaction_id'].duplicated().sum() <= counted <= len(df) - distinct * (1 - 0.01)
+
+
+def test_int_and_float_chunks_match_each_other():
+    detector = DuplicateDetector()
+    detector.update(pd.DataFrame({'amount': [1, 2]}))
+    detector.update(pd.DataFrame({'amount': [2.0, np.nan]}))
+    assert detector.report().duplicate_rows == 1
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    hashes = pd.util.hash_array(np.arange(1000))
+    bloom.add(hashes)
+    assert bloom.add(hashes).all()
+
+
+def test_unknown_key_column():
+    with pytest.raises(KeyError):
+        DuplicateDetector(key_columns=['missing']).update(pd.DataFrame({'a': [1]}))
+
+
+def test_key_counts_match_a_counter_across_runs(tmp_path):
+    rng = np.random.default_rng(4)
+    counts = KeyCounts()
+    reference = {}
+    for _ in range(40):
+        keys, batch = np.unique(rng.integers(0, 3000, 200).astype(np.uint64), return_counts=True)
+        before, found = counts.add(keys, batch.astype(np.int64))
+        assert before.tolist() == [reference.get(key, 0) for key in keys.tolist()]
+        assert found.tolist() == [key in reference for key in keys.tolist()]
+        for key, count in zip(keys.tolist(), batch.tolist()):
+            reference[key] = reference.get(key, 0) + count
+        # Runs shrink in size, so there are O(log n) of them
+        assert len(counts.runs) <= np.log2(len(counts)) + 1
+    assert len(counts) == len(reference)
+    counts.save(tmp_path / 'counts.npz')
+    loaded = KeyCounts.load(tmp_path / 'counts.npz')
+    assert loaded.keys.tolist() == sorted(reference)
+    assert loaded.counts.tolist() == [reference[key] for key in sorted(reference)]
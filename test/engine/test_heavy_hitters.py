@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.heavy_hitters import OTHER, SpaceSaving, top_values
+
+
+def zipf_values(rows=50_000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.Series(rng.zipf(1.3, rows) % 5000).map('v{}'.format)
+
+
+def test_exact_below_capacity():
+    values = pd.Series(list('aabbbcd') * 10 + [None])
+    summary = SpaceSaving(capacity=10, name='letter')
+    for start in range(0, len(values), 9):
+        summary.update(values.iloc[start:start + 9])
+    result = summary.result(3)
+
+    assert result.exact and not summary.evicted
+    pd.testing.assert_series_equal(result.counts, values.value_counts().iloc[:3], check_names=False)
+    assert result.counts.index.name == 'letter'
+    assert (result.total, result.distinct) == (70, 4)
+
+
+def test_space_saving_bounds():
+    values = zipf_values()
+    true = values.value_counts()
+    summary = SpaceSaving(capacity=200)
+    for start in range(0, len(values), 5000):
+        summary.update(values.iloc[start:start + 5000])
+    result = summary.result(20)
+
+    assert summary.evicted and not result.exact
+    assert result.total == len(values)
+    counts, errors = result.counts, result.errors
+    # Never below the true count, above it by at most the error, which is at most total / capacity
+    assert (counts >= true[counts.index]).all()
+    assert (counts - errors <= true[counts.index]).all()
+    assert errors.max() <= len(values) / 200
+    # Every value more frequent than the floor is monitored
+    assert set(true[true > summary.floor].index) <= set(summary.counts.index)
+    assert list(counts.index[:5]) == list(true.index[:5])
+    assert result.distinct == pytest.approx(true.size, rel=0.05)
+
+
+def test_table_has_an_other_bucket():
+    values = pd.Series(['a'] * 5 + ['b'] * 3 + ['c', 'd'])
+    table = top_values(values, 2).table()
+
+    assert list(table.index) == ['a', 'b', OTHER]
+    assert list(table['Frequency']) == [5, 3, 2]
+    assert list(table['Percentage']) == [50.0, 30.0, 20.0]
+    assert table['Error'].sum() == 0
+    # All values fit: no bucket
+    assert OTHER not in top_values(values, 4).table().index
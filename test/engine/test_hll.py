@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.hll import (HyperLogLog, daily_sketches, distinct_count, save_sketches, union_saved)
+
+
+def ids(count, start=0):
+    return pd.Series([f"card-{i}" for i in range(start, start + count)])
+
+
+@pytest.mark.parametrize('count', [10, 1_000, 200_000])
+def test_estimate_within_error(count):
+    values = pd.concat([ids(count), ids(count // 2)])
+    sketch = HyperLogLog.from_values(values)
+    # Four standard errors
+    assert sketch.count() == pytest.approx(count, rel=4 * sketch.relative_error())
+
+
+def test_missing_values_are_ignored():
+    assert HyperLogLog.from_values([None, np.nan, 'a', 'a', 'b']).count() == 2
+
+
+
+def test_ids_read_as_int_or_float_hash_alike():
+    # A chunk with a missing ID reads the column as float64
+    as_int = HyperLogLog.from_values(pd.Series(np.arange(5000, dtype='int64')))
+    as_float = HyperLogLog.from_values(pd.Series(np.append(np.arange(5000, dtype='float64'), np.nan)))
+    np.testing.assert_array_equal(as_int.registers, as_float.registers)
+    assert as_int.merge(as_float).count() == as_int.count()
+    as_int32 = HyperLogLog.from_values(pd.Series(np.arange(-10, 10, dtype='int32')))
+    np.testing.assert_array_equal(as_int32.registers,
+                                  HyperLogLog.from_values(pd.Series(np.arange(-10, 10.0))).registers)
+    assert HyperLogLog.from_values([0.5, 1.5, 1.0, 1]).count() == 3
+
+def test_merge_equals_sketch_of_the_union():
+    left, right = ids(50_000), ids(50_000, start=30_000)
+    merged = HyperLogLog.from_values(left).merge(HyperLogLog.from_values(right))
+    union = HyperLogLog.from_values(pd.concat([left, right]))
+    np.testing.assert_array_equal(merged.registers, union.registers)
+
+
+def test_bytes_round_trip():
+    sketch = HyperLogLog.from_values(ids(1000), precision=10)
+    restored = HyperLogLog.from_bytes(sketch.to_bytes())
+    assert restored.precision == 10
+    np.testing.assert_array_equal(restored.registers, sketch.registers)
+
+
+def test_daily_sketches_union_matches_nunique(tmp_path):
+    rng = np.random.default_rng(5)
+    rows = 30_000
+    df = pd.DataFrame({'card_id': rng.integers(0, 8000, rows).astype(str),
+                       'created_at': pd.Timestamp('2024-05-01') + pd.to_timedelta(rng.integers(0, 7 * 86400, rows), 's')})
+    sketches = daily_sketches(df, 'card_id')
+    assert len(sketches) == 7
+    save_sketches(tmp_path, 'cards', sketches)
+    union = union_saved(tmp_path, 'cards')
+    assert union.count() == pytest.approx(df['card_id'].nunique(), rel=4 * union.relative_error())
+    day = str(min(sketches))
+    first_day = df[pd.to_datetime(df['created_at']).dt.date.astype(str) == day]
+    assert union_saved(tmp_path, 'cards', keys=[day]).count() == pytest.approx(first_day['card_id'].nunique(),
+                                                                              rel=4 * union.relative_error())
+
+
+def test_distinct_count_modes():
+    values = ids(5000)
+    assert distinct_count(values) == 5000
+    assert distinct_count(values, approximate=True) == pytest.approx(5000, rel=0.04)
+
+
+def test_precision_bounds():
+    with pytest.raises(ValueError):
+        HyperLogLog(precision=30)
+    with pytest.raises(ValueError):
+        HyperLogLog(10).merge(HyperLogLog(12))
@@ -0,0 +1,67 @@
+import functools
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from engine import ingest
+from engine.cache import ResultCache
+
+
+def export(path, rows=500, seed=6):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'cardholder_id': [f"holder-{i}" for i in rng.integers(0, 100, rows)],
+        'card_id': [f"card-{i}" for i in rng.integers(0, 300, rows)],
+        'transaction_id': np.arange(rows),
+        'transaction_amount': rng.integers(100, 10_000, rows).astype('float64'),
+        'cashback_amount': rng.integers(0, 500, rows).astype('float64'),
+        'merchant_id': rng.integers(1, 20, rows),
+        'created_at': (pd.Timestamp('2024-05-01') + pd.to_timedelta(rng.integers(0, 86400 * 7, rows), 's'))
+        .strftime('%Y-%m-%d %H:%M:%S'),
+    })
+    df.to_csv(path, index=False)
+    return path
+
+
+def test_load_matches_read_csv(tmp_path):
+    path = export(tmp_path / 'transaction_data.csv')
+    loaded = ingest.load_dataset(path, 'transaction', directory=tmp_path / 'ingest')
+    expected = pd.read_csv(path, parse_dates=['created_at'])
+    pd.testing.assert_frame_equal(loaded, expected, check_dtype=False)
+    assert loaded['created_at'].dtype.kind == 'M'
+
+
+def test_columns_come_from_the_parquet_copy(tmp_path):
+    path = export(tmp_path / 'transaction_data.csv')
+    directory = tmp_path / 'ingest'
+    ingest.load_dataset(path, 'transaction', directory=directory)
+    os.remove(path)
+    # Keyed by content, so the CSV is not read again
+    loaded = ingest.load_dataset(None, 'transaction', columns=['card_id', 'missing'], directory=directory,
+                                 source_hash=os.listdir(directory)[0].split('.')[0])
+    assert list(loaded.columns) == ['card_id']
+
+
+def test_unknown_schema_falls_back_to_inference(tmp_path):
+    path = tmp_path / 'odd.csv'
+    pd.DataFrame({'card_id': ['a', 'b'], 'issuer_bin': ['not a number', '4']}).to_csv(path, index=False)
+    loaded = ingest.load_dataset(path, 'card', directory=tmp_path / 'ingest')
+    assert list(loaded['issuer_bin']) == ['not a number', '4']
+
+
+def test_new_copies_evict_old_ones(tmp_path, monkeypatch):
+    directory = tmp_path / 'ingest'
+    monkeypatch.setattr(ingest, 'INGEST_DIR', directory)
+    first = ingest.ingest(export(tmp_path / 'first.csv', seed=1), 'transaction', directory=directory)
+    past = time.time() - 100
+    os.utime(first, (past, past))
+    limit = 1.5 * os.path.getsize(first)
+    monkeypatch.setattr(ingest, 'ResultCache', functools.partial(
+        ResultCache, tmp_path / 'cache', max_bytes=limit, shared=(directory,), reserved=()))
+
+    second = ingest.ingest(export(tmp_path / 'second.csv', seed=2), 'transaction', directory=directory)
+
+    assert os.path.exists(second)
+    assert not os.path.exists(first)
@@ -0,0 +1,51 @@
+import json
+
+from engine.instrumentation import StageTimer, stages_frame, stages_to_json, stages_to_prometheus
+
+
+def test_spans_accumulate_and_drive_progress():
+    reported = []
+    timer = StageTimer(lambda fraction, message: reported.append((fraction, message)), stages=['read', 'describe'])
+    for _ in range(3):
+        with timer.span('read', rows=10):
+            pass
+    with timer.span('extra', rows=1):
+        pass
+    with timer.span('describe', rows=5):
+        pass
+    spans = timer.finish()
+
+    # Pipeline stages first, then extra stages in the order they ran
+    assert [span.stage for span in spans] == ['read', 'describe', 'extra']
+    assert (spans[0].rows, spans[0].calls) == (30, 3)
+    assert spans[0].peak_rss_bytes > 0
+    # Progress is reported once per pipeline stage as it starts, then at the end
+    assert [fraction for fraction, _ in reported] == [0.0, 0.5, 1.0]
+    assert reported[0][1] == "Reading CSV file..."
+
+
+def test_exports():
+    timer = StageTimer(stages=['read'])
+    with timer.span('read', rows=4):
+        pass
+    spans = timer.results()
+
+    frame = stages_frame(spans)
+    assert list(frame['stage']) == ['read'] and frame.loc[0, 'rows'] == 4
+    assert json.loads(stages_to_json(spans, file='a.csv')) == {'file': 'a.csv', 'stages': [spans[0].to_dict()]}
+
+    text = stages_to_prometheus(spans, file='a "b".csv')
+    assert '# TYPE data_understanding_stage_seconds gauge' in text
+    assert 'data_understanding_stage_peak_rss_bytes{file="a \\"b\\".csv",stage="read"}' in text
+    assert text.endswith('\n')
+
+
+def test_rows_per_second_without_time():
+    timer = StageTimer()
+    with timer.span('read'):
+        pass
+    span = timer.results()[0]
+    span.seconds = 0.0
+    assert span.rows_per_second is None
+    # No sample for an undefined rate
+    assert 'data_understanding_stage_rows_per_second{' not in stages_to_prometheus([span])
@@ -0,0 +1,100 @@
+import threading
+
+import pytest
+
+from engine import jobs as jobs_module
+from engine.cache import ResultCache
+from engine.jobs import HASH_BYTES, JOB_BASE_BYTES, JobService, estimate_memory
+from engine.profiler import analyze_csv
+from engine.streaming import profile_csv_chunked
+
+RELEASE = threading.Event()
+
+
+def measure(source, progress=None):
+    progress(0.5, "Halfway")
+    RELEASE.wait(5)
+    return {'size': len(source)}
+
+
+def fail(source, progress=None):
+    raise ValueError("broken upload")
+
+
+@pytest.fixture
+def service(tmp_path):
+    RELEASE.clear()
+    cache = ResultCache(tmp_path / 'cache', max_bytes=10 ** 9, shared=(), reserved=())
+    return JobService(workers=2, memory_budget=10 ** 12, cache=cache)
+
+
+def test_identical_submissions_share_a_job(service):
+    first = service.submit(measure, b'abc')
+    second = service.submit(measure, bytearray(b'abc'))
+    assert second is first and first.requests == 2
+
+    RELEASE.set()
+    assert first.wait(5) == {'size': 3}
+    assert not first.released
+    assert second.wait(5) == {'size': 3}
+    # Every request collected it: only the cache holds the result now
+    assert first.released and first.result is None
+    assert first.wait(5) == {'size': 3}
+
+    cached = service.submit(measure, b'abc')
+    assert cached is not first and cached.cached and cached.done
+    assert cached.wait() == {'size': 3}
+
+
+def test_uncollected_results_are_released(service, monkeypatch):
+    monkeypatch.setattr(jobs_module, 'RESULT_SECONDS', 0)
+    RELEASE.set()
+    first = service.submit(measure, b'first')
+    first._done.wait(5)
+    second = service.submit(measure, b'second')
+    second._done.wait(5)
+
+    # Finishing the second job released the first, which nobody collected
+    assert first.released and first.result is None
+    assert first.wait() == {'size': 5}
+    frame = service.jobs_frame()
+    assert list(frame['job']) == [second.id, first.id]
+    assert list(frame['collected']) == [0, 1]
+
+
+def test_failures_are_reraised(service):
+    job = service.submit(fail, b'abc')
+    with pytest.raises(ValueError, match="broken upload"):
+        job.wait(5)
+    assert job.state == 'failed' and job.message == "Failed: broken upload"
+
+
+def test_memory_admission(tmp_path):
+    RELEASE.clear()
+    cache = ResultCache(tmp_path / 'cache', max_bytes=10 ** 9, shared=(), reserved=())
+    service = JobService(workers=2, memory_budget=150, cache=cache)
+    first = service.submit(measure, b'first', memory=100)
+    second = service.submit(measure, b'second', memory=100)
+    for job in service.watch(first, interval=0.01):
+        if job.state == 'running':
+            break
+    # Both would exceed the budget, so the second waits for the first
+    assert second.state == 'queued'
+    assert service.status(second).startswith("Queued (waiting for memory")
+    RELEASE.set()
+    assert second.wait(5) == {'size': 6}
+
+
+def test_chunked_estimate_follows_the_chunk_size(tmp_path):
+    path = tmp_path / 'rows.csv'
+    path.write_bytes(b'a,b\n' + b'12345,678\n' * 100_000)
+    rows, size = 100_000, path.stat().st_size
+
+    in_memory = estimate_memory(analyze_csv, path)
+    chunked = estimate_memory(profile_csv_chunked, path, {'chunksize': 1000})
+    bloom = estimate_memory(profile_csv_chunked, path, {'chunksize': 1000, 'duplicate_mode': 'approximate'})
+
+    assert in_memory == JOB_BASE_BYTES + 5 * size
+    assert bloom == pytest.approx(JOB_BASE_BYTES + 5 * 1000 * size / (rows + 1), rel=0.01)
+    assert chunked == pytest.approx(bloom + HASH_BYTES * rows, rel=0.01)
+    assert JOB_BASE_BYTES < chunked < in_memory
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.joins import GROUP_COLUMNS, join_exports
+from functionalities.issuer_activity import join_summary_table
+
+
+@pytest.fixture
+def exports(tmp_path):
+    rng = np.random.default_rng(0)
+    cards = pd.DataFrame({'card_id': [f"c{i}" for i in range(300)],
+                          'issuer_bin': rng.choice([411111, 422222, 433333], 300).astype(float)})
+    cards.loc[:9, 'issuer_bin'] = np.nan
+    transactions = pd.DataFrame({
+        # Some transactions on cards missing from the card export
+        'card_id': rng.choice([f"c{i}" for i in range(320)], 4000),
+        'transaction_id': np.arange(4000) + 10 ** 12,
+        'transaction_amount': rng.integers(1, 1000, 4000).astype(float),
+    })
+    transactions.loc[rng.choice(4000, 20, replace=False), 'transaction_id'] = np.nan
+    redeemed = rng.choice(transactions['transaction_id'].dropna(), 1500, replace=False)
+    redemptions = pd.DataFrame({
+        'card_id': rng.choice(cards['card_id'], 1600),
+        'transaction_id': np.concatenate([redeemed, np.arange(100) + 2 * 10 ** 12]),
+        'cashback_amount': rng.integers(1, 100, 1600).astype(float),
+    })
+    redemptions.loc[:4, 'transaction_id'] = np.nan
+    paths = {}
+    for name, frame in [('card', cards), ('transaction', transactions), ('redemption', redemptions)]:
+        paths[name] = tmp_path / f"{name}.csv"
+        frame.astype({'transaction_id': 'Int64'} if 'transaction_id' in frame else {}).to_csv(paths[name],
+                                                                                              index=False)
+    return paths, cards, transactions, redemptions
+
+
+def expected_groups(cards, transactions, redemptions):
+    tx = transactions.merge(cards, on='card_id', how='inner')
+    tx['redeemed'] = tx['transaction_id'].isin(redemptions['transaction_id'].dropna())
+    red = redemptions.merge(cards, on='card_id', how='inner')
+    frame = pd.DataFrame({
+        'cards': cards.groupby('issuer_bin', dropna=False)['card_id'].nunique(),
+        'active_cards': cards[cards['card_id'].isin(transactions['card_id'])]
+        .groupby('issuer_bin', dropna=False).size(),
+        'transactions': tx.groupby('issuer_bin', dropna=False).size(),
+        'redeemed_transactions': tx.groupby('issuer_bin', dropna=False)['redeemed'].sum(),
+        'transaction_amount': tx.groupby('issuer_bin', dropna=False)['transaction_amount'].sum(),
+        'redemptions': red.groupby('issuer_bin', dropna=False).size(),
+        'cashback': red.groupby('issuer_bin', dropna=False)['cashback_amount'].sum(),
+    }).fillna(0)
+    return frame.sort_index()
+
+
+@pytest.mark.parametrize('partitions', [1, 4])
+def test_join_matches_pandas_merge(exports, partitions):
+    paths, cards, transactions, redemptions = exports
+    metrics = join_exports(paths['card'], paths['transaction'], paths['redemption'], partitions=partitions,
+                           batch_rows=700)
+
+    groups = metrics.groups
+    groups.index = groups.index.astype(float)
+    expected = expected_groups(cards, transactions, redemptions)
+    pd.testing.assert_frame_equal(groups.sort_index()[GROUP_COLUMNS], expected[GROUP_COLUMNS],
+                                  check_dtype=False, check_names=False)
+
+    known = transactions['card_id'].isin(cards['card_id'])
+    redeemed = transactions['transaction_id'].isin(redemptions['transaction_id'].dropna())
+    summary = metrics.summary
+    assert metrics.partitions == partitions
+    assert summary['cards'] == len(cards)
+    assert summary['cards_never_transacting'] == (~cards['card_id'].isin(transactions['card_id'])).sum()
+    assert summary['transactions'] == len(transactions)
+    assert summary['transactions_without_redemption'] == (~redeemed).sum()
+    assert summary['amount_without_redemption'] == transactions.loc[~redeemed, 'transaction_amount'].sum()
+    assert summary['transactions_unknown_card'] == (~known).sum()
+    assert summary['redemptions'] == len(redemptions)
+    # Orphan keys and missing keys
+    assert summary['redemptions_without_transaction'] == 105
+    assert summary['redemptions_unknown_card'] == 0
+
+
+def test_summary_amounts_are_whole_yen():
+    summary = {'transactions_without_redemption': 1200, 'amount_without_redemption': 687982302.0,
+               'cards_never_transacting': 5, 'cards': 10, 'redemptions_without_transaction': 0,
+               'transactions_unknown_card': 3}
+    assert join_summary_table(summary)['Value'][1] == '¥687,982,302'
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.lazy import LazyProfile, page
+from engine.profiler import analyze_csv
+
+
+@pytest.fixture
+def sample_csv(tmp_path):
+    rows = 3000
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'transaction_id': [f"tx{i}" for i in range(rows)],
+        'merchant': rng.choice([f"m{i}" for i in range(80)], rows),
+        'status': rng.choice(['ok', 'failed'], rows),
+        'created_at': pd.Timestamp('2024-05-01') + pd.to_timedelta(rng.integers(0, 10 * 86400, rows), unit='s'),
+        'amount': rng.integers(0, 5000, rows),
+        'rate': rng.normal(size=rows).round(2),
+    })
+    path = tmp_path / 'sample.csv'
+    df.to_csv(path, index=False)
+    return path
+
+
+def test_pairs_match_analyze_csv(sample_csv):
+    lazy = LazyProfile.from_csv(sample_csv)
+    exact = analyze_csv(sample_csv)
+
+    assert lazy.pairs == list(exact.analysis_results)
+    assert lazy.computed_pairs == 0
+    # One measure at a time keeps integer min/max, which the long table of all measures widens to float
+    pd.testing.assert_frame_equal(lazy.pair('status', 'amount'), exact.analysis_results['amount by status'],
+                                  check_dtype=False)
+    lazy.pair('status', 'amount')
+    assert lazy.computed_pairs == 1
+
+
+def test_top_k_and_plan_are_applied(sample_csv):
+    lazy = LazyProfile.from_csv(sample_csv, top_k=5, planned=True)
+    exact = analyze_csv(sample_csv, top_k=5, planned=True)
+    overview = lazy.overview()
+
+    for col in exact.qualitative_attributes:
+        pd.testing.assert_frame_equal(overview.summary_reports_qual[col], exact.summary_reports_qual[col])
+    # Identifier keys are not offered; timestamps and wide categories are grouped as planned
+    assert overview.plan is not None
+    assert lazy.pairs == list(exact.analysis_results)
+    assert not any(name.endswith('by transaction_id') for name in lazy.pairs)
+    for qual_col, quant_col in lazy.pair_keys:
+        pd.testing.assert_frame_equal(lazy.pair(qual_col, quant_col),
+                                      exact.analysis_results[f"{quant_col} by {qual_col}"], check_dtype=False)
+
+
+
+@pytest.mark.parametrize('top_k', [None, 5])
+def test_frequency_tables_are_built_when_opened(sample_csv, top_k):
+    lazy = LazyProfile.from_csv(sample_csv, top_k=top_k)
+    exact = analyze_csv(sample_csv, top_k=top_k)
+    overview = lazy.overview()
+
+    tables = overview.summary_reports_qual
+    assert list(tables) == exact.qualitative_attributes and tables.computed == 0
+    for name in ('missing_info', 'duplicate_columns', 'basic_stats', 'data_format'):
+        pd.testing.assert_frame_equal(getattr(overview, name), getattr(exact, name))
+    assert overview.duplicate_count == exact.duplicate_count
+    pd.testing.assert_frame_equal(tables['merchant'], exact.summary_reports_qual['merchant'])
+    assert tables['merchant'] is tables['merchant'] and tables.computed == 1
+    with pytest.raises(KeyError):
+        tables['amount']
+
+
+def test_text_only_frames_describe_every_column(tmp_path):
+    path = tmp_path / 'text.csv'
+    pd.DataFrame({'a': ['x', 'y', 'x', None], 'b': ['p', 'p', 'q', 'q']}).to_csv(path, index=False)
+    overview = LazyProfile.from_csv(path).overview()
+    pd.testing.assert_frame_equal(overview.basic_stats, analyze_csv(path).basic_stats)
+
+def test_page_is_clamped():
+    frame = pd.DataFrame({'a': range(250)})
+    rows, pages = page(frame, 5)
+    assert pages == 3
+    assert list(rows['a']) == list(range(200, 250))
+    assert len(page(frame.iloc[:0], 0)[0]) == 0
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from engine.parallel import analyze_csv_parallel, pack_tiles
+from engine.profiler import analyze_csv
+
+
+def sample_csv(path, rows=4000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'merchant': rng.choice(['A', 'B', 'C'], rows),
+        'status': rng.choice(['ok', 'failed', None], rows),
+        'amount': rng.integers(0, 5000, rows),
+        'rate': rng.normal(size=rows).round(2),
+        'fee': rng.exponential(size=rows).round(3),
+    })
+    df = pd.concat([df, df.iloc[:100]], ignore_index=True)
+    df.to_csv(path, index=False)
+    return path
+
+
+def test_pack_tiles_respects_budget():
+    assert pack_tiles({'a': 4, 'b': 4, 'c': 9, 'd': 1}, 8) == [['a', 'b'], ['c'], ['d']]
+
+
+def test_parallel_profile_matches_analyze_csv(tmp_path):
+    path = sample_csv(tmp_path / 'sample.csv')
+    # A small budget splits the columns and the cross-analysis over several tiles
+    parallel = analyze_csv_parallel(path, workers=2, memory_per_worker=20000)
+    exact = analyze_csv(path)
+
+    assert parallel.row_count == exact.row_count
+    assert parallel.qualitative_attributes == exact.qualitative_attributes
+    assert parallel.quantitative_attributes == exact.quantitative_attributes
+    assert parallel.duplicate_count == exact.duplicate_count
+    pd.testing.assert_frame_equal(parallel.missing_info, exact.missing_info)
+    pd.testing.assert_frame_equal(parallel.duplicate_columns, exact.duplicate_columns)
+    pd.testing.assert_frame_equal(parallel.basic_stats, exact.basic_stats)
+    for col in exact.qualitative_attributes:
+        pd.testing.assert_frame_equal(parallel.summary_reports_qual[col], exact.summary_reports_qual[col])
+    pd.testing.assert_frame_equal(parallel.cross_table, exact.cross_table)
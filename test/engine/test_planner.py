@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.cross_analysis import cross_analysis_table
+from engine.heavy_hitters import OTHER
+from engine.planner import estimate_distinct, plan_analysis, semantic_type
+
+
+def sample_frame(rows=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'transaction_id': np.arange(rows),
+        'card_id': [f"c{i}" for i in rng.permutation(rows)],
+        'merchant': rng.choice([f"m{i}" for i in range(120)], rows),
+        'status': rng.choice(['ok', 'failed'], rows),
+        'created_at': (pd.Timestamp('2024-05-01')
+                       + pd.to_timedelta(rng.integers(0, 20 * 86400, rows), unit='s')).astype(str),
+        'amount': rng.integers(0, 5000, rows),
+    })
+
+
+def steps(plan):
+    return {step.qualitative: step for step in plan.steps}
+
+
+def test_estimate_distinct_is_exact_on_the_whole_frame():
+    values = pd.Series(['a', 'b', 'b', None, 'c'])
+    assert estimate_distinct(values, 4) == 3
+    assert estimate_distinct(pd.Series(['a', 'b']), 1000) == 1000
+
+
+def test_small_files_are_not_identifiers():
+    df = pd.DataFrame({'a': ['x', 'y'], 'b': [1, 2]})
+    plan = plan_analysis(df, ['a'], ['b'])
+
+    assert plan.columns.at['a', 'Semantic Type'] == 'category'
+    assert plan.steps[0].action == 'full'
+    pd.testing.assert_frame_equal(plan.execute(df), cross_analysis_table(df, ['a'], ['b']))
+    # UUID-shaped values are identifiers however few there are
+    uuids = pd.Series(['123e4567-e89b-12d3-a456-426614174000'] * 3)
+    assert semantic_type('key', uuids, 1, 3) == 'identifier'
+
+
+def test_plan_actions():
+    df = sample_frame()
+    plan = plan_analysis(df, ['card_id', 'merchant', 'status', 'created_at'], ['transaction_id', 'amount'])
+    by_column = steps(plan)
+
+    assert plan.columns.at['transaction_id', 'Semantic Type'] == 'identifier'
+    assert by_column['status'].measures == ['amount']
+    assert by_column['card_id'].action == 'skip'
+    assert by_column['status'].action == 'full'
+    assert by_column['merchant'].action == 'top groups'
+    assert by_column['created_at'].action == 'by day'
+    assert all(step.estimated_seconds > 0 for step in plan.steps if step.runs)
+
+    table = plan.execute(df)
+    merchants = table.loc[table['qualitative'] == 'merchant', 'group']
+    assert len(merchants) == plan.max_groups + 1 and OTHER in set(merchants)
+    assert table.loc[table['qualitative'] == 'created_at', 'count'].sum() == len(df)
+    assert by_column['merchant'].output_rows == plan.max_groups + 1
+
+
+def test_timestamp_actions_follow_the_group_count():
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({'created_at': rng.choice(['2024-05-01 10:00', '2024-05-02 11:00'], 5000),
+                       'amount': rng.normal(size=5000)})
+    # As many values as days: grouped as is, on every run
+    actions = {plan_analysis(df, ['created_at'], ['amount']).steps[0].action for _ in range(3)}
+    assert actions == {'full'}
+
+    df['created_at'] = rng.choice(['2024-05-01 10:00', '2024-05-01 11:00', '2024-05-02 09:00'], 5000)
+    step = plan_analysis(df, ['created_at'], ['amount']).steps[0]
+    assert step.action == 'by day' and step.estimated_groups == 2
+
+
+def test_steps_over_the_time_limit_are_skipped():
+    df = sample_frame(2000)
+    plan = plan_analysis(df, ['status'], ['amount'], max_seconds=0)
+
+    step = plan.steps[0]
+    assert step.action == 'skip' and not step.runs
+    assert 'over the 0s limit' in step.reason
+    assert step.estimated_seconds > 0
+    assert plan.execute(df).empty
+
+
+@pytest.mark.parametrize('max_groups', [5, 200])
+def test_max_groups(max_groups):
+    df = sample_frame(3000)
+    step = plan_analysis(df, ['merchant'], ['amount'], max_groups=max_groups).steps[0]
+    assert step.action == ('top groups' if max_groups < 120 else 'full')
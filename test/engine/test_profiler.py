@@ -0,0 +1,91 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats as scipy_stats
+
+from engine.profiler import analyze_csv, analyze_csv_incremental, iter_profile, profile_dataframe
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(2)
+    rows = 2000
+    df = pd.DataFrame({
+        'merchant': rng.choice(['A', 'B', 'C'], rows),
+        'channel': rng.choice(['web', 'store', None], rows),
+        'amount': rng.integers(0, 1000, rows),
+        'rate': rng.exponential(size=rows),
+    })
+    df.loc[rng.choice(rows, 40), 'rate'] = np.nan
+    return pd.concat([df, df.iloc[:25]], ignore_index=True)
+
+
+def test_profile_matches_pandas(frame):
+    result = profile_dataframe(frame)
+    quantitative = frame[['amount', 'rate']]
+
+    assert result.qualitative_attributes == ['merchant', 'channel']
+    assert result.quantitative_attributes == ['amount', 'rate']
+    assert result.duplicate_count == frame.duplicated().sum()
+    pd.testing.assert_series_equal(result.missing_info['Missing Values'], frame.isnull().sum(),
+                                   check_names=False)
+    pd.testing.assert_frame_equal(result.basic_stats, quantitative.describe(), check_dtype=False)
+    for col in ['merchant', 'channel']:
+        pd.testing.assert_series_equal(result.summary_reports_qual[col]['Frequency'], frame[col].value_counts(),
+                                       check_names=False)
+    expected = len(frame) - frame.nunique(dropna=False)
+    pd.testing.assert_series_equal(result.duplicate_columns['Duplicate Count'], expected, check_names=False)
+    report = result.summary_reports_quant['rate']
+    assert report['Variance'].iloc[0] == pytest.approx(frame['rate'].var())
+    assert report['Skewness'].iloc[0] == pytest.approx(scipy_stats.skew(frame['rate'].dropna()))
+
+
+def test_cross_analysis_matches_groupby(frame):
+    result = profile_dataframe(frame)
+    expected = frame.groupby('merchant')['rate'].describe()
+    pair = result.analysis_results['rate by merchant'].set_index('merchant')
+    pd.testing.assert_frame_equal(pair, expected, check_dtype=False, check_names=False)
+
+
+def test_analyze_csv_reads_the_file(frame, tmp_path):
+    path = tmp_path / 'frame.csv'
+    frame.to_csv(path, index=False)
+    result = analyze_csv(path)
+    assert result.row_count == len(frame)
+    assert result.stages[0].stage == 'read'
+    assert result.stages[0].rows == len(frame)
+
+
+def assert_same_profile(result, expected):
+    for name in ['head', 'data_format', 'missing_info', 'duplicate_columns', 'basic_stats', 'cross_table']:
+        pd.testing.assert_frame_equal(getattr(result, name), getattr(expected, name))
+    assert (result.row_count, result.duplicate_count) == (expected.row_count, expected.duplicate_count)
+    for name in ['summary_reports_qual', 'summary_reports_quant', 'analysis_results']:
+        reports, expected_reports = getattr(result, name), getattr(expected, name)
+        assert list(reports) == list(expected_reports)
+        for key in reports:
+            pd.testing.assert_frame_equal(reports[key], expected_reports[key])
+
+
+def test_incremental_ends_with_analyze_csv(frame):
+    upload = io.BytesIO(frame.to_csv(index=False).encode())
+    sections = ['missing_info', 'summary_reports_qual', 'basic_stats', 'duplicate_columns', 'cross_table']
+    filled, results = [], []
+    for result in analyze_csv_incremental(upload, preview_rows=100):
+        # Results are updated in place, so the sections are recorded as they arrive
+        filled.append([getattr(result, name) is not None for name in sections])
+        results.append(result)
+
+    preview = results[0]
+    assert preview.row_count is None
+    assert preview.missing_info['Missing Values'].sum() == frame.iloc[:100].isnull().sum().sum()
+    assert [sum(row) for row in filled] == [1, 1, 2, 3, 4, 5]
+    assert_same_profile(results[-1], analyze_csv(io.BytesIO(upload.getvalue())))
+
+
+def test_iter_profile_yields_one_result(frame):
+    results = list(iter_profile(frame))
+    assert all(result is results[0] for result in results)
+    assert_same_profile(results[-1], profile_dataframe(frame))
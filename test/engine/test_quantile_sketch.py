@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from engine.quantile_sketch import GroupQuantileSketch
+
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+
+def sample(seed=3, rows=50_000):
+    rng = np.random.default_rng(seed)
+    keys = rng.choice(['a', 'b', 'c', 'tiny'], rows, p=[0.5, 0.3, 0.1999, 0.0001])
+    values = rng.lognormal(size=rows)
+    return keys, values
+
+
+def assert_rank_error(sketch, keys, values, rank_error):
+    estimates = sketch.quantiles(QUANTILES)
+    for key, group in pd.Series(values).groupby(keys):
+        ordered = np.sort(group.to_numpy())
+        for q in QUANTILES:
+            rank = np.searchsorted(ordered, estimates.loc[key, q]) / len(ordered)
+            assert abs(rank - q) <= rank_error + 1 / len(ordered)
+
+
+def test_quantiles_within_rank_error():
+    keys, values = sample()
+    sketch = GroupQuantileSketch.from_values(keys, values, rank_error=0.01)
+    assert_rank_error(sketch, keys, values, 0.01)
+    np.testing.assert_array_equal(sketch.count(), pd.Series(keys).value_counts().sort_index().to_numpy())
+
+
+def test_small_groups_are_exact():
+    keys, values = sample()
+    sketch = GroupQuantileSketch.from_values(keys, values)
+    tiny = pd.Series(values[keys == 'tiny'])
+    np.testing.assert_allclose(sketch.quantiles(QUANTILES).loc['tiny'].to_numpy(), tiny.quantile(QUANTILES))
+
+
+def test_merged_chunks_keep_the_guarantee():
+    keys, values = sample()
+    sketch = GroupQuantileSketch(0.01)
+    for start in range(0, len(keys), 7000):
+        chunk = slice(start, start + 7000)
+        sketch.merge(GroupQuantileSketch.from_values(keys[chunk], values[chunk], 0.01))
+    assert_rank_error(sketch, keys, values, 0.01)
+    grouped = pd.Series(values).groupby(keys)
+    np.testing.assert_allclose(sketch.min, grouped.min().to_numpy())
+    np.testing.assert_allclose(sketch.max, grouped.max().to_numpy())
+
+
+def test_frame_round_trip():
+    keys, values = sample(rows=5000)
+    sketch = GroupQuantileSketch.from_values(keys, values)
+    restored = GroupQuantileSketch.from_frame(sketch.to_frame())
+    pd.testing.assert_frame_equal(restored.quantiles(QUANTILES), sketch.quantiles(QUANTILES))
+
+
+def test_missing_keys_and_values_are_skipped():
+    sketch = GroupQuantileSketch.from_values(['a', None, 'a', 'b'], [1.0, 5.0, np.nan, 2.0])
+    np.testing.assert_array_equal(sketch.count(), [1, 1])
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.profiler import ProfileResult
+from engine.sampling import (BLOCK_COLUMN, analyze_csv_progressive, block_sample, estimate,
+                             progressive_estimates, reservoir_sample)
+
+
+def sample_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'merchant': rng.choice(['A', 'B', 'C'], rows, p=[0.6, 0.3, 0.1]),
+        'amount': rng.exponential(100, rows).round(2),
+    })
+    df.loc[rng.random(rows) < 0.1, 'amount'] = np.nan
+    return df
+
+
+def test_whole_file_estimate_is_exact(tmp_path):
+    df = sample_frame(500)
+    path = tmp_path / 'small.csv'
+    df.to_csv(path, index=False)
+
+    estimates = list(progressive_estimates(path, sample_sizes=(1000, 10_000)))
+
+    # The first sample is the whole file, so there is no second one
+    assert len(estimates) == 1
+    result = estimates[0]
+    assert result.exact and result.row_count == 500
+    assert result.means.loc['amount', 'mean'] == pytest.approx(df['amount'].mean())
+    assert result.means.loc['amount', 'Low'] == result.means.loc['amount', 'High']
+    assert result.missing.loc['amount', 'Percentage Missing'] == pytest.approx(df['amount'].isna().mean() * 100)
+    shares = df['merchant'].value_counts(normalize=True) * 100
+    pd.testing.assert_series_equal(result.frequencies['merchant']['Percentage'], shares, check_names=False)
+
+
+def test_block_sample_intervals_cover_the_truth(tmp_path):
+    df = sample_frame(200_000, seed=1)
+    path = tmp_path / 'large.csv'
+    df.to_csv(path, index=False)
+
+    sample, estimated_rows, exact = block_sample(path, 5000, blocks=100)
+    result = estimate(sample, estimated_rows)
+
+    assert not exact
+    assert estimated_rows == pytest.approx(len(df), rel=0.05)
+    assert sample[BLOCK_COLUMN].nunique() <= 100
+    mean = result.means.loc['amount']
+    assert mean['Low'] <= df['amount'].mean() <= mean['High']
+    missing = result.missing.loc['amount']
+    assert missing['Low'] <= df['amount'].isna().mean() * 100 <= missing['High']
+    share = result.frequencies['merchant'].loc['A']
+    assert share['Low'] <= (df['merchant'] == 'A').mean() * 100 <= share['High']
+    # No missing merchants in the sample: the upper bound is the rule of three, not zero
+    assert result.missing.loc['merchant', 'High'] > 0
+
+
+
+def test_rows_after_long_lines_are_not_oversampled(tmp_path):
+    # Every long row is followed by a short one, which a block starts at 50 times as often
+    rows = 40_000
+    df = pd.DataFrame({'kind': np.tile(['long', 'short'], rows // 2)})
+    df['note'] = np.where(df['kind'] == 'long', 'x' * 500, '')
+    path = tmp_path / 'uneven.csv'
+    df.to_csv(path, index=False)
+
+    sample, estimated_rows, exact = block_sample(path, 400, blocks=400)
+    result = estimate(sample, estimated_rows)
+
+    assert not exact
+    assert estimated_rows == pytest.approx(rows, rel=0.1)
+    share = result.frequencies['kind'].loc['short']
+    assert share['Low'] <= 50 <= share['High']
+
+def test_reservoir_sample_has_exact_size_and_row_count(tmp_path):
+    df = sample_frame(12_000)
+    path = tmp_path / 'rows.csv'
+    df.to_csv(path, index=False)
+
+    sample, row_count, exact = reservoir_sample(path, 1000, chunksize=2500)
+
+    assert (len(sample), row_count, exact) == (1000, 12_000, False)
+    assert list(sample[BLOCK_COLUMN]) == list(range(1000))
+    # Every sampled row is a row of the file
+    assert len(sample.drop(columns=BLOCK_COLUMN).merge(df.drop_duplicates(), how='inner')) == 1000
+
+
+def test_progressive_ends_with_the_exact_profile(tmp_path):
+    path = tmp_path / 'small.csv'
+    sample_frame(300).to_csv(path, index=False)
+
+    results = list(analyze_csv_progressive(path, sample_sizes=(100, 1000), method='reservoir'))
+
+    assert [type(result).__name__ for result in results] == ['SampleEstimate', 'SampleEstimate', 'ProfileResult']
+    assert isinstance(results[-1], ProfileResult) and results[-1].row_count == 300
+    with pytest.raises(ValueError):
+        next(progressive_estimates(path, method='systematic'))
@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.heavy_hitters import OTHER
+from engine.profiler import analyze_csv
+from engine.streaming import NumericValues, profile_csv_chunked
+
+STATS = ['count', 'mean', 'std', 'min', 'max']
+
+
+def sample_csv(path, rows=6000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'merchant': rng.choice(['A', 'B', 'C', 'D'], rows),
+        'status': rng.choice(['ok', 'failed', None], rows),
+        'amount': rng.integers(0, 5000, rows),
+        'rate': rng.normal(size=rows).round(2),
+    })
+    df.loc[rng.choice(rows, 50), 'rate'] = np.nan
+    # Duplicate rows
+    df = pd.concat([df, df.iloc[:300]], ignore_index=True)
+    df.to_csv(path, index=False)
+    return path
+
+
+def cross(result):
+    return result.cross_table.set_index(['qualitative', 'group', 'quantitative']).sort_index()
+
+
+def test_chunked_profile_matches_analyze_csv(tmp_path):
+    path = sample_csv(tmp_path / 'sample.csv')
+    chunked = profile_csv_chunked(path, chunksize=1000)
+    exact = analyze_csv(path)
+
+    assert chunked.row_count == exact.row_count
+    assert chunked.qualitative_attributes == exact.qualitative_attributes
+    assert chunked.quantitative_attributes == exact.quantitative_attributes
+    assert chunked.duplicate_count == exact.duplicate_count
+    pd.testing.assert_frame_equal(chunked.missing_info, exact.missing_info)
+    pd.testing.assert_frame_equal(chunked.duplicate_columns, exact.duplicate_columns)
+    pd.testing.assert_frame_equal(chunked.basic_stats, exact.basic_stats, rtol=1e-9)
+    for col in exact.qualitative_attributes:
+        pd.testing.assert_frame_equal(chunked.summary_reports_qual[col].sort_index(),
+                                      exact.summary_reports_qual[col].sort_index())
+    pd.testing.assert_frame_equal(cross(chunked)[STATS], cross(exact)[STATS], rtol=1e-9, check_dtype=False)
+
+
+def test_text_after_empty_first_chunk_is_qualitative(tmp_path):
+    rows = 3000
+    df = pd.DataFrame({'key': np.arange(rows) % 7, 'amount': np.arange(rows) * 1.5,
+                       'note': [None] * 1500 + ['late', 'later'] * 750})
+    path = tmp_path / 'sparse.csv'
+    df.to_csv(path, index=False)
+
+    chunked = profile_csv_chunked(path, chunksize=1000)
+    exact = analyze_csv(path)
+
+    assert chunked.qualitative_attributes == exact.qualitative_attributes == ['note']
+    assert chunked.quantitative_attributes == exact.quantitative_attributes
+    pd.testing.assert_frame_equal(chunked.data_format, exact.data_format)
+    pd.testing.assert_frame_equal(chunked.summary_reports_qual['note'].sort_index(),
+                                  exact.summary_reports_qual['note'].sort_index())
+    pd.testing.assert_frame_equal(chunked.basic_stats, exact.basic_stats, rtol=1e-9)
+    # The earlier chunks have no keys in 'note', so its groups are complete
+    pd.testing.assert_frame_equal(cross(chunked)[STATS], cross(exact)[STATS], rtol=1e-9, check_dtype=False)
+
+
+def test_text_after_numbers_keeps_earlier_counts(tmp_path):
+    df = pd.DataFrame({'code': ['1', '2'] * 500 + ['x'] * 1000, 'amount': np.arange(2000)})
+    path = tmp_path / 'mixed.csv'
+    df.to_csv(path, index=False)
+
+    chunked = profile_csv_chunked(path, chunksize=1000)
+
+    assert chunked.qualitative_attributes == ['code']
+    frequencies = chunked.summary_reports_qual['code']['Frequency']
+    assert frequencies.to_dict() == {'x': 1000, '1': 500, '2': 500}
+    # Its keys were numbers in the first chunk, so it is not a cross-analysis key
+    assert chunked.cross_table.empty
+
+
+def test_value_maps_are_bounded_by_capacity(tmp_path):
+    rows = 5000
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({'id': [f"id{i}" for i in range(rows)], 'value': rng.normal(size=rows)})
+    path = tmp_path / 'ids.csv'
+    df.to_csv(path, index=False)
+
+    chunked = profile_csv_chunked(path, chunksize=500, capacity=1000)
+
+    # Top values and one '(other)' row instead of 5000 rows
+    assert len(chunked.summary_reports_qual['id']) == 1001
+    assert chunked.duplicate_columns.loc['id', 'Duplicate Count'] >= 0
+    distinct_value = rows - chunked.duplicate_columns.loc['value', 'Duplicate Count']
+    assert distinct_value == pytest.approx(rows, rel=0.05)
+    quartiles = chunked.basic_stats.loc[['25%', '50%', '75%'], 'value'].to_numpy()
+    ranks = np.searchsorted(np.sort(df['value']), quartiles) / rows
+    np.testing.assert_allclose(ranks, [0.25, 0.5, 0.75], atol=0.01)
+
+
+def test_numeric_values_exact_until_capacity():
+    values = NumericValues(capacity=10)
+    values.update(pd.Series([1, 2, 2, 3, np.nan]))
+    assert values.exact
+    assert values.distinct() == 3
+    assert values.quantiles() == list(pd.Series([1, 2, 2, 3]).quantile([0.25, 0.5, 0.75]))
+
+    values.update(pd.Series(np.arange(100, 120)))
+    assert not values.exact
+    assert values.counts is None
+    assert values.distinct() == pytest.approx(23, abs=1)
+
+
+def test_text_column_read_as_numbers_in_a_later_chunk(tmp_path):
+    df = pd.DataFrame({'code': ['foo'] * 5 + [str(i) for i in range(5)] + [None, '7.5'] + ['8'] * 3,
+                       'amount': np.arange(15)})
+    path = tmp_path / 'keys.csv'
+    df.to_csv(path, index=False)
+
+    chunked = profile_csv_chunked(path, chunksize=5)
+    exact = analyze_csv(path)
+
+    assert chunked.qualitative_attributes == exact.qualitative_attributes == ['code']
+    pd.testing.assert_frame_equal(chunked.summary_reports_qual['code'].sort_index(),
+                                  exact.summary_reports_qual['code'].sort_index())
+    pd.testing.assert_frame_equal(cross(chunked)[STATS], cross(exact)[STATS], check_dtype=False)
+
+
+def test_folded_numbers_turned_text_are_marked_approximate(tmp_path):
+    rows = 3000
+    df = pd.DataFrame({'code': np.concatenate([np.arange(rows).astype(str), ['x'] * 1000])})
+    path = tmp_path / 'folded.csv'
+    df.to_csv(path, index=False)
+
+    chunked = profile_csv_chunked(path, chunksize=1000, capacity=500)
+
+    table = chunked.summary_reports_qual['code']
+    # The folded numbers have no counts left; they are the "other" bucket, not dropped
+    assert table.loc['x', 'Frequency'] == 1000
+    assert table['Frequency'].sum() == rows + 1000
+    assert table.index[-1] == OTHER and table.loc[OTHER, 'Frequency'] == rows
+    distinct = len(df) - chunked.duplicate_columns.loc['code', 'Duplicate Count']
+    assert distinct == pytest.approx(rows + 1, rel=0.05)
@@ -0,0 +1,68 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.timeseries import build_rollup, last_days, merge_rollups, parse_timestamps
+
+
+@pytest.fixture
+def redemptions():
+    rng = np.random.default_rng(8)
+    rows = 20_000
+    times = pd.Timestamp('2024-05-01') + pd.to_timedelta(rng.integers(0, 20 * 86400, rows), 's')
+    return pd.DataFrame({'created_at': times.strftime('%Y-%m-%d %H:%M:%S'),
+                         'cashback_amount': rng.integers(0, 500, rows).astype('float64')})
+
+
+def test_rollup_matches_hourly_groupby(redemptions):
+    rollup = build_rollup(redemptions, sum_columns=['cashback_amount'])
+    hours = pd.to_datetime(redemptions['created_at']).dt.floor('h')
+    expected = redemptions.groupby(hours)['cashback_amount'].agg(['size', 'sum'])
+    np.testing.assert_array_equal(rollup['count'], expected['size'])
+    np.testing.assert_allclose(rollup['cashback_amount'], expected['sum'])
+    assert rollup.attrs['freq'] == 'h'
+
+
+def test_last_days_matches_raw_filter_on_an_hour_boundary(redemptions):
+    rollup = build_rollup(redemptions, sum_columns=['cashback_amount'])
+    now = datetime(2024, 5, 18, 15)
+    daily = last_days(rollup, days=7, now=now)
+    times = pd.to_datetime(redemptions['created_at'])
+    window = redemptions[(times >= pd.Timestamp(now) - pd.Timedelta(days=7))]
+    expected = window.groupby(pd.to_datetime(window['created_at']).dt.date)['cashback_amount'].agg(['size', 'sum'])
+    assert list(daily['created_at']) == list(expected.index)
+    np.testing.assert_array_equal(daily['count'], expected['size'])
+    np.testing.assert_allclose(daily['cashback_amount'], expected['sum'])
+
+
+def test_last_days_includes_the_whole_boundary_hour(redemptions):
+    rollup = build_rollup(redemptions, sum_columns=['cashback_amount'])
+    now = datetime(2024, 5, 18, 15, 40)
+    times = pd.to_datetime(redemptions['created_at'])
+    cutoff = pd.Timestamp(now) - pd.Timedelta(days=7)
+    included = (times >= cutoff.floor('h')).sum()
+    assert last_days(rollup, days=7, now=now)['count'].sum() == included
+
+
+def test_last_days_by_hour(redemptions):
+    rollup = build_rollup(redemptions)
+    hourly = last_days(rollup, days=2, now=datetime(2024, 5, 21), freq='h')
+    assert len(hourly) == 48
+    assert hourly['created_at'].dtype.kind == 'M'
+
+
+def test_merged_rollups_equal_the_rollup_of_both(redemptions):
+    first, second = redemptions.iloc[:8000], redemptions.iloc[8000:]
+    merged = merge_rollups(build_rollup(first, sum_columns=['cashback_amount']),
+                           build_rollup(second, sum_columns=['cashback_amount']))
+    whole = build_rollup(redemptions, sum_columns=['cashback_amount'])
+    pd.testing.assert_frame_equal(merged, whole, check_names=False)
+    with pytest.raises(ValueError):
+        merge_rollups(whole, build_rollup(redemptions, freq='D'))
+
+
+def test_parse_timestamps_accepts_iso8601():
+    parsed = parse_timestamps(pd.Series(['2024-05-01T10:00:00', '2024-05-02T11:30:00']))
+    assert parsed.dtype.kind == 'M'
@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from campaign_report import campaign_report_from_store
+from engine.aggregate_store import AggregateStore
+from report_snapshot import _table_fields, load_snapshot, save_snapshot
+
+
+@pytest.fixture
+def report(tmp_path):
+    rng = np.random.default_rng(3)
+    rows = 500
+
+    def times(count):
+        return pd.Timestamp('2024-05-01') + pd.to_timedelta(rng.integers(0, 5 * 86400, count), 's')
+
+    store = AggregateStore(tmp_path / 'store')
+    store.update('card', pd.DataFrame({
+        'cardholder_id': [f"h{i}" for i in rng.integers(0, 200, rows)],
+        'card_id': [f"c{i}" for i in rng.integers(0, 400, rows)],
+        'issuer_bin': rng.choice([4097, 4205, 4297], rows),
+        'created_at': times(rows),
+    }), 'card')
+    store.update('transaction', pd.DataFrame({
+        'transaction_id': np.arange(rows),
+        'transaction_amount': rng.integers(100, 9000, rows).astype('float64'),
+        'cashback_amount': rng.integers(0, 300, rows).astype('float64'),
+    }), 'transaction')
+    store.update('redemption', pd.DataFrame({
+        'transaction_id': rng.choice(rows, 100, replace=False),
+        'cashback_amount': rng.integers(0, 300, 100).astype('float64'),
+        'name': rng.choice(['Shop A', 'Cafe'], 100),
+        'created_at': times(100),
+    }), 'redemption')
+    return campaign_report_from_store(store)
+
+
+@pytest.mark.parametrize('name', ['snapshot', 'snapshot.zip'])
+def test_round_trip(report, tmp_path, name):
+    generated = {'generated_cardholder': '2024-05-06 09:00'}
+    sources = {'card': {'file': 'card.csv', 'hash': 'abc'}}
+    path = save_snapshot(report, str(tmp_path / 'out' / name), generated=generated, sources=sources)
+
+    snapshot = load_snapshot(path)
+    loaded = snapshot.report
+    assert (loaded.unique_cardholders, loaded.unique_cards) == (report.unique_cardholders, report.unique_cards)
+    assert loaded.approximate == report.approximate
+    for field in _table_fields(type(report)):
+        if getattr(report, field) is None:
+            assert getattr(loaded, field) is None
+        else:
+            pd.testing.assert_frame_equal(getattr(loaded, field), getattr(report, field))
+    assert len(snapshot.charts) == len(report.figures())
+    assert snapshot.generated['generated_cardholder'] == '2024-05-06 09:00'
+    assert snapshot.sources == sources
+
+    # Saving again replaces the snapshot in place
+    save_snapshot(report, path)
+    assert load_snapshot(path).generated['generated_cardholder'] == ''
+    assert os.listdir(tmp_path / 'out') == [name]